@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_review_api.settings')
+# Serve the hot read endpoints from the async views (REVIEWS_ASYNC_READS)
+os.environ.setdefault('ASYNC_READS', 'True')
 
 application = get_asgi_application()
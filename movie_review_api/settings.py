@@ -53,8 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'reviews.middleware.RequestMetricsMiddleware',  # first, so timings cover the whole stack
+    'reviews.middleware.RequestProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise for static files
+    'reviews.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise for static files, async-capable
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -104,6 +106,81 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# Use Redis when REDIS_URL is set (shared across workers), local memory otherwise
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'movie-review-api',
+        }
+    }
+
+# Versioned response cache for public read endpoints (see reviews/cache.py).
+# Writes only expire other workers' entries through a shared cache: without
+# REDIS_URL, run one worker or set RESPONSE_CACHE_ENABLED=False
+# (`manage.py check --deploy` warns, reviews.W002)
+REVIEWS_RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300)),
+    'ENABLED': os.environ.get('RESPONSE_CACHE_ENABLED', 'True') == 'True',
+}
+
+# Matrix factorization model files (see reviews/recommendations.py); use a
+# directory on local disk so workers can memory-map the arrays
+REVIEWS_RECOMMENDER = {
+    'MODEL_DIR': Path(os.environ.get('RECOMMENDER_MODEL_DIR', BASE_DIR / 'var' / 'recommender')),
+}
+
+
+# Per-route request metrics served at /metrics (see reviews/metrics.py)
+REVIEWS_METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', 'True') == 'True',
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+# Staff-only cProfile capture of flagged requests (see reviews/profiling.py)
+REVIEWS_PROFILER = {
+    'ENABLED': os.environ.get('PROFILER_ENABLED', 'True') == 'True',
+    'DIR': Path(os.environ.get('PROFILE_DIR', BASE_DIR / 'var' / 'profiles')),
+}
+
+# Authenticated users are cached for a short time instead of loaded per
+# request (see reviews/authentication.py); 0 disables the cache
+REVIEWS_AUTH = {
+    'ALIAS': 'default',
+    'USER_CACHE_TIMEOUT': int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60)),
+}
+
+# Top-rated leaderboards (see reviews/rankings.py); an unset prior weight is
+# refitted to the mean review count by `manage.py rebuild_rankings`
+REVIEWS_RANKINGS = {
+    'PRIOR_WEIGHT': float(os.environ['RANKINGS_PRIOR_WEIGHT']) if os.environ.get('RANKINGS_PRIOR_WEIGHT') else None,
+    'MIN_REVIEWS': int(os.environ.get('RANKINGS_MIN_REVIEWS', 1)),
+}
+
+# Trending movies (see reviews/trending.py); run `manage.py compact_trending`
+# hourly to expire old activity
+REVIEWS_TRENDING = {
+    'HALF_LIFE_HOURS': float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 24)),
+    'WINDOW_HOURS': int(os.environ.get('TRENDING_WINDOW_HOURS', 168)),
+    'TOP_N': int(os.environ.get('TRENDING_TOP_N', 100)),
+}
+
+# Serve the hot read endpoints from async views (see reviews/async_views.py).
+# Only worth it under ASGI; movie_review_api/asgi.py turns it on by default
+REVIEWS_ASYNC_READS = os.environ.get('ASYNC_READS', 'False') == 'True'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -161,18 +238,38 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "reviews.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "reviews.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
     "EXCEPTION_HANDLER": "reviews.exceptions.custom_exception_handler",
+    "DEFAULT_THROTTLE_CLASSES": [
+        "reviews.throttling.ScopedCacheThrottle",
+    ],
+}
+
+# Rate limits per view scope (see reviews/throttling.py): the view's
+# throttle_scope if set (the catalog import's is "movie-import"), else
+# "<basename>-<action>" for viewset actions and the URL name for other
+# views. Authenticated users are limited per user, anonymous requests per IP
+REVIEWS_THROTTLE = {
+    'ENABLED': os.environ.get('THROTTLE_ENABLED', 'True') == 'True',
+    'ALIAS': 'default',
+    'RATES': {
+        'user_register': '5/hour',
+        'token_obtain_pair': '10/min',
+        'token_refresh': '30/min',
+        'review-create': '30/min',
+        'review-batch': '10/min',
+        'movie-import': '10/hour',
+    },
 }
 
 # JWT Settings
@@ -184,6 +281,20 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Rotated-out refresh tokens are revoked in reviews/revocation.py, not
+    # the token_blacklist app
+    "TOKEN_REFRESH_SERIALIZER": "reviews.authentication.RevokingTokenRefreshSerializer",
+}
+
+# Revoked refresh tokens (see reviews/revocation.py); PATH keeps them across
+# restarts when the cache is per process. Refusing a replayed rotated token on
+# every worker needs a shared cache: set REDIS_URL when running several workers
+# (`check --deploy` and worker startup warn otherwise)
+REVIEWS_REVOCATION = {
+    'ALIAS': 'default',
+    'PATH': Path(os.environ.get('REVOKED_TOKENS_PATH', BASE_DIR / 'var' / 'revoked_tokens.json')),
+    'SAVE_INTERVAL': int(os.environ.get('REVOKED_TOKENS_SAVE_INTERVAL', 60)),
+    'BLOOM_FILTER': os.environ.get('REVOKED_TOKENS_BLOOM_FILTER', 'False') == 'True',
 }
 
 # Logging configuration
@@ -6,10 +6,12 @@ The `urlpatterns` list routes URLs to views. For more information please see:
 """
 from django.contrib import admin
 from django.urls import path, include
+from reviews.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('reviews.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     # Frontend routes
     path('', include('reviews.frontend_urls')),
 ]
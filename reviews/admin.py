@@ -1,11 +1,25 @@
 from django.contrib import admin
-from .models import Movie, Review
+from .models import Genre, Movie, Review
+
+
+@admin.register(Genre)
+class GenreAdmin(admin.ModelAdmin):
+    list_display = ("id", "name")
+    search_fields = ("name",)
 
 
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "genre", "release_year", "created_at")
+    list_display = (
+        "id", "title", "genre", "release_year", "review_count", "average_rating", "created_at",
+    )
+    readonly_fields = (
+        "review_count", "rating_sum", "average_rating",
+        "rating_1_count", "rating_2_count", "rating_3_count", "rating_4_count", "rating_5_count",
+    )
     search_fields = ("title", "genre")
+    list_filter = ("genres",)
+    filter_horizontal = ("genres",)
 
 
 @admin.register(Review)
@@ -1,5 +1,25 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import checks, signals
+        from .cache import stale_responses_warning
+        from .revocation import replay_protection_warning
+
+        post_migrate.connect(signals.repair_search_index, sender=self)
+
+        # Deploy checks only run on request; warn every production worker
+        if not settings.DEBUG:
+            for message in (replay_protection_warning(), stale_responses_warning()):
+                if message:
+                    logger.warning(message)
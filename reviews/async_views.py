@@ -0,0 +1,92 @@
+"""
+Async read path for ASGI deployments.
+
+The hot read endpoints (movie list/detail, a movie's reviews and the review
+list) have async counterparts on their viewsets, named after the sync
+action with an `a` prefix (`alist`, `aretrieve`, `areviews`). They build
+the same querysets through the same filters, serializers and response cache
+keys, but fetch rows with the async ORM (`acount()`, `aget()`, `async for`)
+so the event loop serves other requests while a query runs.
+
+DRF views are synchronous, so as_async_view() wraps the router's view for a
+URL: GET and HEAD run the viewset's async handler, everything else (writes,
+OPTIONS) falls through to the sync view unchanged. reviews/urls.py mounts
+these ahead of the router when REVIEWS_ASYNC_READS is on, which
+movie_review_api/asgi.py does by default.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+
+ASYNC_METHODS = ('get', 'head')
+
+
+class AsyncReadMixin:
+    """Async counterparts of the GenericAPIView helpers used by read actions."""
+
+    async def aget_object(self):
+        """Async get_object(), with the same filtering, 404 and object permission check."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """Async paginate_queryset(); None when pagination is off."""
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+
+def as_async_view(sync_view):
+    """
+    Wrap a view built by the router (ViewSet.as_view) so that GET and HEAD
+    requests run the viewset's async handler for the action, e.g. `alist`
+    for `list`.
+    """
+    viewset, initkwargs = sync_view.cls, sync_view.initkwargs
+    actions = {**sync_view.actions}
+    actions.setdefault('head', actions['get'])
+    handler_name = f"a{actions['get']}"
+    if not hasattr(viewset, handler_name):
+        raise TypeError(f'{viewset.__name__} has no async handler {handler_name}().')
+    fallback = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method.lower() not in ASYNC_METHODS:
+            return await fallback(request, *args, **kwargs)
+
+        # The same set-up as ViewSet.as_view() and APIView.dispatch()
+        self = viewset(**initkwargs)
+        self.action_map = actions
+        for method, action in actions.items():
+            setattr(self, method, getattr(self, action))
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            if 'HTTP_AUTHORIZATION' in request.META:
+                # Authenticating a token may load the user from the database
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+            else:
+                self.initial(request, *args, **kwargs)
+            response = await getattr(self, handler_name)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    view.cls = viewset
+    view.initkwargs = initkwargs
+    view.actions = actions
+    return csrf_exempt(view)
@@ -0,0 +1,127 @@
+"""
+JWT authentication that serves users from the cache.
+
+simplejwt's JWTAuthentication loads the user row on every authenticated
+request. CachedJWTAuthentication keeps each user it loads in the cache for
+REVIEWS_AUTH['USER_CACHE_TIMEOUT'] seconds, so repeat requests with a token
+skip that query. Only the fields authentication and permission checks read
+are cached (CACHED_FIELDS, never the password hash); the user is rebuilt
+from them with its other fields deferred, so they load on first access.
+Saving or deleting a user evicts its entry (see
+reviews.signals), both straight away and again when the transaction commits,
+so a request racing the write cannot cache the old row. QuerySet.update()
+sends no signals; call forget_user() after one that changes users. With the
+local-memory cache each process has its own copy, and the timeout bounds
+how long another process can serve the old one.
+
+RevokingTokenRefreshSerializer (SIMPLE_JWT['TOKEN_REFRESH_SERIALIZER'])
+refuses revoked refresh tokens and, with BLACKLIST_AFTER_ROTATION, revokes
+each token it rotates out, using reviews.revocation instead of the
+token_blacklist app. It also reads the user through the cache.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import get_store
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'USER_CACHE_TIMEOUT': 60,   # seconds an authenticated user stays cached
+}
+# Entries are dump_user() tuples
+KEY_PREFIX = 'reviews:auth:user-fields'
+CACHED_FIELDS = ('is_active', 'is_staff', 'is_superuser')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_AUTH', {})}
+
+
+def get_cache():
+    return caches[get_config()['ALIAS']]
+
+
+def user_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def forget_user(user_id):
+    """Evict a cached user now and once the current transaction commits."""
+    key = user_key(user_id)
+    get_cache().delete(key)
+    transaction.on_commit(lambda: get_cache().delete(key))
+
+
+def cached_field_names():
+    """Attnames of the user fields kept in the cache, in concrete field order."""
+    User = get_user_model()
+    wanted = {User._meta.pk.attname, User.USERNAME_FIELD, *CACHED_FIELDS}
+    return [field.attname for field in User._meta.concrete_fields if field.attname in wanted]
+
+
+def dump_user(user):
+    return tuple(getattr(user, name) for name in cached_field_names())
+
+
+def load_user(values):
+    """Rebuild a user from dump_user() as if loaded from the database with .only()."""
+    User = get_user_model()
+    return User.from_db(router.db_for_read(User), cached_field_names(), values)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that looks users up in the cache before the database."""
+
+    def get_user(self, validated_token):
+        timeout = get_config()['USER_CACHE_TIMEOUT']
+        if not timeout:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        cache = get_cache()
+        key = user_key(user_id)
+        values = cache.get(key)
+        if values is not None:
+            return load_user(values)
+        # Raises for unknown and inactive users, which are never cached
+        user = super().get_user(validated_token)
+        cache.set(key, dump_user(user), timeout)
+        return user
+
+
+class RevokingTokenRefreshSerializer(TokenRefreshSerializer):
+    """TokenRefreshSerializer backed by the revocation store instead of the database."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        jti, expires = refresh[api_settings.JTI_CLAIM], refresh['exp']
+        store = get_store()
+        revoke_on_rotation = api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+        if revoke_on_rotation:
+            # Claim the token before handing out its successor: only one of
+            # several concurrent refreshes with it can succeed
+            if not store.claim(jti, expires):
+                raise InvalidToken('Token is blacklisted')
+        elif store.is_revoked(jti):
+            raise InvalidToken('Token is blacklisted')
+        try:
+            CachedJWTAuthentication().get_user(refresh)
+        except AuthenticationFailed:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
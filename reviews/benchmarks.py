@@ -0,0 +1,404 @@
+"""
+Endpoint benchmark and query-count regression harness.
+
+Seeds a synthetic dataset of configurable size, then drives every route in
+reviews/urls.py through the Django test client, recording per endpoint the
+exact number of SQL queries, p50/p95 latency and throughput. Results are
+compared against a JSON baseline: any growth in query count is a
+regression (that is how an N+1 shows up, since list pages have a fixed
+size), and so is a median latency above baseline by more than the threshold.
+
+Used by `manage.py benchmark_endpoints` (which also records the baseline)
+and by the test suite in reviews/tests/. The response cache is disabled
+while measuring so every request reaches the database, and so is
+throttling, which the repeated writes would trip.
+"""
+import json
+import math
+import random
+import tempfile
+import time
+from contextlib import ExitStack
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import get_config
+from .models import Genre, Movie, Review
+from .recommendations import save, train
+from .similarity import build_similarities
+
+User = get_user_model()
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'tests' / 'endpoint_baseline.json'
+DEFAULT_DATASET = {'movies': 300, 'users': 100, 'reviews_per_user': 30}
+DEFAULT_LATENCY_THRESHOLD = 0.5
+# Latency differences below this many ms are noise, whatever the ratio
+LATENCY_FLOOR_MS = 2.0
+PASSWORD = 'bench-password'
+SEARCH_TERM = 'river'
+BATCH_SIZE = 10
+IMPORT_ROWS = 100
+GENRES = ['Action', 'Comedy', 'Drama', 'Horror', 'Romance', 'Sci-Fi']
+TITLE_WORDS = (
+    ['Silent', 'Golden', 'Broken', 'Last', 'Hidden', 'Crimson'],
+    ['River', 'Empire', 'Garden', 'Signal', 'Harbor', 'Voyage', 'Winter'],
+)
+# Statements that only exist because tests run inside a transaction
+TRANSACTION_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def seed_dataset(movies=300, users=100, reviews_per_user=30, calls=20, seed=0):
+    """
+    Create the benchmark dataset and return the context the endpoints need.
+
+    `calls` is the number of requests made per endpoint: the writer user
+    gets that many reviews to delete and that many unreviewed movies to
+    review, the importer user BATCH_SIZE unreviewed movies per call, and
+    the reader that many refresh tokens.
+    """
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    genres = Genre.objects.bulk_create([Genre(name=name) for name in GENRES])
+
+    movie_objects = Movie.objects.bulk_create([
+        Movie(
+            title=f'{rng.choice(TITLE_WORDS[0])} {rng.choice(TITLE_WORDS[1])} {index}',
+            description=f'Benchmark movie number {index}.',
+            release_year=1950 + index % 70,
+        )
+        for index in range(max(movies, (BATCH_SIZE + 2) * calls + 2))
+    ])
+    links = []
+    for movie in movie_objects:
+        for genre in rng.sample(genres, 2):
+            links.append(Movie.genres.through(movie_id=movie.id, genre_id=genre.id))
+    Movie.genres.through.objects.bulk_create(links)
+
+    reader = User.objects.create(username='bench_reader', password=password)
+    writer = User.objects.create(username='bench_writer', password=password)
+    admin = User.objects.create(username='bench_admin', password=password, is_staff=True)
+    importer = User.objects.create(username='bench_importer', password=password)
+    user_objects = [reader] + User.objects.bulk_create([
+        User(username=f'bench_user_{index}', password=password) for index in range(users)
+    ])
+
+    reviews = []
+    reviewed = movie_objects[:-(2 * calls + 1)] or movie_objects
+    for user in user_objects:
+        for movie in rng.sample(reviewed, min(reviews_per_user, len(reviewed))):
+            reviews.append(Review(
+                movie=movie,
+                user=user,
+                rating=rng.randint(1, 5),
+                content=f'A {rng.choice(TITLE_WORDS[1]).lower()} of a film, honestly.',
+            ))
+    # The writer's own reviews: one to edit and `calls` to delete; the
+    # remaining tail movies are left for it to review
+    tail = movie_objects[-(2 * calls + 1):]
+    writer_reviews = [
+        Review(movie=movie, user=writer, rating=3, content='Benchmark writer review.')
+        for movie in tail[:calls + 1]
+    ]
+    Review.objects.bulk_create(reviews + writer_reviews, batch_size=1000)
+
+    # Bulk inserts skip the signals that maintain the denormalized stats
+    call_command('rebuild_movie_stats', stdout=StringIO())
+    call_command('rebuild_rankings', stdout=StringIO())
+    call_command('compact_trending', rebuild=True, stdout=StringIO())
+
+    movie = reviewed[0]
+    return {
+        'movie_id': movie.id,
+        'review_id': Review.objects.filter(movie=movie).values_list('id', flat=True).first(),
+        'reader': reader,
+        'writer': writer,
+        'admin': admin,
+        'importer': importer,
+        'edit_review_id': writer_reviews[0].id,
+        'delete_review_ids': [review.id for review in writer_reviews[1:]],
+        'create_movie_ids': [movie.id for movie in tail[calls + 1:]],
+        'batch_movie_ids': [movie.id for movie in movie_objects[:BATCH_SIZE * calls]],
+        'refresh_tokens': [str(RefreshToken.for_user(reader)) for _ in range(calls)],
+    }
+
+
+class Endpoint:
+    """
+    One benchmarked request. `path` and `data` may be callables taking
+    (context, call_index) for requests that need fresh targets per call.
+    `max_calls` caps the requests made, for endpoints dominated by
+    password hashing. `multipart` sends `data` as a form upload instead of
+    JSON.
+    """
+
+    def __init__(self, name, method, path, status=200, data=None, auth=None, max_calls=None,
+                 multipart=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.status = status
+        self.data = data
+        self.auth = auth
+        self.max_calls = max_calls
+        self.multipart = multipart
+
+    def resolve(self, value, context, index):
+        return value(context, index) if callable(value) else value
+
+
+def _movie(path=''):
+    return lambda context, index: f"/api/movies/{context['movie_id']}/{path}"
+
+
+def _catalog(context, index):
+    """A CSV catalog upload: half the rows update seeded movies, half are new."""
+    lines = ['external_id,title,release_year,genres']
+    for position in range(IMPORT_ROWS):
+        key = f'bench:{position}' if position % 2 else f'bench:{index}:{position}'
+        lines.append(f'{key},Imported Feature {position},1999,Drama|Thriller')
+    return {'file': SimpleUploadedFile('catalog.csv', '\n'.join(lines).encode())}
+
+
+ENDPOINTS = [
+    Endpoint('api-root', 'get', '/api/'),
+    # Movies
+    Endpoint('movie-list', 'get', '/api/movies/'),
+    Endpoint('movie-list-search', 'get', f'/api/movies/?search={SEARCH_TERM}'),
+    Endpoint('movie-list-relevance', 'get', f'/api/movies/?search={SEARCH_TERM}&ordering=relevance'),
+    Endpoint('movie-list-ordering', 'get', '/api/movies/?ordering=-average_rating'),
+    Endpoint('movie-list-genre', 'get', '/api/movies/?genre=Drama,Comedy'),
+    Endpoint('movie-detail', 'get', _movie()),
+    Endpoint('movie-reviews', 'get', _movie('reviews/')),
+    Endpoint('movie-reviews-rating', 'get', _movie('reviews/?rating=4')),
+    Endpoint('movie-reviews-ordering', 'get', _movie('reviews/?ordering=-rating')),
+    Endpoint('movie-reviews-cursor', 'get', _movie('reviews/?pagination=cursor')),
+    Endpoint('movie-similar', 'get', _movie('similar/')),
+    Endpoint('movie-top', 'get', '/api/movies/top/'),
+    Endpoint('movie-top-genre', 'get', '/api/movies/top/?genre=Drama&min_reviews=5'),
+    Endpoint('movie-top-year', 'get', '/api/movies/top/?year=1990'),
+    Endpoint('movie-top-cursor', 'get', '/api/movies/top/?pagination=cursor'),
+    Endpoint('movie-trending', 'get', '/api/movies/trending/'),
+    # Reviews
+    Endpoint('review-list', 'get', '/api/reviews/'),
+    Endpoint('review-list-search', 'get', f'/api/reviews/?search={SEARCH_TERM}'),
+    Endpoint('review-list-ordering', 'get', '/api/reviews/?ordering=-rating'),
+    Endpoint('review-list-rating', 'get', '/api/reviews/?rating=5'),
+    Endpoint('review-list-movie-title', 'get', f'/api/reviews/?movie_title={SEARCH_TERM}'),
+    Endpoint('review-list-cursor', 'get', '/api/reviews/?pagination=cursor'),
+    Endpoint('review-detail', 'get', lambda context, index: f"/api/reviews/{context['review_id']}/"),
+    # Users
+    Endpoint('user-list', 'get', '/api/users/', auth='reader'),
+    Endpoint('user-detail', 'get', lambda context, index: f"/api/users/{context['reader'].id}/", auth='reader'),
+    Endpoint('user-recommendations', 'get', '/api/users/me/recommendations/', auth='reader'),
+    # Authentication
+    Endpoint(
+        'auth-token', 'post', '/api/auth/token/',
+        data={'username': 'bench_reader', 'password': PASSWORD}, max_calls=5,
+    ),
+    Endpoint(
+        'auth-token-refresh', 'post', '/api/auth/token/refresh/',
+        # Rotation revokes each refresh token, so every call needs its own
+        data=lambda context, index: {'refresh': context['refresh_tokens'][index]},
+    ),
+    Endpoint(
+        'auth-register', 'post', '/api/auth/register/', status=201, max_calls=5,
+        data=lambda context, index: {
+            'username': f'bench_new_{index}',
+            'email': f'bench_new_{index}@example.com',
+            'password': PASSWORD,
+            'password_confirm': PASSWORD,
+        },
+    ),
+    # Exports
+    Endpoint('export-reviews', 'get', '/api/export/reviews/', auth='admin'),
+    Endpoint('export-reviews-csv', 'get', '/api/export/reviews/?format=csv&rating=5', auth='admin'),
+    Endpoint('export-movies', 'get', '/api/export/movies/?format=csv', auth='admin'),
+    # Writes
+    Endpoint(
+        'movie-import', 'post', '/api/movies/import/', auth='admin', data=_catalog,
+        multipart=True,
+    ),
+    Endpoint(
+        'movie-create', 'post', '/api/movies/', status=201, auth='admin',
+        data=lambda context, index: {
+            'title': f'Benchmark Premiere {index}',
+            'release_year': 2024,
+            'genres': ['Drama', 'Comedy'],
+        },
+    ),
+    Endpoint(
+        'movie-update', 'patch', _movie(), auth='admin',
+        data=lambda context, index: {'description': f'Updated description {index}.'},
+    ),
+    Endpoint(
+        'review-create', 'post', '/api/reviews/', status=201, auth='writer',
+        data=lambda context, index: {
+            'movie_id': context['create_movie_ids'][index],
+            'rating': index % 5 + 1,
+            'content': 'Benchmark review.',
+        },
+    ),
+    Endpoint(
+        'review-batch', 'post', '/api/reviews/batch/', status=201, auth='importer',
+        data=lambda context, index: [
+            {'movie_id': movie_id, 'rating': position % 5 + 1, 'content': 'Imported review.'}
+            for position, movie_id in enumerate(
+                context['batch_movie_ids'][index * BATCH_SIZE:(index + 1) * BATCH_SIZE]
+            )
+        ],
+    ),
+    Endpoint(
+        'review-update', 'patch', lambda context, index: f"/api/reviews/{context['edit_review_id']}/",
+        auth='writer', data=lambda context, index: {'rating': index % 5 + 1},
+    ),
+    Endpoint(
+        'review-delete', 'delete',
+        lambda context, index: f"/api/reviews/{context['delete_review_ids'][index]}/",
+        status=204, auth='writer',
+    ),
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _count_queries(captured):
+    return sum(
+        1 for query in captured.captured_queries
+        if not query['sql'].startswith(TRANSACTION_SQL)
+    )
+
+
+def measure(client, endpoint, context, calls, warmup=1):
+    """Issue `calls` requests (the first `warmup` unrecorded) and summarize them."""
+    headers = {}
+    if endpoint.auth:
+        token = RefreshToken.for_user(context[endpoint.auth]).access_token
+        headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    latencies, queries = [], []
+    started_all = None
+    for index in range(calls):
+        if index == warmup:
+            started_all = time.perf_counter()
+        path = endpoint.resolve(endpoint.path, context, index)
+        data = endpoint.resolve(endpoint.data, context, index)
+        send = getattr(client, endpoint.method)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            if endpoint.method == 'get':
+                response = send(path, **headers)
+            elif endpoint.multipart:
+                response = send(path, data=data, **headers)
+            else:
+                response = send(path, data=data, content_type='application/json', **headers)
+            if response.streaming:
+                # Exports do their queries while the body is consumed
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        if response.status_code != endpoint.status:
+            raise AssertionError(
+                f'{endpoint.name}: {endpoint.method.upper()} {path} returned '
+                f'{response.status_code}, expected {endpoint.status}: {response.content[:300]!r}'
+            )
+        if index >= warmup:
+            latencies.append(elapsed * 1000)
+            queries.append(_count_queries(captured))
+    total = time.perf_counter() - started_all
+    return {
+        'method': endpoint.method.upper(),
+        'path': endpoint.resolve(endpoint.path, context, 0),
+        'queries': max(queries),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'requests_per_second': round(len(latencies) / total, 1),
+        'samples': len(latencies),
+    }
+
+
+def run_benchmark(context, repeat=10, warmup=1, endpoints=None):
+    """
+    Measure every endpoint (or those named in `endpoints`) and return
+    {name: result}. `context` must come from seed_dataset() with
+    calls >= repeat + warmup. The similar-movies table and a recommender model are
+    built from the seeded data first; the model goes to a temporary
+    directory.
+    """
+    selected = [
+        endpoint for endpoint in ENDPOINTS if endpoints is None or endpoint.name in endpoints
+    ]
+    results = {}
+    with ExitStack() as stack:
+        model_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            REVIEWS_RESPONSE_CACHE={**get_config(), 'ENABLED': False},
+            REVIEWS_THROTTLE={'ENABLED': False},
+            REVIEWS_RECOMMENDER={'MODEL_DIR': Path(model_dir)},
+        ))
+        build_similarities()
+        save(*train(iterations=5))
+        caches['default'].clear()
+
+        client = Client()
+        for endpoint in selected:
+            calls = repeat + warmup
+            if endpoint.max_calls:
+                calls = min(calls, endpoint.max_calls + warmup)
+            results[endpoint.name] = measure(client, endpoint, context, calls, warmup)
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def write_baseline(results, dataset, path=BASELINE_PATH):
+    payload = {'dataset': dataset, 'endpoints': results}
+    Path(path).write_text(json.dumps(payload, indent=2, sort_keys=True) + '\n')
+
+
+def compare(results, baseline, latency_threshold=DEFAULT_LATENCY_THRESHOLD, check_latency=True):
+    """
+    Return a list of human-readable regressions of `results` against
+    `baseline`. Endpoints missing from the baseline are not regressions.
+    """
+    regressions = []
+    recorded = (baseline or {}).get('endpoints', {})
+    for name, result in results.items():
+        expected = recorded.get(name)
+        if expected is None:
+            continue
+        if result['queries'] > expected['queries']:
+            regressions.append(
+                f"{name}: {result['queries']} queries, baseline {expected['queries']}"
+            )
+        if check_latency:
+            # p50 rather than p95: with a few dozen samples the p95 is a
+            # single request, and one GC pause would fail the run
+            limit = max(
+                expected['p50_ms'] * (1 + latency_threshold),
+                expected['p50_ms'] + LATENCY_FLOOR_MS,
+            )
+            if result['p50_ms'] > limit:
+                regressions.append(
+                    f"{name}: p50 {result['p50_ms']:.2f} ms, baseline "
+                    f"{expected['p50_ms']:.2f} ms (limit {limit:.2f} ms)"
+                )
+    return regressions
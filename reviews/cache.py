@@ -0,0 +1,266 @@
+"""
+Versioned response cache for the public read endpoints.
+
+Cached entries are keyed on the request (path, sorted query params, host and
+renderer) plus the current value of every version counter the response
+depends on. Writes bump those counters (see reviews.signals), so a stale
+entry is never looked up again and simply expires. That only holds when
+every worker shares the cache: with a per-process cache such as LocMemCache
+a write bumps the counters of one worker, and the others keep serving their
+entries until TIMEOUT (see stale_responses_warning()). Misses are computed under
+a short cache lock so concurrent requests for the same key wait for one
+database hit instead of stampeding.
+
+Works with any Django cache backend; configure it with
+REVIEWS_RESPONSE_CACHE in settings. The decorators also accept async view
+methods, which go through the backend's async API instead.
+"""
+import asyncio
+import functools
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,        # seconds a rendered payload stays cached
+    'LOCK_TIMEOUT': 10,    # seconds before an abandoned single-flight lock expires
+    'WAIT_TIMEOUT': 2.0,   # seconds a follower waits for the leader's result
+    'POLL_INTERVAL': 0.02,
+    'ENABLED': True,
+}
+KEY_PREFIX = 'reviews:resp'
+VERSION_PREFIX = 'reviews:ver'
+GLOBAL_SCOPE = 'all'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_RESPONSE_CACHE', {})}
+
+
+def get_cache():
+    return caches[get_config()['ALIAS']]
+
+
+def stale_responses_warning():
+    """
+    Why other workers can serve stale responses, or None: writes bump the
+    version counters in the cache, which must be shared by all workers.
+    """
+    config = get_config()
+    if not config['ENABLED']:
+        return None
+    alias = config['ALIAS']
+    if not isinstance(caches[alias], LocMemCache):
+        return None
+    return (
+        f"API responses are cached in the '{alias}' cache, which is not shared between "
+        f"processes: with several workers a write only expires the responses of the worker "
+        f"that handled it, and the others serve stale pages for up to "
+        f"{config['TIMEOUT']} seconds. Point REVIEWS_RESPONSE_CACHE['ALIAS'] at a shared "
+        f"cache (set REDIS_URL) or turn the response cache off."
+    )
+
+
+def _version_key(scope):
+    return f'{VERSION_PREFIX}:{scope}'
+
+
+def get_versions(scopes):
+    """Return the current version of each scope, fetched in one round trip."""
+    cache = get_cache()
+    keys = [_version_key(scope) for scope in [GLOBAL_SCOPE, *scopes]]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start (or restart, after eviction) from a unique value so a
+            # counter that was lost can never reuse an old version number
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(scopes):
+    """Async get_versions()."""
+    cache = get_cache()
+    keys = [_version_key(scope) for scope in [GLOBAL_SCOPE, *scopes]]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """Invalidate every cached response that depends on one of `scopes`."""
+    cache = get_cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_on_commit(*scopes):
+    """Bump versions once the current transaction commits (immediately in autocommit)."""
+    transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+def invalidate_all():
+    """Invalidate every cached response, e.g. after bulk writes that skip signals."""
+    bump_versions(GLOBAL_SCOPE)
+
+
+def build_key(view, request, scopes):
+    return _key(view, request, get_versions(scopes))
+
+
+async def abuild_key(view, request, scopes):
+    return _key(view, request, await aget_versions(scopes))
+
+
+def _key(view, request, versions):
+    params = sorted(request.query_params.lists())
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = '|'.join([
+        view.basename,
+        view.action or '',
+        request.get_host(),
+        request.path,
+        repr(params),
+        getattr(renderer, 'format', ''),
+        ','.join(str(version) for version in versions),
+    ])
+    return f'{KEY_PREFIX}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+
+def serve(view, request, compute):
+    """Return a cached Response for this request, computing it at most once per key."""
+    config = get_config()
+    if not config['ENABLED'] or request.method != 'GET':
+        return compute()
+
+    cache = get_cache()
+    key = build_key(view, request, view.get_cache_scopes())
+    data = cache.get(key)
+    if data is not None:
+        return _cached_response(data, 'HIT')
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, timeout=config['LOCK_TIMEOUT']):
+        # Another request is computing this key; wait for its result
+        deadline = time.monotonic() + config['WAIT_TIMEOUT']
+        while time.monotonic() < deadline:
+            time.sleep(config['POLL_INTERVAL'])
+            data = cache.get(key)
+            if data is not None:
+                return _cached_response(data, 'HIT')
+        return compute()
+
+    try:
+        response = compute()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=config['TIMEOUT'])
+            response['X-Cache'] = 'MISS'
+        return response
+    finally:
+        cache.delete(lock_key)
+
+
+async def aserve(view, request, compute):
+    """Async serve(); `compute` returns an awaitable. Followers wait without holding a thread."""
+    config = get_config()
+    if not config['ENABLED'] or request.method != 'GET':
+        return await compute()
+
+    cache = get_cache()
+    key = await abuild_key(view, request, view.get_cache_scopes())
+    data = await cache.aget(key)
+    if data is not None:
+        return _cached_response(data, 'HIT')
+
+    lock_key = f'{key}:lock'
+    if not await cache.aadd(lock_key, 1, timeout=config['LOCK_TIMEOUT']):
+        deadline = time.monotonic() + config['WAIT_TIMEOUT']
+        while time.monotonic() < deadline:
+            await asyncio.sleep(config['POLL_INTERVAL'])
+            data = await cache.aget(key)
+            if data is not None:
+                return _cached_response(data, 'HIT')
+        return await compute()
+
+    try:
+        response = await compute()
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(key, response.data, timeout=config['TIMEOUT'])
+            response['X-Cache'] = 'MISS'
+        return response
+    finally:
+        await cache.adelete(lock_key)
+
+
+def cached_value(view, request, name, compute):
+    """
+    Cache an auxiliary value (e.g. conditional GET validators) next to the
+    request's response, under the same versioned key.
+    """
+    config = get_config()
+    if not config['ENABLED'] or request.method != 'GET':
+        return compute()
+
+    cache = get_cache()
+    key = f'{build_key(view, request, view.get_cache_scopes())}:{name}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, timeout=config['TIMEOUT'])
+    return value
+
+
+async def acached_value(view, request, name, compute):
+    """Async cached_value(); `compute` returns an awaitable."""
+    config = get_config()
+    if not config['ENABLED'] or request.method != 'GET':
+        return await compute()
+
+    cache = get_cache()
+    key = f'{await abuild_key(view, request, view.get_cache_scopes())}:{name}'
+    value = await cache.aget(key)
+    if value is None:
+        value = await compute()
+        if value is not None:
+            await cache.aset(key, value, timeout=config['TIMEOUT'])
+    return value
+
+
+def _cached_response(data, state):
+    response = Response(data)
+    response['X-Cache'] = state
+    return response
+
+
+def cache_response(view_method):
+    """
+    Decorator for viewset read methods. The view must implement
+    get_cache_scopes() returning the version scopes its response depends on.
+    """
+    if iscoroutinefunction(view_method):
+        @functools.wraps(view_method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            return await aserve(self, request, lambda: view_method(self, request, *args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        return serve(self, request, lambda: view_method(self, request, *args, **kwargs))
+    return wrapper
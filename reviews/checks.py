@@ -0,0 +1,23 @@
+"""System checks for settings that are only unsafe in production."""
+from django.core import checks
+
+from .cache import stale_responses_warning
+from .revocation import replay_protection_warning
+
+
+@checks.register(checks.Tags.security, deploy=True)
+def check_revocation_cache(app_configs, **kwargs):
+    """Refresh token replay protection needs a cache shared by all workers."""
+    message = replay_protection_warning()
+    if message is None:
+        return []
+    return [checks.Warning(message, id='reviews.W001')]
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_response_cache(app_configs, **kwargs):
+    """Version bumps only reach every worker through a shared cache."""
+    message = stale_responses_warning()
+    if message is None:
+        return []
+    return [checks.Warning(message, id='reviews.W002')]
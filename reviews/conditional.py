@@ -0,0 +1,95 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the read endpoints.
+
+Validators are computed from cheap aggregate queries (max `updated_at` and
+row count of the filtered queryset) instead of from the rendered body, so a
+request whose If-None-Match / If-Modified-Since still matches gets a 304
+before anything is serialized. When the response cache is enabled the
+validators are cached under the same versioned key as the payload.
+"""
+import calendar
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+from .cache import acached_value, cached_value
+
+
+def build_validators(request, *parts):
+    """
+    Turn aggregate values into (etag, last_modified) for this request.
+
+    The ETag covers the full URL so different pages, filters and orderings
+    of the same collection never share one. Datetime parts are also used to
+    derive Last-Modified from the newest of them.
+    """
+    timestamps = [part for part in parts if hasattr(part, 'timetuple')]
+    last_modified = (
+        calendar.timegm(max(timestamps).utctimetuple()) if timestamps else None
+    )
+    raw = '|'.join([request.get_full_path(), *(str(part) for part in parts)])
+    etag = 'W/' + quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+    return etag, last_modified
+
+
+def conditional_response(view_method):
+    """
+    Decorator for viewset read methods. The view must implement
+    get_validators(request) returning (etag, last_modified), or None to skip
+    conditional handling (e.g. for a missing object or invalid params).
+    Async view methods use aget_validators(request) instead.
+    """
+    if iscoroutinefunction(view_method):
+        @functools.wraps(view_method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            try:
+                validators = await acached_value(
+                    self, request, 'validators', lambda: self.aget_validators(request)
+                )
+            except (TypeError, ValueError):
+                validators = None
+            if validators is None:
+                return await view_method(self, request, *args, **kwargs)
+
+            not_modified = _not_modified(request, validators)
+            if not_modified is not None:
+                return not_modified
+            return _add_validators(await view_method(self, request, *args, **kwargs), validators)
+        return async_wrapper
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        try:
+            validators = cached_value(
+                self, request, 'validators', lambda: self.get_validators(request)
+            )
+        except (TypeError, ValueError):
+            # Malformed lookups (e.g. a non-numeric pk) fall through to the
+            # view, which answers them with its own 404
+            validators = None
+        if validators is None:
+            return view_method(self, request, *args, **kwargs)
+
+        not_modified = _not_modified(request, validators)
+        if not_modified is not None:
+            return not_modified
+        return _add_validators(view_method(self, request, *args, **kwargs), validators)
+    return wrapper
+
+
+def _not_modified(request, validators):
+    etag, last_modified = validators
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def _add_validators(response, validators):
+    etag, last_modified = validators
+    if response.status_code == status.HTTP_200_OK:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,290 @@
+"""
+Offline evaluation of the recommenders on the bundled MovieLens 100k splits.
+
+Each registered recommender is trained on a split's `.base` file and scored
+on the matching `.test` file: RMSE/MAE of the predicted ratings,
+precision@K/recall@K of its top-K unseen movies (a test rating of at least
+`threshold` counts as relevant), training time and predictions per second.
+Everything works on plain (user_id, movie_id, rating) arrays read from the
+split files, so the database is never touched.
+
+Recommenders are looked up by name in DEFAULT_RECOMMENDERS, extended by
+the REVIEWS_RECOMMENDERS setting ({name: dotted path to a BaseRecommender
+subclass}).
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+import numpy as np
+from scipy import sparse
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .recommendations import fit_als
+from .similarity import DEFAULT_SHRINKAGE, rating_matrix, top_neighbors
+
+DEFAULT_DATA_DIR = Path(settings.BASE_DIR) / 'archive' / 'ml-100k'
+FOLDS = ['u1', 'u2', 'u3', 'u4', 'u5', 'ua', 'ub']
+DEFAULT_FOLDS = FOLDS[:5]
+
+DEFAULT_RECOMMENDERS = {
+    'baseline': 'reviews.evaluation.BaselineRecommender',
+    'als': 'reviews.evaluation.ALSRecommender',
+    'itemknn': 'reviews.evaluation.ItemKNNRecommender',
+}
+
+
+def get_recommenders():
+    """Return {name: dotted path} of every evaluable recommender."""
+    return {**DEFAULT_RECOMMENDERS, **getattr(settings, 'REVIEWS_RECOMMENDERS', {})}
+
+
+def load_split(path):
+    """Read a MovieLens ratings file into an (n, 3) array of (user_id, movie_id, rating)."""
+    return np.loadtxt(path, usecols=(0, 1, 2), dtype=np.float64).reshape(-1, 3)
+
+
+def _lookup(known_ids, ids):
+    """Return (positions, found) of `ids` in the sorted array `known_ids`."""
+    positions = np.minimum(np.searchsorted(known_ids, ids), len(known_ids) - 1)
+    return positions, known_ids[positions] == ids
+
+
+def _group(triples, column=1):
+    """Map each user id to the array of `column` values of its rows."""
+    order = np.argsort(triples[:, 0], kind='stable')
+    users, starts = np.unique(triples[order, 0], return_index=True)
+    return dict(zip(users.astype(np.int64), np.split(triples[order, column], starts[1:])))
+
+
+class BaseRecommender:
+    """Interface of an evaluable recommender; ids are raw user/movie ids."""
+
+    def fit(self, triples):
+        """Train on an (n, 3) array of (user_id, movie_id, rating)."""
+        raise NotImplementedError
+
+    def predict(self, user_ids, movie_ids):
+        """Return predicted ratings for the paired id arrays."""
+        raise NotImplementedError
+
+    def score_movies(self, user_id):
+        """Return (movie_ids, scores) over every known movie, higher is better."""
+        raise NotImplementedError
+
+
+class BaselineRecommender(BaseRecommender):
+    """Global mean plus regularized user and movie biases; the bar to beat."""
+
+    def __init__(self, regularization=10.0, iterations=5):
+        self.regularization = regularization
+        self.iterations = iterations
+
+    def fit(self, triples):
+        self.user_ids, users = np.unique(triples[:, 0], return_inverse=True)
+        self.movie_ids, movies = np.unique(triples[:, 1], return_inverse=True)
+        ratings = triples[:, 2]
+        self.global_mean = ratings.mean()
+        self.user_bias = np.zeros(len(self.user_ids))
+        self.movie_bias = np.zeros(len(self.movie_ids))
+        user_counts = np.bincount(users, minlength=len(self.user_ids))
+        movie_counts = np.bincount(movies, minlength=len(self.movie_ids))
+        for _ in range(self.iterations):
+            residual = ratings - self.global_mean - self.user_bias[users]
+            self.movie_bias = np.bincount(movies, residual, len(self.movie_ids)) / (
+                movie_counts + self.regularization
+            )
+            residual = ratings - self.global_mean - self.movie_bias[movies]
+            self.user_bias = np.bincount(users, residual, len(self.user_ids)) / (
+                user_counts + self.regularization
+            )
+
+    def predict(self, user_ids, movie_ids):
+        users, user_found = _lookup(self.user_ids, user_ids)
+        movies, movie_found = _lookup(self.movie_ids, movie_ids)
+        return (
+            self.global_mean
+            + np.where(user_found, self.user_bias[users], 0.0)
+            + np.where(movie_found, self.movie_bias[movies], 0.0)
+        )
+
+    def score_movies(self, user_id):
+        return self.movie_ids, self.movie_bias.copy()
+
+
+class ALSRecommender(BaseRecommender):
+    """The production matrix factorization model (reviews.recommendations)."""
+
+    def __init__(self, factors=32, iterations=15, regularization=0.1, seed=42):
+        self.options = dict(
+            factors=factors, iterations=iterations, regularization=regularization, seed=seed
+        )
+
+    def fit(self, triples):
+        arrays, meta = fit_als(triples, **self.options)
+        self.__dict__.update(arrays)
+        self.global_mean = meta['global_mean']
+
+    def predict(self, user_ids, movie_ids):
+        users, user_found = _lookup(self.user_ids, user_ids)
+        movies, movie_found = _lookup(self.item_ids, movie_ids)
+        both = user_found & movie_found
+        interaction = np.einsum(
+            'ij,ij->i', self.user_factors[users], self.item_factors[movies]
+        )
+        predicted = (
+            self.global_mean
+            + np.where(user_found, self.user_bias[users], 0.0)
+            + np.where(movie_found, self.item_bias[movies], 0.0)
+            + np.where(both, interaction, 0.0)
+        )
+        return np.clip(predicted, 1.0, 5.0)
+
+    def score_movies(self, user_id):
+        user, found = _lookup(self.user_ids, np.array([user_id]))
+        if not found[0]:
+            return self.item_ids, self.item_bias.astype(np.float64)
+        return self.item_ids, self.item_factors @ self.user_factors[user[0]] + self.item_bias
+
+
+class ItemKNNRecommender(BaseRecommender):
+    """
+    The "similar movies" model (reviews.similarity) used for prediction:
+    a user's mean plus the similarity-weighted average of their centred
+    ratings of the movie's nearest neighbours.
+    """
+
+    def __init__(self, neighbors=40, shrinkage=DEFAULT_SHRINKAGE):
+        self.neighbors = neighbors
+        self.shrinkage = shrinkage
+
+    def fit(self, triples):
+        matrix, raters, self.movie_ids = rating_matrix(triples, adjusted=True)
+        self.movie_ids = self.movie_ids.astype(np.float64)
+        rows, columns, scores = [], [], []
+        neighbor_lists = top_neighbors(
+            matrix, raters, self.movie_ids, np.arange(len(self.movie_ids)),
+            self.neighbors, self.shrinkage,
+        )
+        for movie_id, neighbors in neighbor_lists:
+            if not neighbors:
+                continue
+            others, values = zip(*neighbors)
+            rows.extend([movie_id] * len(others))
+            columns.extend(others)
+            scores.extend(values)
+        shape = (len(self.movie_ids),) * 2
+        self.similarity = sparse.csr_matrix(
+            (scores, (_lookup(self.movie_ids, np.array(rows, dtype=np.float64))[0],
+                      _lookup(self.movie_ids, np.array(columns, dtype=np.float64))[0])),
+            shape=shape,
+        )
+
+        self.user_ids, users = np.unique(triples[:, 0], return_inverse=True)
+        movies = _lookup(self.movie_ids, triples[:, 1])[0]
+        ratings = triples[:, 2]
+        self.global_mean = ratings.mean()
+        self.user_mean = np.bincount(users, ratings) / np.bincount(users)
+        shape = (len(self.user_ids), len(self.movie_ids))
+        self.centred = sparse.csr_matrix(
+            (ratings - self.user_mean[users], (users, movies)), shape=shape
+        )
+        self.rated = sparse.csr_matrix((np.ones_like(ratings), (users, movies)), shape=shape)
+
+    def predict(self, user_ids, movie_ids):
+        users, user_found = _lookup(self.user_ids, user_ids)
+        movies, movie_found = _lookup(self.movie_ids, movie_ids)
+        numerator = np.asarray(
+            self.centred[users].multiply(self.similarity[movies]).sum(axis=1)
+        ).ravel()
+        denominator = np.asarray(
+            self.rated[users].multiply(self.similarity[movies]).sum(axis=1)
+        ).ravel()
+        offset = np.divide(
+            numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0
+        )
+        predicted = np.where(
+            user_found,
+            self.user_mean[users] + np.where(movie_found, offset, 0.0),
+            self.global_mean,
+        )
+        return np.clip(predicted, 1.0, 5.0)
+
+    def score_movies(self, user_id):
+        user, found = _lookup(self.user_ids, np.array([user_id]))
+        if not found[0]:
+            return self.movie_ids, np.zeros(len(self.movie_ids))
+        numerator = self.similarity @ self.centred[user[0]].toarray().ravel()
+        denominator = self.similarity @ self.rated[user[0]].toarray().ravel()
+        return self.movie_ids, np.divide(
+            numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0
+        )
+
+
+def ranking_metrics(model, train, test, k=10, threshold=4.0):
+    """
+    Mean precision@k and recall@k over test users with at least one
+    relevant movie, ranking only movies the user did not rate in `train`.
+    """
+    seen = _group(train)
+    relevant = _group(test[test[:, 2] >= threshold])
+    precisions, recalls = [], []
+    for user_id, movies in relevant.items():
+        movie_ids, scores = model.score_movies(user_id)
+        scores = np.asarray(scores, dtype=np.float64)
+        if user_id in seen:
+            positions, found = _lookup(movie_ids, seen[user_id])
+            scores[positions[found]] = -np.inf
+        count = min(k, len(scores))
+        top = np.argpartition(-scores, count - 1)[:count]
+        hits = np.isin(movie_ids[top], movies).sum()
+        precisions.append(hits / k)
+        recalls.append(hits / len(movies))
+    return float(np.mean(precisions)), float(np.mean(recalls))
+
+
+def evaluate_fold(name, fold, data_dir=DEFAULT_DATA_DIR, k=10, threshold=4.0):
+    """Train recommender `name` on `<fold>.base` and score it on `<fold>.test`."""
+    data_dir = Path(data_dir)
+    train = load_split(data_dir / f'{fold}.base')
+    test = load_split(data_dir / f'{fold}.test')
+    model = import_string(get_recommenders()[name])()
+
+    started = time.perf_counter()
+    model.fit(train)
+    train_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    predicted = model.predict(test[:, 0], test[:, 1])
+    predict_seconds = time.perf_counter() - started
+
+    errors = predicted - test[:, 2]
+    precision, recall = ranking_metrics(model, train, test, k, threshold)
+    return {
+        'model': name,
+        'fold': fold,
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mae': float(np.mean(np.abs(errors))),
+        f'precision@{k}': precision,
+        f'recall@{k}': recall,
+        'train_seconds': train_seconds,
+        'predictions_per_second': len(test) / predict_seconds if predict_seconds else float('inf'),
+        'test_ratings': int(len(test)),
+    }
+
+
+def evaluate(names, folds=DEFAULT_FOLDS, data_dir=DEFAULT_DATA_DIR, k=10, threshold=4.0, workers=1):
+    """
+    Evaluate every (recommender, fold) pair and return the result dicts in
+    input order. With `workers` > 1 the pairs run in a process pool; each
+    worker sets Django up on start, as recommenders may read settings.
+    """
+    jobs = [(name, fold, data_dir, k, threshold) for name in names for fold in folds]
+    if workers <= 1:
+        return [evaluate_fold(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        futures = [pool.submit(evaluate_fold, *job) for job in jobs]
+        return [future.result() for future in futures]
@@ -1,10 +1,18 @@
 from rest_framework.views import exception_handler
+from rest_framework.exceptions import APIException
 from rest_framework import status
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class RecommenderUnavailable(APIException):
+    """Raised when no recommendation model has been trained yet."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Recommendations are not available yet.'
+    default_code = 'recommender_unavailable'
+
+
 def custom_exception_handler(exc, context):
     """
     Custom exception handler that provides consistent error responses.
@@ -0,0 +1,162 @@
+"""
+Streaming bulk exports of reviews and movies as NDJSON or CSV.
+
+Rows are read with `.values()` through `QuerySet.iterator(chunk_size=...)`,
+which uses a server-side cursor on PostgreSQL, and are encoded and sent as
+they arrive through a StreamingHttpResponse. Memory use therefore does not
+grow with the table, and the first bytes go out after the first chunk.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import renderers
+from rest_framework.exceptions import ValidationError
+
+from .models import Movie
+from .serializers import ReviewRowSerializer, datetime_formatter
+
+CHUNK_SIZE = 2000   # rows fetched from the cursor per round trip
+FLUSH_ROWS = 500    # rows encoded per chunk written to the client
+
+REVIEW_FIELDS = [
+    'id', 'movie', 'movie_title', 'user', 'user_id', 'rating', 'content',
+    'created_at', 'updated_at',
+]
+MOVIE_FIELDS = [
+    'id', 'external_id', 'title', 'description', 'genre', 'genres', 'release_year',
+    'created_at', 'updated_at', 'review_count', 'rating_sum', 'average_rating',
+    'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+]
+DATETIME_FIELDS = ('created_at', 'updated_at')
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    Newline-delimited JSON. Export rows are streamed, so this only renders
+    error responses, as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (json.dumps(data, cls=DjangoJSONEncoder) + '\n').encode()
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """CSV. Like NDJSONRenderer, only renders error responses itself."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        writer = csv.writer(_Echo())
+        return (
+            writer.writerow(['error']) + writer.writerow([json.dumps(data, cls=DjangoJSONEncoder)])
+        ).encode()
+
+
+def filter_updated_range(queryset, params):
+    """Filter on the `updated_after` / `updated_before` ISO 8601 query params."""
+    for param, lookup in (('updated_after', 'updated_at__gte'), ('updated_before', 'updated_at__lt')):
+        value = params.get(param)
+        if not value:
+            continue
+        try:
+            parsed = parse_datetime(value)
+        except (ValueError, DjangoValidationError):
+            parsed = None
+        if parsed is None:
+            raise ValidationError({param: 'Expected an ISO 8601 datetime, e.g. 2025-01-31T00:00:00Z.'})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        queryset = queryset.filter(**{lookup: parsed})
+    return queryset
+
+
+def review_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Yield review dicts in the /api/reviews/ shape, in primary key order."""
+    to_dict = ReviewRowSerializer.build_row_function()
+    rows = ReviewRowSerializer.prepare(queryset.order_by('pk'))
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield to_dict(row)
+
+
+def movie_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yield movie dicts in primary key order, with genre names fetched in one
+    query per chunk of movies.
+    """
+    format_datetime = datetime_formatter()
+    columns = [field for field in MOVIE_FIELDS if field != 'genres']
+    rows = queryset.order_by('pk').values(*columns).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        genres = {}
+        links = Movie.genres.through.objects.filter(
+            movie_id__in=[row['id'] for row in chunk]
+        ).order_by('genre__name').values_list('movie_id', 'genre__name')
+        for movie_id, name in links:
+            genres.setdefault(movie_id, []).append(name)
+        for row in chunk:
+            row['genres'] = genres.get(row['id'], [])
+            for field in DATETIME_FIELDS:
+                row[field] = format_datetime(row[field])
+            yield row
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows, fields):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode({field: row[field] for field in fields}) + '\n'
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([
+            # Lists (movie genres) are joined MovieLens-style
+            '|'.join(value) if isinstance(value, list) else value
+            for value in (row[field] for field in fields)
+        ])
+
+
+ENCODERS = {'ndjson': ndjson_lines, 'csv': csv_lines}
+
+
+def _buffered(lines, size=FLUSH_ROWS):
+    """Join lines into fewer, larger writes; the first line goes out alone."""
+    lines = iter(lines)
+    for first in lines:
+        yield first.encode()
+        break
+    while buffer := list(islice(lines, size)):
+        yield ''.join(buffer).encode()
+
+
+def export_response(request, rows, fields, name):
+    """Stream `rows` in the renderer format negotiated for `request`."""
+    renderer = request.accepted_renderer
+    lines = ENCODERS[renderer.format](rows, fields)
+    response = StreamingHttpResponse(
+        _buffered(lines),
+        content_type=f'{renderer.media_type}; charset=utf-8',
+    )
+    filename = f'{name}-{timezone.now():%Y%m%dT%H%M%S}.{renderer.format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Tell nginx not to buffer the whole body before relaying it
+    response['X-Accel-Buffering'] = 'no'
+    return response
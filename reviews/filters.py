@@ -0,0 +1,84 @@
+"""
+Filter backends used by the API viewsets.
+"""
+from django.db.models import Count
+from django.db.models.functions import Lower
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from .models import Genre, Movie
+from .search import get_search_backend, tokenize
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter that answers `?search=` from the full-text index.
+
+    Views name the index to query with `search_index` ('movies' or
+    'reviews'). Matching rows are annotated with `search_rank`. When no
+    full-text backend is configured, DRF's icontains search over
+    `search_fields` is used instead.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend()
+        search_index = getattr(view, 'search_index', None)
+        if backend is None or search_index is None:
+            return super().filter_queryset(request, queryset, view)
+
+        terms = tokenize(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+        return getattr(backend, f'search_{search_index}')(queryset, terms)
+
+
+class RelevanceOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that also accepts `?ordering=relevance` to sort search
+    results by `search_rank`. Without a search it falls back to the
+    view's default ordering.
+    """
+    relevance_value = 'relevance'
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_param, '').strip()
+        if ordering == self.relevance_value and 'search_rank' in queryset.query.annotations:
+            return queryset.order_by('-search_rank', 'pk')
+        return super().filter_queryset(request, queryset, view)
+
+
+class GenreFilter(filters.BaseFilterBackend):
+    """
+    Filter movies by `?genre=Action,Comedy` through the indexed genre links.
+
+    Movies matching any of the genres are returned by default; add
+    `?genre_match=all` to require every genre. Names are case-insensitive.
+    """
+    genre_param = 'genre'
+    match_param = 'genre_match'
+
+    def filter_queryset(self, request, queryset, view):
+        names = {
+            name.strip().lower()
+            for name in request.query_params.get(self.genre_param, '').split(',')
+            if name.strip()
+        }
+        if not names:
+            return queryset
+
+        match = request.query_params.get(self.match_param, 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({self.match_param: "Must be 'any' or 'all'."})
+
+        # Everything below compiles into one subquery over the indexed
+        # movie/genre link table
+        genre_ids = Genre.objects.annotate(
+            lower_name=Lower('name')
+        ).filter(lower_name__in=names).values('id')
+        links = Movie.genres.through.objects.filter(genre_id__in=genre_ids)
+        if match == 'all':
+            # Unknown names can never be matched, so they empty the result
+            links = links.values('movie_id').annotate(
+                matched=Count('genre_id')
+            ).filter(matched=len(names))
+        return queryset.filter(pk__in=links.values('movie_id'))
@@ -0,0 +1,323 @@
+"""
+Bulk movie catalog import, upserting on Movie.external_id.
+
+Files are parsed one line at a time and written in batches, so memory use
+depends on the batch size, never on the catalog size. Each batch is one
+transaction with a fixed number of queries, however many rows it holds:
+
+    1. find which external ids already exist (for created/updated counts)
+    2. adopt movies that have no external id yet (seeded or created through
+       the API) by exact title, so re-importing a catalog never duplicates them
+    3. bulk_create(update_conflicts=True) keyed on external_id
+    4. read back the primary keys and replace the genre links
+    5. replace the batch's leaderboard rows (reviews.rankings)
+
+Formats:
+    csv     header row; `external_id` and `title` required, optional
+            `description`, `genre`, `genres` ('|' separated) and `release_year`.
+            The CSV movie export (reviews.exports) is valid input.
+    ndjson  one JSON object per line with the same keys; `genres` may be a list
+    item    MovieLens u.item; the external id is "movielens:<movie id>"
+
+An imported row replaces the movie's catalog fields. Genre links are only
+replaced when the row has a `genres` value, so leaving the column out keeps
+them. Used by POST /api/movies/import/ and `manage.py import_movies`.
+"""
+import codecs
+import csv
+import json
+import re
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_all
+from .models import Genre, Movie
+from .rankings import refresh_movie_rankings
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 100    # rejected rows reported individually; the rest are only counted
+
+ENCODINGS = {'csv': 'utf-8-sig', 'ndjson': 'utf-8-sig', 'item': 'latin-1'}
+FORMATS = list(ENCODINGS)
+EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.item': 'item'}
+
+# u.genre, in the order of the u.item genre flags
+MOVIELENS_GENRES = [
+    'unknown', 'Action', 'Adventure', 'Animation', "Children's", 'Comedy', 'Crime',
+    'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical', 'Mystery',
+    'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western',
+]
+UPDATE_FIELDS = ['title', 'description', 'genre', 'release_year', 'updated_at']
+
+MAX_LENGTHS = {
+    name: Movie._meta.get_field(name).max_length for name in ('external_id', 'title')
+}
+MAX_GENRE_LENGTH = Genre._meta.get_field('name').max_length
+
+
+class CatalogError(ValueError):
+    """The file as a whole cannot be read (bad header or encoding)."""
+    result = None
+
+
+class RejectedRow(ValueError):
+    """One row is invalid; it is reported and the import continues."""
+
+
+def parse_release_year(release_date_str):
+    """Parse the year from a u.item release date such as 01-Jan-1995."""
+    if not release_date_str:
+        return None
+    try:
+        return datetime.strptime(release_date_str, '%d-%b-%Y').year
+    except ValueError:
+        # Try to extract year from string
+        year_match = re.search(r'\d{4}', release_date_str)
+        return int(year_match.group()) if year_match else None
+
+
+def detect_format(filename):
+    """Guess the format from a file name, or return None."""
+    name = filename.lower()
+    for extension, fmt in EXTENSIONS.items():
+        if name.endswith(extension):
+            return fmt
+    return None
+
+
+def decode_lines(lines, fmt):
+    """Decode an iterable of byte lines (an upload or a binary file) lazily."""
+    return codecs.iterdecode(lines, ENCODINGS[fmt])
+
+
+def read_csv(lines):
+    reader = csv.DictReader(lines)
+    missing = {'external_id', 'title'} - set(reader.fieldnames or [])
+    if missing:
+        raise CatalogError(f"CSV header is missing {', '.join(sorted(missing))}.")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, RejectedRow('Invalid JSON.')
+
+
+def read_item(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        parts = line.rstrip('\r\n').split('|')
+        if len(parts) < 2 or not parts[0].strip().isdigit():
+            yield number, RejectedRow('Expected "movie id|title|release date|...".')
+            continue
+        yield number, {
+            'external_id': f'movielens:{parts[0].strip()}',
+            'title': parts[1].strip(),
+            'release_year': parse_release_year(parts[2].strip() if len(parts) > 2 else ''),
+            'genres': [
+                MOVIELENS_GENRES[index] for index, flag in enumerate(parts[5:24])
+                if flag.strip() == '1'
+            ],
+        }
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson, 'item': read_item}
+
+
+def _text(row, name):
+    value = row.get(name)
+    return '' if value is None else str(value).strip()
+
+
+def clean(row):
+    """Validate one parsed row into the fields of a Movie, or raise RejectedRow."""
+    if isinstance(row, RejectedRow):
+        raise row
+    if not isinstance(row, dict):
+        raise RejectedRow('Expected an object.')
+
+    cleaned = {}
+    for name, max_length in MAX_LENGTHS.items():
+        cleaned[name] = _text(row, name)
+        if not cleaned[name]:
+            raise RejectedRow(f'{name} is required.')
+        if len(cleaned[name]) > max_length:
+            raise RejectedRow(f'{name} is longer than {max_length} characters.')
+
+    release_year = row.get('release_year')
+    if release_year in (None, ''):
+        cleaned['release_year'] = None
+    else:
+        try:
+            year = int(release_year)
+        except (TypeError, ValueError):
+            year = None
+        if year is None or year < 1:
+            raise RejectedRow(f'release_year must be a positive integer, not {release_year!r}.')
+        cleaned['release_year'] = year
+
+    genres = row.get('genres')
+    if genres is not None:
+        if isinstance(genres, str):
+            genres = genres.split('|')
+        elif not isinstance(genres, list):
+            raise RejectedRow('genres must be a list or a "|" separated string.')
+        genres = list(dict.fromkeys(str(name).strip() for name in genres if str(name).strip()))
+        if any(len(name) > MAX_GENRE_LENGTH for name in genres):
+            raise RejectedRow(f'Genre names are limited to {MAX_GENRE_LENGTH} characters.')
+    cleaned['genres'] = genres
+
+    cleaned['description'] = _text(row, 'description')
+    # Same display string as seed_data: the first three genres
+    cleaned['genre'] = _text(row, 'genre') or ', '.join((genres or [])[:3])
+    return cleaned
+
+
+class ImportResult:
+    """Counts of an import, plus the first MAX_ERRORS rejected rows."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'rejected': self.rejected,
+            'errors': self.errors,
+        }
+
+
+def import_movies(lines, fmt, batch_size=BATCH_SIZE, progress=None):
+    """
+    Upsert the movies in `lines` (decoded text lines in format `fmt`) and
+    return an ImportResult. `progress`, if given, is called with the result
+    after every batch. Duplicate external ids are rejected within a batch;
+    across batches the later row simply updates the movie again.
+    """
+    result = ImportResult()
+    genre_ids = {}
+    batch = {}
+    try:
+        for number, row in READERS[fmt](lines):
+            try:
+                cleaned = clean(row)
+            except RejectedRow as exc:
+                result.reject(number, str(exc))
+                continue
+            key = cleaned['external_id']
+            if key in batch:
+                result.reject(number, f'Duplicate external_id "{key}" (first seen on line {batch[key][0]}).')
+                continue
+            batch[key] = (number, cleaned)
+            if len(batch) >= batch_size:
+                _write_batch([cleaned for _, cleaned in batch.values()], result, genre_ids)
+                batch = {}
+                if progress:
+                    progress(result)
+        if batch:
+            _write_batch([cleaned for _, cleaned in batch.values()], result, genre_ids)
+            if progress:
+                progress(result)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        error = CatalogError(f'Could not read the file: {exc}')
+        error.result = result
+        raise error from exc
+    except CatalogError as exc:
+        exc.result = result
+        raise
+    finally:
+        # bulk writes skip the signals that expire cached responses
+        if result.created or result.updated:
+            invalidate_all()
+    return result
+
+
+def _adopt_by_title(rows):
+    """
+    Give movies without an external id the key of the first row with the
+    same title. Returns the adopted keys.
+    """
+    keys = {}
+    for row in rows:
+        keys.setdefault(row['title'], row['external_id'])
+    if not keys:
+        return set()
+    adopted = {}
+    legacy = Movie.objects.filter(external_id__isnull=True, title__in=list(keys)).order_by('pk')
+    for pk, title in legacy.values_list('pk', 'title'):
+        adopted.setdefault(title, pk)
+    Movie.objects.bulk_update(
+        [Movie(pk=pk, external_id=keys[title]) for title, pk in adopted.items()],
+        ['external_id'],
+    )
+    return {keys[title] for title in adopted}
+
+
+def _write_batch(rows, result, genre_ids):
+    keys = [row['external_id'] for row in rows]
+    with transaction.atomic():
+        existing = set(Movie.objects.filter(external_id__in=keys).values_list('external_id', flat=True))
+        existing |= _adopt_by_title([row for row in rows if row['external_id'] not in existing])
+
+        Movie.objects.bulk_create(
+            [
+                Movie(
+                    external_id=row['external_id'],
+                    title=row['title'],
+                    description=row['description'],
+                    genre=row['genre'],
+                    release_year=row['release_year'],
+                )
+                for row in rows
+            ],
+            update_conflicts=True,
+            unique_fields=['external_id'],
+            update_fields=UPDATE_FIELDS,
+        )
+
+        with_genres = [row for row in rows if row['genres'] is not None]
+        if with_genres:
+            _replace_genres(with_genres, genre_ids)
+        # bulk writes skip the signals that re-file movies on the leaderboards
+        refresh_movie_rankings(Movie.objects.filter(external_id__in=keys).values_list('id', flat=True))
+
+    result.created += len(rows) - len(existing)
+    result.updated += len(existing)
+
+
+def _replace_genres(rows, genre_ids):
+    """Replace the genre links of `rows`' movies, creating unknown genres."""
+    names = {name for row in rows for name in row['genres']} - genre_ids.keys()
+    if names:
+        Genre.objects.bulk_create([Genre(name=name) for name in names], ignore_conflicts=True)
+        genre_ids.update(Genre.objects.filter(name__in=names).values_list('name', 'id'))
+
+    movie_ids = dict(
+        Movie.objects.filter(external_id__in=[row['external_id'] for row in rows])
+        .values_list('external_id', 'id')
+    )
+    Link = Movie.genres.through
+    Link.objects.filter(movie_id__in=movie_ids.values()).delete()
+    Link.objects.bulk_create([
+        Link(movie_id=movie_ids[row['external_id']], genre_id=genre_ids[name])
+        for row in rows
+        for name in row['genres']
+    ])
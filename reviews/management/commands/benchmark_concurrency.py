@@ -0,0 +1,255 @@
+"""
+Django management command comparing the WSGI and ASGI deployments under
+concurrent load.
+
+Seeds a throwaway database (see reviews.benchmarks), then starts the project
+twice as real servers: gunicorn with sync workers (the Procfile deployment)
+and gunicorn with uvicorn workers serving movie_review_api.asgi, which routes
+the hot read endpoints to the async views. Each server gets the same number of worker
+processes. A pool of client threads then requests a mix of movie list,
+movie detail, movie reviews and review list pages for a fixed time at each
+concurrency level, and the throughput and p50/p99 latency are reported.
+
+The response cache is disabled in both servers, so every request reaches
+the database. Run it against PostgreSQL (DATABASE_URL) to see the effect of
+network round trips; with SQLite every query is a local file read.
+
+Usage:
+    python manage.py benchmark_concurrency [--movies N] [--users N] [--reviews-per-user N]
+                                           [--workers N] [--concurrency N ...]
+                                           [--duration SECONDS] [--server wsgi|asgi ...]
+"""
+import http.client
+import os
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from reviews.benchmarks import DEFAULT_DATASET, percentile, seed_dataset
+from reviews.models import Movie
+
+SERVERS = {
+    'wsgi': ['gunicorn', 'movie_review_api.wsgi:application', '--workers', '{workers}',
+             '--bind', '127.0.0.1:{port}', '--log-level', 'warning'],
+    'asgi': ['gunicorn', 'movie_review_api.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker',
+             '--workers', '{workers}', '--bind', '127.0.0.1:{port}', '--log-level', 'warning'],
+}
+DEFAULT_CONCURRENCY = [1, 8, 32, 64]
+STARTUP_TIMEOUT = 30
+
+
+def read_paths(count=200, seed=0):
+    """A shuffled mix of the read endpoints served by the async views."""
+    rng = random.Random(seed)
+    movie_ids = list(Movie.objects.filter(review_count__gt=0).values_list('id', flat=True))
+    templates = [
+        lambda: f'/api/movies/?page={rng.randint(1, 5)}',
+        lambda: f'/api/movies/{rng.choice(movie_ids)}/',
+        lambda: f'/api/movies/{rng.choice(movie_ids)}/reviews/',
+        lambda: f'/api/reviews/?page={rng.randint(1, 5)}',
+        lambda: f'/api/reviews/?rating={rng.randint(1, 5)}',
+    ]
+    return [rng.choice(templates)() for _ in range(count)]
+
+
+def database_url():
+    """A DATABASE_URL pointing the servers at the test database."""
+    name = connection.settings_dict['NAME']
+    url = os.environ.get('DATABASE_URL')
+    if connection.vendor == 'sqlite' or not url:
+        return f'sqlite:///{name}'
+    return urlunsplit(urlsplit(url)._replace(path=f'/{name}'))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, workers, env):
+    port = free_port()
+    command = [part.format(workers=workers, port=port) for part in SERVERS[kind]]
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f'{command[0]} exited with status {process.returncode}.')
+        try:
+            client = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            client.request('GET', '/api/movies/')
+            client.getresponse().read()
+            client.close()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise CommandError(f'{command[0]} did not start within {STARTUP_TIMEOUT}s.')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_load(port, paths, concurrency, duration):
+    """
+    Request `paths` round robin from `concurrency` threads, each on its own
+    keep-alive connection, for `duration` seconds.
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset):
+        client = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        timings, failures = [], 0
+        index = offset
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += concurrency
+            started = time.perf_counter()
+            try:
+                client.request('GET', path)
+                response = client.getresponse()
+                response.read()
+                if response.status != 200:
+                    failures += 1
+            except (OSError, http.client.HTTPException):
+                failures += 1
+                client.close()
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+        client.close()
+        with lock:
+            latencies.extend(timings)
+            errors.append(failures)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent read throughput of the WSGI and ASGI deployments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--movies',
+            type=int,
+            default=DEFAULT_DATASET['movies'],
+            help=f"Movies to seed (default: {DEFAULT_DATASET['movies']})",
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=DEFAULT_DATASET['users'],
+            help=f"Users to seed (default: {DEFAULT_DATASET['users']})",
+        )
+        parser.add_argument(
+            '--reviews-per-user',
+            type=int,
+            default=DEFAULT_DATASET['reviews_per_user'],
+            help=f"Reviews per seeded user (default: {DEFAULT_DATASET['reviews_per_user']})",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Worker processes per server (default: 2)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            action='append',
+            help=f'Concurrent clients; repeat for several levels (default: {DEFAULT_CONCURRENCY})',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10.0,
+            help='Seconds of load per server and concurrency level (default: 10)',
+        )
+        parser.add_argument(
+            '--server',
+            action='append',
+            dest='servers',
+            choices=list(SERVERS),
+            help='Only benchmark this server; repeat for both (default: both)',
+        )
+
+    def handle(self, *args, **options):
+        dataset = {
+            'movies': options['movies'],
+            'users': options['users'],
+            'reviews_per_user': options['reviews_per_user'],
+        }
+        levels = options['concurrency'] or DEFAULT_CONCURRENCY
+        servers = options['servers'] or list(SERVERS)
+
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                # A file, not the in-memory default, so the servers can open it
+                connection.settings_dict['TEST']['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                self.stdout.write(
+                    f"Seeding {dataset['movies']} movies, {dataset['users']} users, "
+                    f"{dataset['reviews_per_user']} reviews per user..."
+                )
+                seed_dataset(**dataset, calls=1)
+                paths = read_paths()
+                env = {
+                    **os.environ,
+                    'DATABASE_URL': database_url(),
+                    'DEBUG': 'False',
+                    'ALLOWED_HOSTS': '127.0.0.1',
+                    'RESPONSE_CACHE_ENABLED': 'False',
+                }
+                results = {}
+                for kind in servers:
+                    self.stdout.write(f"Starting {kind} server with {options['workers']} workers...")
+                    process, port = start_server(kind, options['workers'], env)
+                    try:
+                        run_load(port, paths, 1, 1.0)  # warm up every worker's connection
+                        for level in levels:
+                            results[kind, level] = run_load(port, paths, level, options['duration'])
+                    finally:
+                        stop_server(process)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        header = f'{"server":<8}{"clients":>8}{"requests":>10}{"errors":>8}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for (kind, level), result in results.items():
+            self.stdout.write(
+                f"{kind:<8}{level:>8}{result['requests']:>10}{result['errors']:>8}"
+                f"{result['requests_per_second']:>10.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            )
+        if any(result['errors'] for result in results.values()):
+            raise CommandError('Some requests failed; see the errors column.')
+        self.stdout.write(self.style.SUCCESS('✅ Concurrency benchmark complete'))
@@ -0,0 +1,130 @@
+"""
+Django management command to benchmark every API endpoint.
+
+Creates a throwaway test database, seeds it with a synthetic dataset (see
+reviews.benchmarks), then reports SQL query count, p50/p95 latency and
+throughput per endpoint. Exits with an error when an endpoint issues more
+queries than the recorded baseline or its median latency regresses past the
+threshold; `--update-baseline` records the current numbers instead.
+
+Usage:
+    python manage.py benchmark_endpoints [--movies N] [--users N] [--reviews-per-user N]
+                                         [--repeat N] [--endpoint NAME ...]
+                                         [--latency-threshold X] [--update-baseline]
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from reviews.benchmarks import (
+    BASELINE_PATH, DEFAULT_DATASET, DEFAULT_LATENCY_THRESHOLD, ENDPOINTS,
+    compare, load_baseline, run_benchmark, seed_dataset, write_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API endpoints and check them against the recorded baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--movies',
+            type=int,
+            default=DEFAULT_DATASET['movies'],
+            help=f"Movies to seed (default: {DEFAULT_DATASET['movies']})",
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=DEFAULT_DATASET['users'],
+            help=f"Users to seed (default: {DEFAULT_DATASET['users']})",
+        )
+        parser.add_argument(
+            '--reviews-per-user',
+            type=int,
+            default=DEFAULT_DATASET['reviews_per_user'],
+            help=f"Reviews per seeded user (default: {DEFAULT_DATASET['reviews_per_user']})",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Measured requests per endpoint (default: 20)',
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            dest='endpoints',
+            choices=[endpoint.name for endpoint in ENDPOINTS],
+            help='Only benchmark this endpoint; repeat for several (default: all)',
+        )
+        parser.add_argument(
+            '--latency-threshold',
+            type=float,
+            default=DEFAULT_LATENCY_THRESHOLD,
+            help=f'Allowed p50 slowdown as a fraction of the baseline (default: {DEFAULT_LATENCY_THRESHOLD})',
+        )
+        parser.add_argument(
+            '--baseline',
+            type=Path,
+            default=BASELINE_PATH,
+            help='Baseline JSON file (default: reviews/tests/endpoint_baseline.json)',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Write the results to the baseline instead of checking them',
+        )
+
+    def handle(self, *args, **options):
+        dataset = {
+            'movies': options['movies'],
+            'users': options['users'],
+            'reviews_per_user': options['reviews_per_user'],
+        }
+        repeat = options['repeat']
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write(
+                f"Seeding {dataset['movies']} movies, {dataset['users']} users, "
+                f"{dataset['reviews_per_user']} reviews per user..."
+            )
+            context = seed_dataset(**dataset, calls=repeat + 1)
+            results = run_benchmark(context, repeat=repeat, endpoints=options['endpoints'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        baseline = load_baseline(options['baseline'])
+        recorded = (baseline or {}).get('endpoints', {})
+        header = f'{"endpoint":<26}{"queries":>8}{"base":>6}{"p50 ms":>10}{"p95 ms":>10}{"base p50":>10}{"req/s":>10}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, result in results.items():
+            expected = recorded.get(name, {})
+            self.stdout.write(
+                f"{name:<26}{result['queries']:>8}{expected.get('queries', '-'):>6}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{expected.get('p50_ms', '-'):>10}{result['requests_per_second']:>10.1f}"
+            )
+
+        if options['update_baseline']:
+            if options['endpoints'] and baseline:
+                # Partial run: keep the other endpoints' numbers
+                results = {**recorded, **results}
+            write_baseline(results, dataset, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"✅ Baseline written to {options['baseline']}"))
+            return
+
+        if baseline is None:
+            raise CommandError(
+                f"No baseline at {options['baseline']}; run with --update-baseline first."
+            )
+        if baseline.get('dataset') != dataset:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded with dataset {baseline.get('dataset')}; "
+                'latencies are not directly comparable.'
+            ))
+        regressions = compare(results, baseline, options['latency_threshold'])
+        if regressions:
+            raise CommandError('Endpoint regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('✅ No regressions against the baseline'))
@@ -0,0 +1,102 @@
+"""
+Django management command comparing review serialization throughput.
+
+Measures rows/sec for the DRF ReviewSerializer (model instances with
+select_related) against the ReviewRowSerializer fast path (`.values()` rows),
+both including the database query. If the database has fewer reviews than
+requested, synthetic rows are created inside a transaction that is rolled
+back afterwards.
+
+Usage:
+    python manage.py benchmark_serialization [--rows N] [--repeat N]
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from reviews.models import Movie, Review
+from reviews.serializers import ReviewRowSerializer, ReviewSerializer
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ReviewSerializer against the ReviewRowSerializer fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=5000,
+            help='Number of reviews serialized per run (default: 5000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per serializer; the best run is reported (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+        try:
+            with transaction.atomic():
+                self.ensure_rows(rows)
+                self.run(rows, repeat)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def ensure_rows(self, rows):
+        """Top the reviews table up to `rows` with synthetic data."""
+        missing = rows - Review.objects.count()
+        if missing <= 0:
+            return
+        self.stdout.write(f'Creating {missing} synthetic reviews (rolled back afterwards)...')
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(username=f'bench_user_{i}', password=password) for i in range(missing)
+        ])
+        movie = Movie.objects.create(title='Benchmark Movie', release_year=2000)
+        Review.objects.bulk_create([
+            Review(movie=movie, user=user, rating=i % 5 + 1, content='Benchmark review content.')
+            for i, user in enumerate(users)
+        ], batch_size=1000)
+
+    def run(self, rows, repeat):
+        request = Request(APIRequestFactory().get('/api/reviews/'))
+        queryset = Review.objects.select_related('movie', 'user').order_by('-created_at')[:rows]
+
+        def drf():
+            return ReviewSerializer(queryset.all(), many=True, context={'request': request}).data
+
+        def fast():
+            return ReviewRowSerializer.serialize(ReviewRowSerializer.prepare(queryset.all()))
+
+        if drf() != fast():
+            self.stdout.write(self.style.ERROR('Serializers produced different output!'))
+            return
+
+        results = {}
+        for name, func in (('ReviewSerializer', drf), ('ReviewRowSerializer', fast)):
+            best = min(self.time_once(func) for _ in range(repeat))
+            results[name] = rows / best
+            self.stdout.write(f'  {name:<20} {best * 1000:8.1f} ms  {results[name]:>12,.0f} rows/sec')
+
+        speedup = results['ReviewRowSerializer'] / results['ReviewSerializer']
+        self.stdout.write(self.style.SUCCESS(f'✅ Fast path is {speedup:.1f}x faster'))
+
+    @staticmethod
+    def time_once(func):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
@@ -0,0 +1,95 @@
+"""
+Django management command to (re)build the item-item "similar movies" table.
+
+A full build recomputes every movie's top-K neighbours from the Review
+table. `--incremental` only recomputes movies whose reviews changed since
+the previous build (new, edited or deleted reviews all bump
+Movie.updated_at); neighbour lists of untouched movies keep their old
+scores, so schedule a full build now and then as well.
+
+Usage:
+    python manage.py build_similarity [--top-k N] [--incremental] [--plain-cosine]
+                                      [--shrinkage X] [--block-size N]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reviews.cache import invalidate_all
+from reviews.models import Movie, Review, SimilarityBuild
+from reviews.similarity import BLOCK_SIZE, DEFAULT_SHRINKAGE, DEFAULT_TOP_K, build_similarities
+
+
+class Command(BaseCommand):
+    help = 'Build the top-K similar movies table from review ratings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=DEFAULT_TOP_K,
+            help=f'Neighbours kept per movie (default: {DEFAULT_TOP_K})',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only rebuild movies whose reviews changed since the last build',
+        )
+        parser.add_argument(
+            '--plain-cosine',
+            action='store_true',
+            help='Use plain cosine instead of adjusted (user-mean-centred) cosine',
+        )
+        parser.add_argument(
+            '--shrinkage',
+            type=float,
+            default=DEFAULT_SHRINKAGE,
+            help=f'Damping for pairs with few common raters, 0 to disable (default: {DEFAULT_SHRINKAGE:g})',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=BLOCK_SIZE,
+            help=f'Movies scored per sparse product (default: {BLOCK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        started = time.perf_counter()
+
+        movie_ids = None
+        mode = 'full'
+        last_build = SimilarityBuild.objects.first()
+        if options['incremental']:
+            if last_build is None:
+                self.stdout.write('No previous build found, running a full build.')
+            else:
+                mode = 'incremental'
+                since = last_build.started_at
+                movie_ids = set(
+                    Movie.objects.filter(updated_at__gte=since).values_list('id', flat=True)
+                ) | set(
+                    Review.objects.filter(updated_at__gte=since).values_list('movie_id', flat=True)
+                )
+                if not movie_ids:
+                    self.stdout.write(self.style.SUCCESS('✅ Similar movies already up to date'))
+                    return
+
+        updated = build_similarities(
+            movie_ids=movie_ids,
+            top_k=options['top_k'],
+            adjusted=not options['plain_cosine'],
+            shrinkage=options['shrinkage'],
+            block_size=options['block_size'],
+        )
+        duration = time.perf_counter() - started
+        SimilarityBuild.objects.create(
+            started_at=started_at, mode=mode, movies_updated=updated, duration_seconds=duration
+        )
+        invalidate_all()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Similar movies rebuilt ({mode}): {updated} movies in {duration:.2f}s'
+            )
+        )
@@ -0,0 +1,121 @@
+"""
+Django management command to evaluate recommenders on the MovieLens splits.
+
+Trains each model on `<fold>.base` from archive/ml-100k and reports RMSE,
+MAE, precision@K, recall@K, training time and predictions/sec on the
+matching `<fold>.test`, per fold and averaged per model. Reads only the
+split files, never the database.
+
+Usage:
+    python manage.py evaluate_recommenders [--model NAME ...] [--folds u1 u2 ...]
+                                           [--top-k N] [--threshold X]
+                                           [--workers N] [--output results.json]
+"""
+import json
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.evaluation import (
+    DEFAULT_DATA_DIR, DEFAULT_FOLDS, FOLDS, evaluate, get_recommenders,
+)
+
+
+class Command(BaseCommand):
+    help = 'Evaluate recommenders on the MovieLens u1-u5 / ua / ub splits'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            choices=sorted(get_recommenders()),
+            help='Recommender to evaluate; repeat for several (default: all)',
+        )
+        parser.add_argument(
+            '--folds',
+            nargs='+',
+            choices=FOLDS,
+            default=DEFAULT_FOLDS,
+            help='Splits to run (default: u1 u2 u3 u4 u5)',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=10,
+            help='K for precision@K / recall@K (default: 10)',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=4.0,
+            help='Minimum test rating counted as relevant (default: 4)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Folds evaluated in parallel processes (default: 1). Timings '
+                 'are noisier when workers compete for CPU',
+        )
+        parser.add_argument(
+            '--data-dir',
+            type=Path,
+            default=DEFAULT_DATA_DIR,
+            help='Directory holding the split files (default: archive/ml-100k)',
+        )
+        parser.add_argument(
+            '--output',
+            type=Path,
+            help='Also write the per-fold results to this JSON file',
+        )
+
+    def handle(self, *args, **options):
+        models = options['models'] or sorted(get_recommenders())
+        folds = options['folds']
+        k = options['top_k']
+        data_dir = options['data_dir']
+        for fold in folds:
+            for suffix in ('base', 'test'):
+                if not (data_dir / f'{fold}.{suffix}').exists():
+                    raise CommandError(f'Missing split file: {data_dir / f"{fold}.{suffix}"}')
+
+        workers = min(options['workers'], len(models) * len(folds), os.cpu_count() or 1)
+        self.stdout.write(
+            f'Evaluating {", ".join(models)} on {", ".join(folds)} '
+            f'({workers} worker{"s" if workers != 1 else ""})...'
+        )
+        results = evaluate(
+            models, folds, data_dir, k=k, threshold=options['threshold'], workers=workers
+        )
+
+        columns = [
+            ('rmse', 'RMSE', '{:.4f}'),
+            ('mae', 'MAE', '{:.4f}'),
+            (f'precision@{k}', f'P@{k}', '{:.4f}'),
+            (f'recall@{k}', f'R@{k}', '{:.4f}'),
+            ('train_seconds', 'train s', '{:.2f}'),
+            ('predictions_per_second', 'pred/s', '{:,.0f}'),
+        ]
+        header = f'{"model":<10} {"fold":<6}' + ''.join(f'{label:>12}' for _, label, _ in columns)
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for model in models:
+            rows = [result for result in results if result['model'] == model]
+            for row in rows:
+                self.write_row(model, row['fold'], row, columns)
+            mean = {
+                key: sum(row[key] for row in rows) / len(rows) for key, _, _ in columns
+            }
+            self.write_row(model, 'mean', mean, columns, style=self.style.SUCCESS)
+
+        if options['output']:
+            options['output'].write_text(json.dumps(results, indent=2))
+            self.stdout.write(f'Results written to {options["output"]}')
+        self.stdout.write(self.style.SUCCESS('✅ Evaluation complete'))
+
+    def write_row(self, model, fold, row, columns, style=None):
+        line = f'{model:<10} {fold:<6}' + ''.join(
+            f'{fmt.format(row[key]):>12}' for key, _, fmt in columns
+        )
+        self.stdout.write(style(line) if style else line)
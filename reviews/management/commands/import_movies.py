@@ -0,0 +1,70 @@
+"""
+Django management command to bulk import a movie catalog.
+
+Upserts movies on their external id from a CSV, NDJSON or MovieLens u.item
+file, streaming it in batches (see reviews.imports).
+
+Usage:
+    python manage.py import_movies catalog.csv [--format csv|ndjson|item] [--batch-size N]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.imports import (
+    BATCH_SIZE, FORMATS, CatalogError, decode_lines, detect_format, import_movies,
+)
+
+
+class Command(BaseCommand):
+    help = 'Create or update movies from a CSV, NDJSON or u.item catalog file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Catalog file to import')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format (default: guessed from the file extension)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Rows upserted per transaction (default: {BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        if fmt is None:
+            raise CommandError(f'Cannot tell the format of {path}; pass --format.')
+
+        def progress(result):
+            self.stdout.write(f'  Processed {result.created + result.updated + result.rejected} rows...')
+
+        started = time.perf_counter()
+        try:
+            with open(path, 'rb') as handle:
+                result = import_movies(
+                    decode_lines(handle, fmt), fmt,
+                    batch_size=options['batch_size'], progress=progress,
+                )
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+        except CatalogError as exc:
+            raise CommandError(
+                f'{exc} ({exc.result.created} created and {exc.result.updated} updated before the error)'
+            )
+        elapsed = time.perf_counter() - started
+
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f"  Line {error['line']}: {error['error']}"))
+        if result.rejected > len(result.errors):
+            self.stdout.write(self.style.WARNING(f'  ...and {result.rejected - len(result.errors)} more'))
+
+        rows = result.created + result.updated + result.rejected
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Movies: {result.created} created, {result.updated} updated, '
+                f'{result.rejected} rejected in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)'
+            )
+        )
@@ -0,0 +1,76 @@
+"""
+Django management command to rebuild the denormalized rating aggregates on Movie.
+
+The aggregates are kept up to date incrementally on every Review write, but
+bulk loads (e.g. seed_data) bypass model signals, so run this afterwards.
+
+Usage:
+    python manage.py rebuild_movie_stats [--batch-size N]
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from reviews.cache import invalidate_all
+from reviews.models import Movie, Review
+
+STAT_FIELDS = [
+    'review_count', 'rating_sum', 'average_rating',
+    'rating_1_count', 'rating_2_count', 'rating_3_count',
+    'rating_4_count', 'rating_5_count',
+]
+
+
+class Command(BaseCommand):
+    help = 'Recompute review count, rating sum/average and histogram for every movie'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of movies to update per query (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        # One GROUP BY over the reviews table for every movie at once
+        rows = Review.objects.order_by().values('movie_id').annotate(
+            review_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{
+                f'rating_{rating}_count': Count('id', filter=Q(rating=rating))
+                for rating in range(1, 6)
+            },
+        )
+        stats = {row.pop('movie_id'): row for row in rows}
+
+        updated = []
+        now = timezone.now()
+        with transaction.atomic():
+            for movie in Movie.objects.only('id', *STAT_FIELDS).iterator(chunk_size=batch_size):
+                row = stats.get(movie.id)
+                if row is None:
+                    row = dict.fromkeys(STAT_FIELDS[:2] + STAT_FIELDS[3:], 0)
+                row['average_rating'] = (
+                    row['rating_sum'] / row['review_count'] if row['review_count'] else 0.0
+                )
+                if all(getattr(movie, field) == row[field] for field in STAT_FIELDS):
+                    continue
+                for field in STAT_FIELDS:
+                    setattr(movie, field, row[field])
+                movie.updated_at = now
+                updated.append(movie)
+
+            Movie.objects.bulk_update(updated, STAT_FIELDS + ['updated_at'], batch_size=batch_size)
+
+        # bulk_update skips signals, so expire cached responses explicitly
+        invalidate_all()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Movie stats rebuilt: {len(updated)} movies updated, '
+                f'{len(stats)} movies with reviews'
+            )
+        )
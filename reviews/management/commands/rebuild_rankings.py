@@ -0,0 +1,44 @@
+"""
+Django management command to rebuild the top-rated leaderboards.
+
+Refits the Bayesian prior (mean rating and prior weight) to the current
+ratings and rewrites every MovieRanking row. Review writes keep the rows
+current in between, scored with the prior of the last build, so schedule
+this now and then (e.g. nightly) and after bulk loads that skip signals.
+
+Usage:
+    python manage.py rebuild_rankings [--prior-weight C] [--batch-size N]
+"""
+from django.core.management.base import BaseCommand
+from reviews.cache import invalidate_all
+from reviews.rankings import BATCH_SIZE, rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = 'Refit the Bayesian prior and rebuild the top-rated movie leaderboards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prior-weight',
+            type=float,
+            default=None,
+            help='Virtual reviews at the mean rating (default: REVIEWS_RANKINGS, else the mean review count)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Rows inserted per query (default: {BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        build = rebuild_rankings(prior_weight=options['prior_weight'], batch_size=options['batch_size'])
+        # Every leaderboard may have reordered
+        invalidate_all()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Rankings rebuilt: {build.rows_written} rows in {build.duration_seconds:.2f}s '
+                f'(mean {build.prior_mean:.3f}, prior weight {build.prior_weight:.1f})'
+            )
+        )
@@ -0,0 +1,71 @@
+"""
+Django management command to train the matrix factorization recommender.
+
+Fits a biased ALS model on every review and publishes it as a new version
+under REVIEWS_RECOMMENDER['MODEL_DIR']. Running web workers memory-map the
+new arrays on their next request, so no restart is needed.
+
+Usage:
+    python manage.py train_recommender [--factors N] [--iterations N]
+                                       [--regularization X] [--seed N]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.recommendations import save, train
+
+
+class Command(BaseCommand):
+    help = 'Train the ALS recommender on review ratings and publish the model files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--factors',
+            type=int,
+            default=32,
+            help='Latent factors per user/movie (default: 32)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=15,
+            help='ALS sweeps over users and movies (default: 15)',
+        )
+        parser.add_argument(
+            '--regularization',
+            type=float,
+            default=0.1,
+            help='L2 penalty, scaled by each row\'s rating count (default: 0.1)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the initial factors (default: 42)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(iteration, rmse):
+            self.stdout.write(f'  iteration {iteration:>3}: train RMSE {rmse:.4f}')
+
+        try:
+            arrays, meta = train(
+                factors=options['factors'],
+                iterations=options['iterations'],
+                regularization=options['regularization'],
+                seed=options['seed'],
+                progress=progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        version_dir = save(arrays, meta)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Recommender trained on {meta["ratings"]} ratings '
+                f'({len(arrays["user_ids"])} users, {len(arrays["item_ids"])} movies) '
+                f'in {time.perf_counter() - started:.2f}s -> {version_dir}'
+            )
+        )
@@ -0,0 +1,168 @@
+"""
+Per-route request metrics in Prometheus text format.
+
+RequestMetricsMiddleware (reviews.middleware) records every request into an
+in-process registry: a lock-protected dict of fixed-bucket histograms, so an
+observation costs a bisect and a few additions. Every FLUSH_INTERVAL seconds
+a worker writes its cumulative snapshot to the shared cache, and /metrics
+merges the snapshots of all live workers. Gunicorn workers therefore don't
+need to share memory, and the cache is touched once per interval rather
+than once per request.
+
+Configure with REVIEWS_METRICS in settings.
+"""
+import bisect
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'FLUSH_INTERVAL': 10,     # seconds between snapshot writes per worker
+    'WORKER_TIMEOUT': 3600,   # seconds a silent worker's snapshot is kept
+    'TOKEN': None,            # bearer token accepted by /metrics
+}
+KEY_PREFIX = 'reviews:metrics'
+NAMESPACE = 'reviews'
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name -> (help, buckets); every histogram is labelled by route and method
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Total time spent handling the request.', SECONDS_BUCKETS),
+    'http_request_view_seconds': ('Time spent in the view, including authentication and serialization.', SECONDS_BUCKETS),
+    'http_request_render_seconds': ('Time spent rendering the response body.', SECONDS_BUCKETS),
+    'http_request_db_seconds': ('Time spent executing SQL queries.', SECONDS_BUCKETS),
+    'http_request_db_queries': ('Number of SQL queries executed.', QUERY_BUCKETS),
+}
+REQUESTS_TOTAL = 'http_requests_total'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_METRICS', {})}
+
+
+class Registry:
+    """Cumulative histograms and counters of one worker process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (name, route, method) -> [bucket counts..., sum, count]
+        self.counters = {}    # (route, method, status) -> count
+        self.last_flush = time.monotonic()
+
+    @property
+    def worker(self):
+        # Looked up on use: with `gunicorn --preload` the registry is created
+        # before the workers fork
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def observe(self, route, method, status, values):
+        """Record one request; `values` maps histogram name to its observation."""
+        with self.lock:
+            key = (route, method, status)
+            self.counters[key] = self.counters.get(key, 0) + 1
+            for name, value in values.items():
+                series = self.histograms.get((name, route, method))
+                buckets = HISTOGRAMS[name][1]
+                if series is None:
+                    # One slot per bucket plus +Inf, then sum and count
+                    series = self.histograms[(name, route, method)] = [0] * (len(buckets) + 3)
+                series[bisect.bisect_left(buckets, value)] += 1
+                series[-2] += value
+                series[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'histograms': [[*key, list(series)] for key, series in self.histograms.items()],
+                'counters': [[*key, count] for key, count in self.counters.items()],
+            }
+
+    def maybe_flush(self):
+        """Publish this worker's snapshot if FLUSH_INTERVAL has passed."""
+        config = get_config()
+        now = time.monotonic()
+        if now - self.last_flush < config['FLUSH_INTERVAL']:
+            return
+        self.last_flush = now
+        self.flush(config)
+
+    def flush(self, config=None):
+        config = config or get_config()
+        cache = caches[config['CACHE_ALIAS']]
+        timeout = config['WORKER_TIMEOUT']
+        worker = self.worker
+        cache.set(f'{KEY_PREFIX}:worker:{worker}', self.snapshot(), timeout=timeout)
+        # The worker list is read-modify-write; an entry lost to a race is
+        # re-added on that worker's next flush
+        workers = cache.get(f'{KEY_PREFIX}:workers') or {}
+        cutoff = time.time() - timeout
+        workers = {worker: seen for worker, seen in workers.items() if seen > cutoff}
+        workers[worker] = time.time()
+        cache.set(f'{KEY_PREFIX}:workers', workers, timeout=None)
+
+
+registry = Registry()
+
+
+def collect():
+    """Merge the snapshots of every live worker, including this one."""
+    registry.flush()
+    cache = caches[get_config()['CACHE_ALIAS']]
+    workers = cache.get(f'{KEY_PREFIX}:workers') or {}
+    snapshots = cache.get_many([f'{KEY_PREFIX}:worker:{worker}' for worker in workers])
+
+    histograms, counters = {}, {}
+    for snapshot in snapshots.values():
+        for name, route, method, series in snapshot['histograms']:
+            merged = histograms.setdefault((name, route, method), [0] * len(series))
+            for index, value in enumerate(series):
+                merged[index] += value
+        for route, method, status, count in snapshot['counters']:
+            key = (route, method, status)
+            counters[key] = counters.get(key, 0) + count
+    return histograms, counters
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def render_metrics():
+    """Return all metrics in the Prometheus text exposition format."""
+    histograms, counters = collect()
+    lines = [
+        f'# HELP {NAMESPACE}_{REQUESTS_TOTAL} Requests handled, by route, method and status.',
+        f'# TYPE {NAMESPACE}_{REQUESTS_TOTAL} counter',
+    ]
+    for (route, method, status), count in sorted(counters.items()):
+        lines.append(
+            f'{NAMESPACE}_{REQUESTS_TOTAL}{{{_labels(route=route, method=method, status=status)}}} {count}'
+        )
+
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        metric = f'{NAMESPACE}_{name}'
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for (series_name, route, method), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            labels = _labels(route=route, method=method)
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), series[:-2]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{labels}}} {series[-2]:.6f}')
+            lines.append(f'{metric}_count{{{labels}}} {series[-1]}')
+    return '\n'.join(lines) + '\n'
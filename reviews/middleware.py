@@ -0,0 +1,257 @@
+"""
+Request instrumentation middleware.
+
+RequestMetricsMiddleware splits each request into database, view and render
+time and records them (plus the query count) into the per-route histograms
+of reviews.metrics. Staff users, and everyone when DEBUG is on, also get the
+breakdown as a `Server-Timing` header, which browser dev tools display next
+to the request.
+
+RequestProfilerMiddleware runs staff requests flagged for profiling under
+cProfile (see reviews.profiling).
+
+AsyncWhiteNoiseMiddleware is WhiteNoise's middleware with an async path.
+
+Every middleware here is sync- and async-capable. Under ASGI, one sync-only
+middleware makes Django run the whole chain in a worker thread, which would
+undo the async read views (reviews.async_views).
+"""
+import time
+from contextlib import asynccontextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import profiling
+from .metrics import get_config, registry
+
+
+class QueryTimer:
+    """connection.execute_wrapper that counts queries and their total time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def _add_execute_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def _remove_execute_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+@asynccontextmanager
+async def async_execute_wrapper(wrapper):
+    """
+    connection.execute_wrapper for async code. Connections are per thread and
+    the async ORM queries from the request's sync_to_async thread, so the
+    wrapper is installed on that thread's connection.
+    """
+    await sync_to_async(_add_execute_wrapper)(wrapper)
+    try:
+        yield
+    finally:
+        await sync_to_async(_remove_execute_wrapper)(wrapper)
+
+
+class RequestMetricsMiddleware:
+    """
+    Place first in MIDDLEWARE so the total covers the whole stack. View time
+    runs from process_view until the view returns its response; render time
+    is the deferred rendering of DRF and template responses that Django
+    does afterwards.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        request._metrics = {}
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        return self.record(request, response, timer, started)
+
+    async def __acall__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return await self.get_response(request)
+
+        timer = QueryTimer()
+        request._metrics = {}
+        started = time.perf_counter()
+        async with async_execute_wrapper(timer):
+            response = await self.get_response(request)
+        return self.record(request, response, timer, started)
+
+    def record(self, request, response, timer, started):
+        finished = time.perf_counter()
+        timings = request._metrics
+        view_started = timings.get('view_started', finished)
+        view_finished = timings.get('view_finished', finished)
+        values = {
+            'http_request_duration_seconds': finished - started,
+            'http_request_view_seconds': view_finished - view_started,
+            'http_request_render_seconds': finished - view_finished,
+            'http_request_db_seconds': timer.duration,
+            'http_request_db_queries': timer.count,
+        }
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unmatched'
+        registry.observe(route, request.method, response.status_code, values)
+        registry.maybe_flush()
+
+        if settings.DEBUG or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['Server-Timing'] = self.server_timing(values)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, '_metrics'):
+            request._metrics['view_started'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before the response is rendered
+        if hasattr(request, '_metrics'):
+            request._metrics['view_finished'] = time.perf_counter()
+        return response
+
+    @staticmethod
+    def server_timing(values):
+        return ', '.join([
+            f"db;dur={values['http_request_db_seconds'] * 1000:.2f};"
+            f"desc=\"{values['http_request_db_queries']} queries\"",
+            f"view;dur={values['http_request_view_seconds'] * 1000:.2f}",
+            f"render;dur={values['http_request_render_seconds'] * 1000:.2f}",
+            f"total;dur={values['http_request_duration_seconds'] * 1000:.2f}",
+        ])
+
+
+class RequestProfilerMiddleware:
+    """
+    Profile requests flagged with the REVIEWS_PROFILER header or query
+    parameter. Unflagged requests cost one header lookup; flags from anyone
+    but an authenticated staff user are ignored. Profiled responses carry
+    the capture id in the same header, or the reason the capture was skipped.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = profiling.get_config()
+        if not config['ENABLED'] or not profiling.is_requested(request, config):
+            return self.get_response(request)
+
+        user = profiling.authenticated_user(request)
+        if user is None or not user.is_staff:
+            return self.get_response(request)
+
+        # cProfile is process-wide, so only one capture runs at a time
+        if not profiling.capture_lock.acquire(blocking=False):
+            return self.skip(request, config, 'busy')
+        try:
+            skipped = profiling.check_rate(user, config)
+            if not skipped:
+                capture = profiling.Capture(request, user, config)
+                with connection.execute_wrapper(capture):
+                    response = capture.run(self.get_response)
+        finally:
+            profiling.capture_lock.release()
+        if skipped:
+            return self.skip(request, config, skipped)
+        capture.save(response)
+        response[config['HEADER']] = capture.id
+        return response
+
+    async def __acall__(self, request):
+        config = profiling.get_config()
+        if not config['ENABLED'] or not profiling.is_requested(request, config):
+            return await self.get_response(request)
+
+        user = await sync_to_async(profiling.authenticated_user)(request)
+        if user is None or not user.is_staff:
+            return await self.get_response(request)
+
+        if not profiling.capture_lock.acquire(blocking=False):
+            return await self.askip(request, config, 'busy')
+        try:
+            skipped = await sync_to_async(profiling.check_rate)(user, config)
+            if not skipped:
+                capture = profiling.Capture(request, user, config)
+                async with async_execute_wrapper(capture):
+                    response = await capture.arun(self.get_response)
+        finally:
+            profiling.capture_lock.release()
+        if skipped:
+            return await self.askip(request, config, skipped)
+        await sync_to_async(capture.save)(response)
+        response[config['HEADER']] = capture.id
+        return response
+
+    def skip(self, request, config, reason):
+        response = self.get_response(request)
+        response[config['HEADER']] = f'skipped; reason={reason}'
+        return response
+
+    async def askip(self, request, config, reason):
+        response = await self.get_response(request)
+        response[config['HEADER']] = f'skipped; reason={reason}'
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware with an async path; WhiteNoise itself is sync-only.
+    Other requests pass straight through, and only static file lookups on
+    disk (autorefresh) and file responses are built in a worker thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-17 07:23
+
+from django.db import migrations, models
+
+
+def backfill_genres(apps, schema_editor):
+    """Create Genre rows from the existing comma-joined Movie.genre strings."""
+    Genre = apps.get_model('reviews', 'Genre')
+    Movie = apps.get_model('reviews', 'Movie')
+    Link = Movie.genres.through
+    genre_ids = {}
+    links = []
+    for movie_id, genre in Movie.objects.exclude(genre='').values_list('id', 'genre'):
+        for name in filter(None, (part.strip() for part in genre.split(','))):
+            if name not in genre_ids:
+                genre_ids[name] = Genre.objects.get_or_create(name=name)[0].id
+            links.append(Link(movie_id=movie_id, genre_id=genre_ids[name]))
+    Link.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_conditional_get_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='genres',
+            field=models.ManyToManyField(blank=True, related_name='movies', to='reviews.genre'),
+        ),
+        migrations.RunPython(backfill_genres, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.0 on 2026-10-17 08:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Sum
+from django.utils import timezone
+
+
+def build_rankings(apps, schema_editor):
+    """Fit the first prior and rank the existing movies, as rebuild_rankings does."""
+    Movie = apps.get_model('reviews', 'Movie')
+    MovieRanking = apps.get_model('reviews', 'MovieRanking')
+    RankingBuild = apps.get_model('reviews', 'RankingBuild')
+
+    totals = Movie.objects.aggregate(rating_sum=Sum('rating_sum'), review_count=Sum('review_count'))
+    mean = totals['rating_sum'] / totals['review_count'] if totals['review_count'] else 3.0
+    weight = getattr(settings, 'REVIEWS_RANKINGS', {}).get('PRIOR_WEIGHT') or Movie.objects.filter(
+        review_count__gt=0
+    ).aggregate(weight=Avg('review_count'))['weight'] or 1.0
+
+    genres = {}
+    for movie_id, genre_id in Movie.genres.through.objects.values_list('movie_id', 'genre_id'):
+        genres.setdefault(movie_id, []).append(genre_id)
+    rows = []
+    movies = Movie.objects.order_by().values_list('id', 'release_year', 'review_count', 'rating_sum')
+    for movie_id, release_year, review_count, rating_sum in movies.iterator():
+        score = (weight * mean + rating_sum) / (weight + review_count)
+        scopes = ['all'] + [f'genre:{genre_id}' for genre_id in genres.get(movie_id, ())]
+        if release_year:
+            scopes.append(f'year:{release_year}')
+        rows.extend(
+            MovieRanking(scope=scope, movie_id=movie_id, score=score, review_count=review_count)
+            for scope in scopes
+        )
+    MovieRanking.objects.bulk_create(rows, batch_size=1000)
+    RankingBuild.objects.create(
+        started_at=timezone.now(), prior_mean=mean, prior_weight=weight, rows_written=len(rows)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_movie_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('prior_mean', models.FloatField()),
+                ('prior_weight', models.FloatField()),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('duration_seconds', models.FloatField(default=0.0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovieRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=40)),
+                ('score', models.FloatField()),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.movie')),
+            ],
+            options={
+                'ordering': ['scope', '-score', '-review_count', '-movie_id'],
+                'indexes': [models.Index(fields=['scope', '-score', '-review_count', '-movie'], name='reviews_mov_scope_2b4c92_idx')],
+                'unique_together': {('scope', 'movie')},
+            },
+        ),
+        migrations.RunPython(build_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-17 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_movie_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='reviews.movie')),
+            ],
+            options={
+                'ordering': ['movie', 'bucket'],
+                'indexes': [models.Index(fields=['bucket'], name='reviews_mov_bucket_732a55_idx')],
+                'unique_together': {('movie', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingMovie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_weight', models.FloatField()),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='reviews.movie')),
+            ],
+            options={
+                'ordering': ['-log_weight', '-movie_id'],
+                'indexes': [models.Index(fields=['-log_weight', '-movie'], name='reviews_tre_log_wei_a4fe0a_idx')],
+            },
+        ),
+    ]
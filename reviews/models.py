@@ -1,16 +1,48 @@
 from django.db import models
+from django.db.models import Avg, Case, Count, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
 
 
+class Genre(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
 class Movie(models.Model):
     title = models.CharField(max_length=255, db_index=True)
     description = models.TextField(blank=True)
     genre = models.CharField(max_length=100, blank=True)
+    # Every MovieLens genre flag; `genre` above is the display string
+    genres = models.ManyToManyField(Genre, related_name="movies", blank=True)
     release_year = models.PositiveIntegerField(null=True, blank=True)
+    # Stable catalog key that bulk imports upsert on (reviews.imports), e.g.
+    # "movielens:1"; NULL for movies created through the API
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on any change to the movie or its rating aggregates; drives
+    # conditional GET validators (reviews.conditional)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Denormalized rating aggregates, maintained by reviews.signals on every
+    # Review write and rebuilt in bulk by `manage.py rebuild_movie_stats`.
+    review_count = models.PositiveIntegerField(default=0, db_index=True)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0.0, db_index=True)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["title", "release_year"]
@@ -20,6 +52,69 @@ class Movie(models.Model):
             return f"{self.title} ({self.release_year})"
         return self.title
 
+    @property
+    def rating_histogram(self):
+        """Return the 1-5 star histogram as a {rating: count} dict."""
+        return {
+            str(rating): getattr(self, f"rating_{rating}_count")
+            for rating in range(1, 6)
+        }
+
+    @classmethod
+    def apply_rating_delta(cls, movie_id, rating, delta):
+        """
+        Add (delta=1) or remove (delta=-1) a single rating from a movie's
+        aggregates in one UPDATE, without reading the row first.
+        """
+        new_count = F("review_count") + delta
+        new_sum = F("rating_sum") + rating * delta
+        cls.objects.filter(pk=movie_id).update(
+            updated_at=timezone.now(),
+            review_count=new_count,
+            rating_sum=new_sum,
+            average_rating=Case(
+                When(
+                    review_count__gt=-delta,
+                    then=Cast(new_sum, FloatField()) / new_count,
+                ),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+            **{f"rating_{rating}_count": F(f"rating_{rating}_count") + delta},
+        )
+
+    @classmethod
+    def add_ratings(cls, ratings):
+        """
+        Add one new rating to each movie in a {movie_id: rating} mapping, in
+        a single UPDATE for the whole batch (used by bulk review creation).
+        """
+        if not ratings:
+            return
+        by_rating = {}
+        for movie_id, rating in ratings.items():
+            by_rating.setdefault(rating, []).append(movie_id)
+        added = Case(
+            *[When(pk__in=movie_ids, then=Value(rating)) for rating, movie_ids in by_rating.items()],
+            output_field=models.IntegerField(),
+        )
+        new_count = F("review_count") + 1
+        new_sum = F("rating_sum") + added
+        cls.objects.filter(pk__in=list(ratings)).update(
+            updated_at=timezone.now(),
+            review_count=new_count,
+            rating_sum=new_sum,
+            average_rating=Cast(new_sum, FloatField()) / new_count,
+            **{
+                f"rating_{rating}_count": F(f"rating_{rating}_count") + Case(
+                    When(pk__in=movie_ids, then=Value(1)),
+                    default=Value(0),
+                    output_field=models.IntegerField(),
+                )
+                for rating, movie_ids in by_rating.items()
+            },
+        )
+
 
 class Review(models.Model):
     movie = models.ForeignKey(
@@ -46,7 +141,158 @@ class Review(models.Model):
             models.Index(fields=["movie"]),
             models.Index(fields=["user"]),
             models.Index(fields=["rating"]),
+            models.Index(fields=["updated_at"]),
+            # Composite sort keys for keyset pagination (reviews.pagination)
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["rating", "created_at", "id"]),
+            models.Index(fields=["movie", "created_at", "id"]),
+            models.Index(fields=["movie", "rating", "created_at", "id"]),
         ]
 
     def __str__(self):
         return f"{self.movie} - {self.user} ({self.rating}/5)"
+
+
+class MovieSimilarity(models.Model):
+    """
+    Precomputed top-K item-item neighbours, rebuilt by
+    `manage.py build_similarity` (see reviews.similarity).
+    """
+    movie = models.ForeignKey(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name="similarities",
+    )
+    similar_movie = models.ForeignKey(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["movie", "rank"]
+        unique_together = ("movie", "rank")
+
+    def __str__(self):
+        return f"{self.movie_id} ~ {self.similar_movie_id} ({self.score:.3f})"
+
+
+class SimilarityBuild(models.Model):
+    """One run of build_similarity; the latest marks the incremental cut-off."""
+    started_at = models.DateTimeField()
+    mode = models.CharField(max_length=20)
+    movies_updated = models.PositiveIntegerField(default=0)
+    duration_seconds = models.FloatField(default=0.0)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.mode} build at {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class MovieRanking(models.Model):
+    """
+    A movie's place on a top-rated leaderboard: one row per movie and scope
+    ("all", "genre:<id>", "year:<release year>"), scored by Bayesian average
+    and kept current on every Review write (see reviews.rankings).
+    """
+    scope = models.CharField(max_length=40)
+    movie = models.ForeignKey(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name="rankings",
+    )
+    score = models.FloatField()
+    review_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["scope", "-score", "-review_count", "-movie_id"]
+        unique_together = ("scope", "movie")
+        indexes = [
+            # Leaderboard order; also the keyset pagination sort key
+            models.Index(fields=["scope", "-score", "-review_count", "-movie"]),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}: {self.movie_id} ({self.score:.3f})"
+
+
+class RankingBuild(models.Model):
+    """One run of rebuild_rankings; the latest holds the prior scores are computed with."""
+    started_at = models.DateTimeField()
+    prior_mean = models.FloatField()
+    prior_weight = models.FloatField()
+    rows_written = models.PositiveIntegerField(default=0)
+    duration_seconds = models.FloatField(default=0.0)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"rankings built at {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class MovieActivity(models.Model):
+    """Reviews written per movie and hour; the input of the trending scores (reviews.trending)."""
+    movie = models.ForeignKey(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name="activity",
+    )
+    bucket = models.DateTimeField()  # start of the hour (UTC) the reviews were written in
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["movie", "bucket"]
+        unique_together = ("movie", "bucket")
+        indexes = [
+            models.Index(fields=["bucket"]),
+        ]
+
+    def __str__(self):
+        return f"{self.movie_id} @ {self.bucket:%Y-%m-%d %H:00}: {self.review_count}"
+
+
+class TrendingMovie(models.Model):
+    """
+    A movie with recent reviews and its time-decayed trending score, kept
+    as log2 of the forward-decayed weight so the order never changes with
+    time (see reviews.trending).
+    """
+    movie = models.OneToOneField(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name="trending",
+    )
+    log_weight = models.FloatField()
+    review_count = models.IntegerField(default=0)  # in the window
+    rating_sum = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-log_weight", "-movie_id"]
+        indexes = [
+            models.Index(fields=["-log_weight", "-movie"]),
+        ]
+
+    def __str__(self):
+        return f"{self.movie_id} ({self.log_weight:.3f})"
+
+
+# Per-user review statistics, computed in the same GROUP BY as the user row
+REVIEW_STATS_ANNOTATIONS = {
+    "reviews_count": Count("reviews"),
+    "average_rating": Avg("reviews__rating"),
+    **{
+        f"rating_{rating}_count": Count("reviews", filter=Q(reviews__rating=rating))
+        for rating in range(1, 6)
+    },
+}
+
+
+def with_review_stats(users):
+    """Annotate a User queryset with review count, average rating and histogram."""
+    return users.annotate(**REVIEW_STATS_ANNOTATIONS)
@@ -0,0 +1,264 @@
+"""
+Pagination classes for the API.
+
+KeysetPagination is keyset (cursor) pagination, opted into with
+`?pagination=cursor`. Instead of COUNT(*) + OFFSET, each page is fetched
+with a range condition on the composite sort key of the last row seen, so
+deep pages cost the same as the first one. ReviewKeysetPagination pages
+review listings over the (created_at, id) / (rating, created_at, id)
+indexes on Review; RankingKeysetPagination pages a leaderboard over the
+MovieRanking index and numbers its rows.
+
+Both classes also implement `apaginate_queryset()`, which fetches the page
+with the async ORM for the async read views (reviews.async_views).
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    """DRF's page number pagination, plus an async variant."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Like paginate_queryset(), with the count and the page fetched asynchronously."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Set up front so the paginator never counts synchronously
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        # Same bounds as Paginator.page()
+        bottom = (number - 1) * paginator.per_page
+        top = bottom + paginator.per_page
+        if top + paginator.orphans >= paginator.count:
+            top = paginator.count
+        rows = [row async for row in queryset[bottom:top]] if top > bottom else []
+        self.page = Page(rows, number, paginator)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+
+class KeysetPagination(BasePagination):
+    """Keyset pagination for the supported `ordering` values; subclasses set the keys."""
+    page_size = api_settings.PAGE_SIZE
+    mode_query_param = 'pagination'
+    mode_query_value = 'cursor'
+    cursor_query_param = 'cursor'
+    # None for listings with a fixed order
+    ordering_query_param = api_settings.ORDERING_PARAM
+    default_ordering = None
+
+    # ordering value -> sort key, which must be unique per row
+    keys = {}
+    datetime_fields = set()
+    float_fields = set()
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            request.query_params.get(cls.mode_query_param) == cls.mode_query_value
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """Order and bound `queryset` to the requested page (plus one row to detect more)."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        requested = self.ordering_query_param and request.query_params.get(self.ordering_query_param)
+        self.ordering = requested or self.default_ordering
+        field = self.ordering.lstrip('-')
+        if field not in self.keys:
+            raise ValidationError({
+                'ordering': f"Cursor pagination supports ordering by {', '.join(sorted(self.keys))}."
+            })
+        self.fields = self.keys[field]
+        self.descending = self.ordering.startswith('-')
+
+        self.position, self.reverse = self.decode_cursor(request)
+        # Walking backwards means flipping both the comparison and the sort
+        descending = self.descending != self.reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(*[prefix + name for name in self.fields])
+        if self.position is not None:
+            queryset = queryset.filter(self.keyset_filter(self.position, descending))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        """Trim the rows fetched from page_queryset() and work out the links."""
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        if self.reverse:
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        self.page = rows
+        return rows
+
+    def keyset_filter(self, position, descending):
+        """
+        Build `(f1, f2, ...) < (v1, v2, ...)` (or `>`), expanded as
+        `f1 <= v1 AND (f1 < v1 OR (f1 = v1 AND (...)))` so the leading
+        column still bounds an index range scan.
+        """
+        lookup = 'lt' if descending else 'gt'
+        bound = 'lte' if descending else 'gte'
+        condition = None
+        for name, value in reversed(list(zip(self.fields, position))):
+            strict = Q(**{f'{name}__{lookup}': value})
+            if condition is None:
+                condition = strict
+            else:
+                condition = Q(**{f'{name}__{bound}': value}) & (
+                    strict | (Q(**{name: value}) & condition)
+                )
+        return condition
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def cursor_payload(self, row, reverse):
+        values = []
+        for name in self.fields:
+            # Rows are model instances or `.values()` dicts
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if name in self.datetime_fields else value)
+        return {'v': values, 'r': int(reverse)}
+
+    def encode_cursor(self, row, reverse):
+        payload = json.dumps(self.cursor_payload(row, reverse), separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        url = replace_query_param(self.base_url, self.cursor_query_param, cursor)
+        return remove_query_param(url, self.mode_query_param)
+
+    def decode_cursor(self, request):
+        """(position, reverse) from the cursor parameter; the raw payload is kept in `self.cursor`."""
+        self.cursor = {}
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            values = payload['v']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = []
+            for name, value in zip(self.fields, values):
+                if name in self.datetime_fields:
+                    value = parse_datetime(value)
+                    if value is None:
+                        raise ValueError
+                elif name in self.float_fields:
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        raise ValueError
+                elif not isinstance(value, int):
+                    raise ValueError
+                position.append(value)
+            self.cursor = payload
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor.')
+
+
+class ReviewKeysetPagination(KeysetPagination):
+    """Keyset pagination over reviews."""
+    default_ordering = '-created_at'
+    # every key ends in `id` so it is unique
+    keys = {
+        'created_at': ['created_at', 'id'],
+        'rating': ['rating', 'created_at', 'id'],
+    }
+    datetime_fields = {'created_at'}
+
+
+class RankingKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination over a MovieRanking leaderboard, best first. Sets
+    `rank` on each row; cursors carry the rank their page starts at, so
+    ranks continue across pages without counting the rows above.
+    """
+    ordering_query_param = None
+    default_ordering = '-score'
+    keys = {'score': ['score', 'review_count', 'movie_id']}
+    float_fields = {'score'}
+
+    def decode_cursor(self, request):
+        position, reverse = super().decode_cursor(request)
+        start = self.cursor.get('n', 1)
+        if isinstance(start, bool) or not isinstance(start, int) or start < 1:
+            raise NotFound('Invalid cursor.')
+        self.start = start
+        return position, reverse
+
+    def set_page(self, rows):
+        rows = super().set_page(rows)
+        if self.reverse and not self.has_previous:
+            # Walked back to the top, whatever the cursor said
+            self.start = 1
+        for rank, row in enumerate(rows, start=self.start):
+            row.rank = rank
+        return rows
+
+    def cursor_payload(self, row, reverse):
+        payload = super().cursor_payload(row, reverse)
+        payload['n'] = max(1, self.start - self.page_size) if reverse else self.start + len(self.page)
+        return payload
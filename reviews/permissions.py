@@ -1,5 +1,10 @@
+import hmac
+
+from django.conf import settings
 from rest_framework import permissions
 
+from .metrics import get_config as get_metrics_config
+
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
@@ -12,8 +17,9 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         
-        # Write permissions are only allowed to the owner of the review
-        return obj.user == request.user
+        # Write permissions are only allowed to the owner of the review;
+        # compare ids so the review's user is never loaded
+        return obj.user_id == request.user.id
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -30,3 +36,20 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         # Write permissions are only allowed to authenticated admin users
         return request.user and request.user.is_authenticated and request.user.is_staff
 
+
+class CanScrapeMetrics(permissions.BasePermission):
+    """
+    Allow /metrics to staff users, to requests carrying the configured
+    REVIEWS_METRICS['TOKEN'] as a bearer token, and to anyone in DEBUG.
+    """
+    
+    def has_permission(self, request, view):
+        if settings.DEBUG:
+            return True
+        # Check the scrape token before request.user, whose JWT
+        # authentication would reject it
+        token = get_metrics_config()['TOKEN']
+        header = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(header, f'Bearer {token}'):
+            return True
+        return bool(request.user and request.user.is_staff)
@@ -0,0 +1,289 @@
+"""
+Opt-in cProfile capture of single requests.
+
+A staff user adds the `X-Profile: 1` header (or `?_profile=1`) to a request
+and RequestProfilerMiddleware (reviews.middleware) runs it under cProfile,
+recording every SQL query with its duration. Each capture writes three files
+to REVIEWS_PROFILER['DIR']:
+
+    <id>.prof       pstats dump, for `python -m pstats` or snakeviz
+    <id>.collapsed  sampled stacks, for flamegraph.pl or speedscope
+    <id>.json       request summary and the SQL queries in execution order
+
+The flag is authorized with the API's own authentication classes, so only a
+valid staff JWT triggers a capture. Captures are sampled (SAMPLE_RATE) and
+rate limited per user and across all workers through the shared cache, and
+only the newest MAX_CAPTURES are kept on disk.
+
+SQL parameters are only recorded with RECORD_PARAMS: on the auth endpoints
+they include password hashes and email addresses. One capture runs at a
+time per process. From Python 3.12 cProfile hooks into sys.monitoring,
+which is interpreter-wide: a second profiler fails to start, and one
+profiler would also record the frames of other threads' requests.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DIR': Path(settings.BASE_DIR) / 'var' / 'profiles',
+    'CACHE_ALIAS': 'default',
+    'HEADER': 'X-Profile',
+    'QUERY_PARAM': '_profile',
+    'SAMPLE_RATE': 1.0,        # fraction of flagged requests actually profiled
+    'USER_RATE': (10, 3600),   # (captures, seconds) per user
+    'GLOBAL_RATE': (30, 60),   # (captures, seconds) across all workers
+    'MAX_CAPTURES': 200,       # older captures are deleted
+    'MAX_QUERIES': 1000,       # queries recorded per capture
+    'RECORD_PARAMS': False,    # store SQL parameters (may hold password hashes, emails)
+    'SAMPLE_INTERVAL': 0.001,  # seconds between stack samples for .collapsed
+}
+KEY_PREFIX = 'reviews:profile'
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+# Held while a capture runs; flagged requests arriving meanwhile are not profiled
+capture_lock = threading.Lock()
+_switching = {'lock': threading.Lock(), 'active': 0, 'default': sys.getswitchinterval()}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_PROFILER', {})}
+
+
+def is_requested(request, config):
+    flag = request.headers.get(config['HEADER']) or request.GET.get(config['QUERY_PARAM'])
+    return bool(flag) and flag.lower() in TRUE_VALUES
+
+
+def authenticated_user(request):
+    """
+    Authenticate a plain Django request with the API's authentication
+    classes, without touching request.user. Returns None on failure.
+    """
+    drf_request = Request(request)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(drf_request)
+        except exceptions.APIException:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+def _allow(cache, scope, limit, window):
+    """Fixed-window counter shared by all workers; True while under the limit."""
+    key = f'{KEY_PREFIX}:rate:{scope}:{int(time.time() // window)}'
+    cache.add(key, 0, timeout=window)
+    try:
+        return cache.incr(key) <= limit
+    except ValueError:
+        # Expired between add() and incr()
+        return True
+
+
+def check_rate(user, config):
+    """Return the reason a capture is refused, or None if it may proceed."""
+    if random.random() >= config['SAMPLE_RATE']:
+        return 'not-sampled'
+    cache = caches[config['CACHE_ALIAS']]
+    if not _allow(cache, f'user:{user.pk}', *config['USER_RATE']):
+        return 'user-rate-limited'
+    if not _allow(cache, 'global', *config['GLOBAL_RATE']):
+        return 'rate-limited'
+    return None
+
+
+@contextmanager
+def _switch_interval(interval):
+    """
+    Let the sampler thread take the GIL as often as it samples. The switch
+    interval is process-wide, so it is only lowered while captures run and
+    restored once the last one finishes.
+    """
+    with _switching['lock']:
+        _switching['active'] += 1
+        sys.setswitchinterval(min(interval, _switching['default']))
+    try:
+        yield
+    finally:
+        with _switching['lock']:
+            _switching['active'] -= 1
+            if not _switching['active']:
+                sys.setswitchinterval(_switching['default'])
+
+
+class Capture:
+    """Profile of one request: cProfile stats plus the SQL it executed."""
+
+    def __init__(self, request, user, config):
+        self.config = config
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.request = request
+        self.user = user
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper
+        started = time.perf_counter()
+        error = None
+        try:
+            return execute(sql, params, many, context)
+        except Exception as exc:
+            error = repr(exc)
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.query_seconds += duration
+            if len(self.queries) < self.config['MAX_QUERIES']:
+                query = {'sql': sql, 'ms': round(duration * 1000, 3), 'many': many}
+                if self.config['RECORD_PARAMS']:
+                    query['params'] = repr(params)[:500]
+                if error:
+                    query['error'] = error
+                self.queries.append(query)
+
+    @contextmanager
+    def profiling(self, root):
+        interval = self.config['SAMPLE_INTERVAL']
+        self.sampler = StackSampler(threading.get_ident(), root, interval)
+        with _switch_interval(interval):
+            self.sampler.start()
+            started = time.perf_counter()
+            self.profiler.enable()
+            try:
+                yield
+            finally:
+                self.profiler.disable()
+                self.duration = time.perf_counter() - started
+                self.sampler.stop()
+
+    def run(self, get_response):
+        with self.profiling(sys._getframe()):
+            return get_response(self.request)
+
+    async def arun(self, get_response):
+        """
+        Profile an async request. The profiler and sampler watch the event
+        loop thread: cProfile also records other tasks that run while this
+        one awaits (the sampler drops their stacks), and neither sees the
+        sync_to_async worker threads.
+        """
+        with self.profiling(sys._getframe()):
+            return await get_response(self.request)
+
+    def save(self, response):
+        directory = Path(self.config['DIR'])
+        directory.mkdir(parents=True, exist_ok=True)
+        base = directory / self.id
+
+        self.profiler.dump_stats(f'{base}.prof')
+        with open(f'{base}.collapsed', 'w') as handle:
+            for stack, samples in self.sampler.stacks.items():
+                handle.write(f'{stack} {samples}\n')
+        summary = {
+            'id': self.id,
+            'method': self.request.method,
+            'path': self.request.get_full_path(),
+            'user': self.user.get_username(),
+            'status': response.status_code,
+            'duration_ms': round(self.duration * 1000, 3),
+            'query_count': self.query_count,
+            'query_ms': round(self.query_seconds * 1000, 3),
+            'sample_interval_ms': self.config['SAMPLE_INTERVAL'] * 1000,
+            'queries': self.queries,
+        }
+        with open(f'{base}.json', 'w') as handle:
+            json.dump(summary, handle, indent=2)
+
+        prune(directory, self.config['MAX_CAPTURES'])
+        logger.info(
+            f"Profiled {self.request.method} {self.request.path} for {summary['user']}: "
+            f"{summary['duration_ms']} ms, {self.query_count} queries -> {base}.prof"
+        )
+
+
+def prune(directory, keep):
+    """Delete all but the newest `keep` captures (ids sort by time)."""
+    captures = sorted(path.stem for path in directory.glob('*.prof'))
+    for stem in captures[:max(len(captures) - keep, 0)]:
+        for suffix in ('.prof', '.collapsed', '.json'):
+            (directory / f'{stem}{suffix}').unlink(missing_ok=True)
+
+
+def _frame_label(code, prefixes):
+    filename = code.co_filename
+    for prefix in prefixes:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    return f'{code.co_qualname} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler(threading.Thread):
+    """
+    Sample one thread's Python stack every `interval` seconds into collapsed
+    stacks ("outer;...;inner <samples>"), stopping at the `root` frame.
+    Stacks that do not reach `root` are dropped: on an event loop thread they
+    belong to another task.
+
+    cProfile only records caller -> callee edges, which cannot be turned back
+    into stacks once the same function appears at several depths (Django's
+    middleware chain calls one `inner` wrapper per layer), so flame graphs
+    come from sampling instead.
+    """
+
+    def __init__(self, thread_id, root, interval):
+        super().__init__(name='reviews-stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        # Longest prefix first, so site-packages wins over its parent directory
+        self.prefixes = sorted({str(Path(path)) for path in sys.path if path}, key=len, reverse=True)
+        self.labels = {}
+
+    def label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            label = self.labels[code] = _frame_label(code, self.prefixes)
+        return label
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None and frame is not self.root:
+                labels.append(self.label(frame.f_code))
+                frame = frame.f_back
+            if labels and frame is not None:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
@@ -0,0 +1,218 @@
+"""
+Top-rated leaderboards behind /api/movies/top/.
+
+Movies are ranked by Bayesian average rather than by their plain mean, so a
+movie with two 5-star reviews does not outrank one with a thousand 4.5s:
+
+    score = (C * m + rating_sum) / (C + review_count)
+
+m is the mean of every rating and C (the prior weight) acts as C virtual
+reviews at that mean; by default it is the mean review count of reviewed
+movies (REVIEWS_RANKINGS['PRIOR_WEIGHT'] fixes it). A movie's score starts
+at m and moves towards its own average as its reviews add up.
+
+Scores live in MovieRanking, one row per movie and leaderboard ("all",
+"genre:<id>", "year:<release year>"), indexed in leaderboard order so a page
+is an index range scan whatever the catalog size. `manage.py
+rebuild_rankings` refits m and C and rewrites every row. In between, each
+Review write re-scores its movie's rows in one UPDATE from the Movie
+aggregates (see reviews.signals), reading the prior of the last build
+(RankingBuild) in a subquery; m and C drift slowly, so rebuild now and then
+(e.g. nightly). Movie and genre changes replace the movie's rows.
+"""
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Avg, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Movie, MovieRanking, RankingBuild
+
+DEFAULTS = {
+    'PRIOR_WEIGHT': None,   # virtual reviews at the mean; None uses the mean review count
+    'MIN_REVIEWS': 1,       # default for ?min_reviews=
+}
+BATCH_SIZE = 1000
+OVERALL = 'all'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_RANKINGS', {})}
+
+
+def genre_scope(genre_id):
+    return f'genre:{genre_id}'
+
+
+def year_scope(year):
+    return f'year:{year}'
+
+
+def bayesian_score(rating_sum, review_count, mean, weight):
+    return (weight * mean + rating_sum) / (weight + review_count)
+
+
+def compute_prior(config=None):
+    """(mean rating, prior weight) from the current Movie aggregates."""
+    config = config or get_config()
+    totals = Movie.objects.aggregate(rating_sum=Sum('rating_sum'), review_count=Sum('review_count'))
+    # Without any rating yet, the middle of the 1-5 scale
+    mean = totals['rating_sum'] / totals['review_count'] if totals['review_count'] else 3.0
+    weight = config['PRIOR_WEIGHT']
+    if weight is None:
+        weight = Movie.objects.filter(review_count__gt=0).aggregate(
+            weight=Avg('review_count')
+        )['weight'] or 1.0
+    if weight <= 0:
+        raise ImproperlyConfigured("REVIEWS_RANKINGS['PRIOR_WEIGHT'] must be positive.")
+    return float(mean), float(weight)
+
+
+def get_prior():
+    """
+    (mean, weight) of the latest build. Migration 0009 records the first
+    one; should the builds have been deleted, the prior is fitted to the
+    current data and recorded as a build without rows.
+    """
+    prior = RankingBuild.objects.values_list('prior_mean', 'prior_weight').first()
+    if prior is None:
+        mean, weight = compute_prior()
+        RankingBuild.objects.create(started_at=timezone.now(), prior_mean=mean, prior_weight=weight)
+        return mean, weight
+    return prior
+
+
+def ranking_rows(movies, mean, weight):
+    """
+    MovieRanking rows for (id, release_year, review_count, rating_sum,
+    genre_id) tuples: a movie's rows joined to its genre links, genre_id
+    None when it has none.
+    """
+    seen = set()
+    for movie_id, release_year, review_count, rating_sum, genre_id in movies:
+        score = bayesian_score(rating_sum, review_count, mean, weight)
+        scopes = [genre_scope(genre_id)] if genre_id is not None else []
+        if movie_id not in seen:
+            seen.add(movie_id)
+            scopes.append(OVERALL)
+            if release_year:
+                scopes.append(year_scope(release_year))
+        for scope in scopes:
+            yield MovieRanking(scope=scope, movie_id=movie_id, score=score, review_count=review_count)
+
+
+def _movie_rows(movies):
+    return movies.order_by().values_list('id', 'release_year', 'review_count', 'rating_sum', 'genres')
+
+
+def add_movie_rankings(movie):
+    """Rank a just created movie, which has neither genres nor reviews yet."""
+    mean, weight = get_prior()
+    row = (movie.pk, movie.release_year, movie.review_count, movie.rating_sum, None)
+    MovieRanking.objects.bulk_create(ranking_rows([row], mean, weight))
+
+
+def refresh_movie_rankings(movie_ids):
+    """Replace the ranking rows of `movie_ids`, e.g. after their year or genres changed."""
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+    mean, weight = get_prior()
+    rows = list(ranking_rows(_movie_rows(Movie.objects.filter(pk__in=movie_ids)), mean, weight))
+    # Within the caller's transaction if there is one; a savepoint would
+    # only add two queries to every movie write
+    with transaction.atomic(savepoint=False):
+        MovieRanking.objects.filter(movie_id__in=movie_ids).delete()
+        MovieRanking.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def update_rankings(movie_ids, create_missing=True):
+    """
+    Re-score every ranking row of `movie_ids` from their Movie aggregates in
+    one UPDATE, after their reviews changed. Movies without rows yet (added
+    since the last rebuild by a bulk write) get them when `create_missing`.
+    """
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+    movie = Movie.objects.filter(pk=OuterRef('movie_id'))
+    review_count = Subquery(movie.values('review_count')[:1])
+    rating_sum = Subquery(movie.values('rating_sum')[:1])
+    # Rows are only written once a build has recorded a prior
+    build = RankingBuild.objects.all()
+    mean = Subquery(build.values('prior_mean')[:1])
+    weight = Subquery(build.values('prior_weight')[:1])
+    updated = MovieRanking.objects.filter(movie_id__in=movie_ids).update(
+        review_count=review_count,
+        score=(weight * mean + Cast(rating_sum, FloatField())) / (weight + review_count),
+    )
+    if not create_missing:
+        return
+    if not updated:
+        refresh_movie_rankings(movie_ids)
+    elif len(movie_ids) > 1:
+        ranked = MovieRanking.objects.filter(scope=OVERALL, movie_id__in=movie_ids).values_list('movie_id', flat=True)
+        refresh_movie_rankings(set(movie_ids) - set(ranked))
+
+
+def link_genre_rankings(movie_ids, genre_ids):
+    """Add ranked movies to genre leaderboards, with the score of their overall row."""
+    overall = MovieRanking.objects.filter(scope=OVERALL, movie_id__in=list(movie_ids))
+    MovieRanking.objects.bulk_create(
+        [
+            MovieRanking(scope=genre_scope(genre_id), movie_id=movie_id, score=score, review_count=review_count)
+            for movie_id, score, review_count in overall.values_list('movie_id', 'score', 'review_count')
+            for genre_id in genre_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def unlink_genre_rankings(movie_ids=None, genre_ids=None):
+    """Take movies (all by default) off genre leaderboards (all by default)."""
+    rankings = MovieRanking.objects.all()
+    if movie_ids is not None:
+        rankings = rankings.filter(movie_id__in=list(movie_ids))
+    if genre_ids is not None:
+        rankings = rankings.filter(scope__in=[genre_scope(genre_id) for genre_id in genre_ids])
+    else:
+        rankings = rankings.filter(scope__startswith=genre_scope(''))
+    rankings.delete()
+
+
+def rebuild_rankings(prior_weight=None, batch_size=BATCH_SIZE):
+    """
+    Refit the prior and rewrite every ranking row in one transaction.
+    Returns the RankingBuild recorded for the run.
+    """
+    started_at = timezone.now()
+    started = time.perf_counter()
+    config = get_config()
+    if prior_weight is not None:
+        config['PRIOR_WEIGHT'] = prior_weight
+    mean, weight = compute_prior(config)
+
+    movies = _movie_rows(Movie.objects.all()).iterator(chunk_size=batch_size)
+    written = 0
+    with transaction.atomic():
+        MovieRanking.objects.all().delete()
+        batch = []
+        for row in ranking_rows(movies, mean, weight):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                MovieRanking.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        MovieRanking.objects.bulk_create(batch)
+        written += len(batch)
+        build = RankingBuild.objects.create(
+            started_at=started_at,
+            prior_mean=mean,
+            prior_weight=weight,
+            rows_written=written,
+            duration_seconds=time.perf_counter() - started,
+        )
+    return build
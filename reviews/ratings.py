@@ -0,0 +1,23 @@
+"""
+Review ratings as NumPy arrays, for the offline models.
+
+Kept apart from reviews.similarity and reviews.recommendations' training
+code so loading ratings needs NumPy only; SciPy is never imported by
+request handling.
+"""
+import numpy as np
+
+from .models import Review
+
+LOAD_CHUNK_SIZE = 10000
+
+
+def load_ratings():
+    """Return every review as an (n, 3) array of (user_id, movie_id, rating)."""
+    return np.array(
+        list(
+            Review.objects.order_by().values_list('user_id', 'movie_id', 'rating')
+            .iterator(chunk_size=LOAD_CHUNK_SIZE)
+        ),
+        dtype=np.float64,
+    ).reshape(-1, 3)
@@ -0,0 +1,229 @@
+"""
+Matrix factorization recommender behind /api/users/{id}/recommendations/.
+
+`manage.py train_recommender` fits a biased ALS model offline,
+
+    rating(u, i) ~ global_mean + user_bias[u] + item_bias[i] + user_factors[u] . item_factors[i]
+
+and saves every array as a `.npy` file in a fresh version directory under
+REVIEWS_RECOMMENDER['MODEL_DIR'], then atomically points `current` at it.
+Request handling opens the arrays with `np.load(mmap_mode='r')`, so all
+gunicorn workers share the same page-cache copy instead of each holding
+their own, and a retrain is picked up on the next request without a restart.
+
+Scoring a user is one matrix-vector product over all movies followed by an
+`argpartition` for the top N. Serving needs NumPy only; SciPy is imported
+by training alone, so web workers never load it.
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from django.conf import settings
+
+from .ratings import load_ratings
+
+DEFAULTS = {
+    'MODEL_DIR': Path(settings.BASE_DIR) / 'var' / 'recommender',
+    'KEEP_VERSIONS': 2,
+}
+CURRENT_FILE = 'current'
+ARRAYS = ['user_ids', 'user_factors', 'user_bias', 'item_ids', 'item_factors', 'item_bias']
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_RECOMMENDER', {})}
+
+
+# Training
+
+def _solve_side(indptr, indices, targets, design, regularization):
+    """
+    Ridge-solve one side of ALS: for every row of the CSR structure
+    (indptr, indices, targets), fit the parameters that best predict its
+    targets from the matching rows of `design`. Regularization scales with
+    the number of ratings (ALS-WR).
+    """
+    dimension = design.shape[1]
+    identity = np.eye(dimension)
+    solved = np.zeros((len(indptr) - 1, dimension))
+    for row in range(len(indptr) - 1):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        features = design[indices[start:end]]
+        solved[row] = np.linalg.solve(
+            features.T @ features + regularization * (end - start) * identity,
+            features.T @ targets[start:end],
+        )
+    return solved
+
+
+def train(factors=32, iterations=15, regularization=0.1, seed=42, progress=None):
+    """
+    Fit the model on every review and return its arrays and metadata.
+    `progress(iteration, rmse)` is called after each iteration.
+    """
+    triples = load_ratings()
+    if not len(triples):
+        raise ValueError('There are no reviews to train on.')
+    return fit_als(triples, factors, iterations, regularization, seed, progress)
+
+
+def fit_als(triples, factors=32, iterations=15, regularization=0.1, seed=42, progress=None):
+    """Fit biased ALS on (user_id, movie_id, rating) triples; see train()."""
+    from scipy import sparse
+
+    user_ids, user_index = np.unique(triples[:, 0].astype(np.int64), return_inverse=True)
+    item_ids, item_index = np.unique(triples[:, 1].astype(np.int64), return_inverse=True)
+    ratings = triples[:, 2]
+    global_mean = ratings.mean()
+
+    shape = (len(user_ids), len(item_ids))
+    by_user = sparse.csr_matrix((ratings, (user_index, item_index)), shape=shape)
+    by_item = by_user.T.tocsr()
+
+    rng = np.random.default_rng(seed)
+    user_factors = rng.normal(0, 0.1, (len(user_ids), factors))
+    item_factors = rng.normal(0, 0.1, (len(item_ids), factors))
+    user_bias = np.zeros(len(user_ids))
+    item_bias = np.zeros(len(item_ids))
+    ones_items = np.ones((len(item_ids), 1))
+    ones_users = np.ones((len(user_ids), 1))
+
+    for iteration in range(1, iterations + 1):
+        # Users: fit [factors, bias] against [item factors, 1]
+        targets = by_user.data - global_mean - item_bias[by_user.indices]
+        solved = _solve_side(
+            by_user.indptr, by_user.indices, targets,
+            np.hstack([item_factors, ones_items]), regularization,
+        )
+        user_factors, user_bias = solved[:, :-1], solved[:, -1]
+
+        # Items: fit [factors, bias] against [user factors, 1]
+        targets = by_item.data - global_mean - user_bias[by_item.indices]
+        solved = _solve_side(
+            by_item.indptr, by_item.indices, targets,
+            np.hstack([user_factors, ones_users]), regularization,
+        )
+        item_factors, item_bias = solved[:, :-1], solved[:, -1]
+
+        if progress is not None:
+            predicted = (
+                global_mean + user_bias[user_index] + item_bias[item_index]
+                + np.einsum('ij,ij->i', user_factors[user_index], item_factors[item_index])
+            )
+            progress(iteration, float(np.sqrt(np.mean((predicted - ratings) ** 2))))
+
+    arrays = {
+        'user_ids': user_ids,
+        'user_factors': user_factors.astype(np.float32),
+        'user_bias': user_bias.astype(np.float32),
+        'item_ids': item_ids,
+        'item_factors': item_factors.astype(np.float32),
+        'item_bias': item_bias.astype(np.float32),
+    }
+    meta = {
+        'global_mean': float(global_mean),
+        'factors': factors,
+        'iterations': iterations,
+        'regularization': regularization,
+        'ratings': int(len(ratings)),
+        'trained_at': time.time(),
+    }
+    return arrays, meta
+
+
+def save(arrays, meta, model_dir=None):
+    """Write a new model version and make it current; return its directory."""
+    config = get_config()
+    model_dir = Path(model_dir or config['MODEL_DIR'])
+    version = time.strftime('%Y%m%d%H%M%S') + f'-{os.getpid()}'
+    version_dir = model_dir / version
+    version_dir.mkdir(parents=True)
+    for name in ARRAYS:
+        np.save(version_dir / f'{name}.npy', np.ascontiguousarray(arrays[name]))
+    (version_dir / 'meta.json').write_text(json.dumps(meta))
+
+    # Atomic switch: readers see either the old or the new version
+    pointer = model_dir / f'{CURRENT_FILE}.tmp'
+    pointer.write_text(version)
+    os.replace(pointer, model_dir / CURRENT_FILE)
+
+    # Old versions may still be mapped by running workers; unlinking is safe
+    # on POSIX, but keep the previous one around for a quick rollback
+    versions = sorted(path for path in model_dir.iterdir() if path.is_dir())
+    for stale in versions[:-config['KEEP_VERSIONS']]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return version_dir
+
+
+# Serving
+
+class FactorModel:
+    """A trained model opened read-only with memory-mapped arrays."""
+
+    def __init__(self, version_dir):
+        for name in ARRAYS:
+            setattr(self, name, np.load(version_dir / f'{name}.npy', mmap_mode='r'))
+        meta = json.loads((version_dir / 'meta.json').read_text())
+        self.global_mean = meta['global_mean']
+        self.meta = meta
+
+    def recommend(self, user_id, exclude_movie_ids=(), count=10):
+        """
+        Return up to `count` (movie_id, predicted_rating) pairs, best first,
+        skipping `exclude_movie_ids`. Users unknown to the model (e.g. who
+        signed up after training) get the best movies by item bias.
+        """
+        row = np.searchsorted(self.user_ids, user_id)
+        known = row < len(self.user_ids) and self.user_ids[row] == user_id
+        if known:
+            scores = self.item_factors @ self.user_factors[row] + self.item_bias
+            offset = self.global_mean + float(self.user_bias[row])
+        else:
+            scores = np.array(self.item_bias)
+            offset = self.global_mean
+
+        excluded = np.asarray(list(exclude_movie_ids), dtype=self.item_ids.dtype)
+        if len(excluded):
+            positions = np.searchsorted(self.item_ids, excluded)
+            in_model = positions < len(self.item_ids)
+            positions = positions[in_model]
+            positions = positions[self.item_ids[positions] == excluded[in_model]]
+            scores[positions] = -np.inf
+
+        available = int(np.isfinite(scores).sum())
+        count = min(count, available)
+        if count <= 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        predicted = np.clip(scores[top] + offset, 1.0, 5.0)
+        return [
+            (int(movie_id), float(rating))
+            for movie_id, rating in zip(self.item_ids[top], predicted)
+        ]
+
+
+_loaded = {}
+
+
+def get_model():
+    """
+    Return the current FactorModel, or None if none has been trained.
+    Reloads when `current` changes, which costs one stat() per call.
+    """
+    pointer = Path(get_config()['MODEL_DIR']) / CURRENT_FILE
+    try:
+        stamp = (str(pointer), pointer.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if _loaded.get('stamp') != stamp:
+        version_dir = pointer.parent / pointer.read_text().strip()
+        _loaded.update(stamp=stamp, model=FactorModel(version_dir))
+    return _loaded['model']
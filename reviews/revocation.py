@@ -0,0 +1,260 @@
+"""
+Refresh token revocation without the token_blacklist app.
+
+simplejwt's blacklist app writes a row per issued token and reads one per
+refresh. Instead, each process keeps the ids (`jti`) of revoked tokens in a
+RevokedTokens set: a dict of jti -> expiry plus a heap ordered by expiry, so
+entries are dropped once their token could no longer be used anyway and
+memory stays bounded by the number of live revoked tokens. An optional Bloom
+filter in front answers most "not revoked" checks without touching the set.
+
+Processes share revocations through the Django cache: every revoked jti is
+also a cache key that expires with the token. Rotating a refresh token claims
+its jti with cache.add(), which is atomic, so a token replayed against
+another worker (or raced by two concurrent refreshes) is refused. With Redis
+(REDIS_URL) this is shared by all workers. The local-memory cache only
+guards its own process: a rotated token can then be replayed once against
+each other worker, so `check --deploy` and worker startup warn about it
+(see replay_protection_warning()). When REVIEWS_REVOCATION['PATH'] is set,
+each process also saves its set to that file every SAVE_INTERVAL seconds
+and loads it on start, so revocations survive restarts even with the
+local-memory cache.
+
+None of this touches the database: a refresh costs at most one cache
+round trip, and a replayed token known to the process costs none.
+"""
+import atexit
+import hashlib
+import heapq
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'PATH': None,              # file the revoked set is saved to; None keeps it in memory and cache only
+    'SAVE_INTERVAL': 60,       # seconds between saves of a changed set
+    'BLOOM_FILTER': False,
+    'BLOOM_CAPACITY': 100_000,
+    'BLOOM_ERROR_RATE': 0.01,
+}
+KEY_PREFIX = 'reviews:revoked'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_REVOCATION', {})}
+
+
+def replay_protection_warning():
+    """
+    Why rotated refresh tokens can be replayed across processes, or None:
+    rotation revokes them in the cache, which must be shared by all workers.
+    """
+    jwt = getattr(settings, 'SIMPLE_JWT', {})
+    if not (jwt.get('ROTATE_REFRESH_TOKENS') and jwt.get('BLACKLIST_AFTER_ROTATION')):
+        return None
+    alias = get_config()['ALIAS']
+    if not isinstance(caches[alias], (LocMemCache, DummyCache)):
+        return None
+    return (
+        f"Refresh tokens are revoked on rotation in the '{alias}' cache, which is not "
+        f"shared between processes: with several workers a rotated token can be used "
+        f"once more on each other worker. Point REVIEWS_REVOCATION['ALIAS'] at a shared "
+        f"cache (set REDIS_URL)."
+    )
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. Sized for `capacity` items at
+    `error_rate` false positives; it never gives false negatives.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * step) % self.size for index in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevokedTokens:
+    """
+    The jti -> expiry set. Lookups are O(1); expired entries are popped off
+    the heap in expiry order by evict(), O(log n) each.
+    """
+
+    def __init__(self, bloom_capacity=None, bloom_error_rate=None):
+        self._expires = {}
+        self._heap = []
+        self._bloom_args = (bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        self._bloom = BloomFilter(*self._bloom_args) if self._bloom_args else None
+        self._evicted = 0   # entries still set in the Bloom filter after eviction
+
+    def __len__(self):
+        return len(self._expires)
+
+    def __contains__(self, jti):
+        if self._bloom is not None and jti not in self._bloom:
+            return False
+        expires = self._expires.get(jti)
+        return expires is not None and expires > time.time()
+
+    def add(self, jti, expires):
+        if self._expires.get(jti, 0) >= expires:
+            return
+        self._expires[jti] = expires
+        heapq.heappush(self._heap, (expires, jti))
+        if self._bloom is not None:
+            self._bloom.add(jti)
+
+    def evict(self, now=None):
+        """Drop entries whose token has expired. Returns how many were dropped."""
+        now = time.time() if now is None else now
+        evicted = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires, jti = heapq.heappop(self._heap)
+            # Skip heap entries superseded by a later add() of the same jti
+            if self._expires.get(jti) == expires:
+                del self._expires[jti]
+                evicted += 1
+        if self._bloom is not None and evicted:
+            self._evicted += evicted
+            # A Bloom filter cannot forget; rebuild once it is mostly stale
+            if self._evicted > len(self._expires):
+                self._bloom = BloomFilter(*self._bloom_args)
+                for jti in self._expires:
+                    self._bloom.add(jti)
+                self._evicted = 0
+        return evicted
+
+    def items(self):
+        return self._expires.items()
+
+
+class RevocationStore:
+    """A process's RevokedTokens, shared through the cache and saved to PATH."""
+
+    def __init__(self, config):
+        self.config = config
+        self.cache = caches[config['ALIAS']]
+        self.path = Path(config['PATH']) if config['PATH'] else None
+        bloom = (config['BLOOM_CAPACITY'], config['BLOOM_ERROR_RATE']) if config['BLOOM_FILTER'] else ()
+        self.tokens = RevokedTokens(*bloom)
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        if self.path:
+            self.tokens_from_file()
+            atexit.register(self.flush)
+
+    def key(self, jti):
+        return f'{KEY_PREFIX}:{jti}'
+
+    def is_revoked(self, jti):
+        """True if `jti` was revoked by this or (through the cache) another process."""
+        self.save_if_due()
+        if jti in self.tokens:
+            return True
+        expires = self.cache.get(self.key(jti))
+        if expires is None:
+            return False
+        with self.lock:
+            self.tokens.add(jti, expires)
+        return True
+
+    def revoke(self, jti, expires):
+        """Revoke `jti` until `expires` (a Unix timestamp, the token's exp claim)."""
+        timeout = expires - time.time()
+        if timeout <= 0:
+            return
+        self.cache.set(self.key(jti), expires, timeout=math.ceil(timeout))
+        self._remember(jti, expires)
+
+    def claim(self, jti, expires):
+        """
+        Atomically revoke `jti` unless it already is. Returns False when the
+        token was revoked before, e.g. a rotated refresh token used again.
+        """
+        if jti in self.tokens:
+            return False
+        timeout = expires - time.time()
+        if timeout <= 0:
+            return False
+        claimed = self.cache.add(self.key(jti), expires, timeout=math.ceil(timeout))
+        self._remember(jti, expires)
+        return claimed
+
+    def _remember(self, jti, expires):
+        with self.lock:
+            self.tokens.add(jti, expires)
+            self.tokens.evict()
+            self.dirty = True
+        self.save_if_due()
+
+    def save_if_due(self):
+        if self.path and self.dirty and time.monotonic() - self.saved_at >= self.config['SAVE_INTERVAL']:
+            self.save()
+
+    def flush(self):
+        """Save now if anything changed since the last save."""
+        if self.path and self.dirty:
+            self.save()
+
+    def tokens_from_file(self):
+        try:
+            saved = json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return
+        now = time.time()
+        with self.lock:
+            for jti, expires in saved.items():
+                if expires > now:
+                    self.tokens.add(jti, expires)
+
+    def save(self):
+        """Merge this process's set into the file at PATH, dropping expired tokens."""
+        self.tokens_from_file()
+        with self.lock:
+            self.tokens.evict()
+            payload = json.dumps(dict(self.tokens.items()), separators=(',', ':'))
+            self.dirty = False
+            self.saved_at = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=self.path.parent, prefix='.revoked-')
+        with os.fdopen(handle, 'w') as output:
+            output.write(payload)
+        os.replace(temporary, self.path)
+
+
+_stores = {}
+
+
+def get_store():
+    """The process's RevocationStore for the current settings."""
+    config = get_config()
+    stamp = tuple(sorted((name, str(value)) for name, value in config.items()))
+    if _stores.get('stamp') != stamp:
+        _stores.update(stamp=stamp, store=RevocationStore(config))
+    return _stores['store']
@@ -0,0 +1,263 @@
+"""
+Pluggable full-text search backends for movies and reviews.
+
+The backend is picked from the database vendor: SQLite uses FTS5 virtual
+tables kept in sync by triggers, PostgreSQL uses generated ``tsvector``
+columns with GIN indexes. Set ``REVIEWS_SEARCH_BACKEND`` to a dotted path to
+override the choice, or to ``None`` to fall back to DRF's icontains search.
+
+The index objects themselves are created by migration 0003 through
+``install_search_index``.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_TERMS = 8
+
+SQLITE_INDEXES = {
+    'reviews_movie_fts': ('reviews_movie', ['title', 'genre', 'description']),
+    'reviews_review_fts': ('reviews_review', ['content']),
+}
+
+POSTGRES_VECTORS = {
+    'reviews_movie': (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(genre, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+    ),
+    'reviews_review': "to_tsvector('english', coalesce(content, ''))",
+}
+
+
+def tokenize(text):
+    """Split free text into at most MAX_TERMS lowercase word tokens."""
+    return TOKEN_RE.findall(text.lower())[:MAX_TERMS]
+
+
+class BaseSearchBackend:
+    """Interface shared by all full-text search backends."""
+
+    def search_movies(self, queryset, terms):
+        """Filter a Movie queryset to rows matching every term, annotated with `search_rank`."""
+        raise NotImplementedError
+
+    def search_reviews(self, queryset, terms):
+        """Filter a Review queryset by review content or movie title, annotated with `search_rank`."""
+        raise NotImplementedError
+
+    def filter_movie_title(self, queryset, terms):
+        """Filter a Review queryset to reviews whose movie title matches every term."""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Search backed by the reviews_movie_fts / reviews_review_fts FTS5 tables."""
+
+    movie_ids_sql = 'SELECT rowid FROM reviews_movie_fts WHERE reviews_movie_fts MATCH %s'
+    review_ids_sql = 'SELECT rowid FROM reviews_review_fts WHERE reviews_review_fts MATCH %s'
+    # bm25() is lower-is-better, so negate it to get a higher-is-better rank
+    movie_rank_sql = (
+        'SELECT -bm25(reviews_movie_fts, 10.0, 4.0, 1.0) FROM reviews_movie_fts '
+        'WHERE reviews_movie_fts MATCH %s AND rowid = {column}'
+    )
+    review_rank_sql = (
+        'SELECT -bm25(reviews_review_fts) FROM reviews_review_fts '
+        'WHERE reviews_review_fts MATCH %s AND rowid = reviews_review.id'
+    )
+
+    def match_expression(self, terms, column=None):
+        # Every term is quoted (so user input can't inject FTS syntax) and
+        # prefix-matched, which suits search-as-you-type.
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        if column:
+            expression = f'{column} : ({expression})'
+        return expression
+
+    def search_movies(self, queryset, terms):
+        match = self.match_expression(terms)
+        return queryset.filter(
+            pk__in=RawSQL(self.movie_ids_sql, [match])
+        ).annotate(
+            search_rank=RawSQL(
+                self.movie_rank_sql.format(column='reviews_movie.id'),
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    def search_reviews(self, queryset, terms):
+        content_match = self.match_expression(terms)
+        title_match = self.match_expression(terms, column='title')
+        return queryset.filter(
+            Q(pk__in=RawSQL(self.review_ids_sql, [content_match]))
+            | Q(movie_id__in=RawSQL(self.movie_ids_sql, [title_match]))
+        ).annotate(
+            search_rank=RawSQL(
+                f'COALESCE(({self.review_rank_sql}), 0) + COALESCE(({self.movie_rank_sql}), 0)'.format(
+                    column='reviews_review.movie_id'
+                ),
+                [content_match, title_match],
+                output_field=FloatField(),
+            )
+        )
+
+    def filter_movie_title(self, queryset, terms):
+        title_match = self.match_expression(terms, column='title')
+        return queryset.filter(movie_id__in=RawSQL(self.movie_ids_sql, [title_match]))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Search backed by generated `search_vector` tsvector columns with GIN indexes."""
+
+    movie_ids_sql = (
+        "SELECT id FROM reviews_movie WHERE search_vector @@ to_tsquery('english', %s)"
+    )
+    review_ids_sql = (
+        "SELECT id FROM reviews_review WHERE search_vector @@ to_tsquery('english', %s)"
+    )
+    movie_rank_sql = (
+        "SELECT ts_rank_cd(m.search_vector, to_tsquery('english', %s)) "
+        "FROM reviews_movie m WHERE m.id = {column}"
+    )
+
+    def tsquery(self, terms, weight=''):
+        # Title lexemes carry weight A, so "term:*A" restricts a prefix
+        # match to the title while still using the GIN index.
+        return ' & '.join(f'{term}:*{weight}' for term in terms)
+
+    def search_movies(self, queryset, terms):
+        query = self.tsquery(terms)
+        return queryset.filter(
+            pk__in=RawSQL(self.movie_ids_sql, [query])
+        ).annotate(
+            search_rank=RawSQL(
+                "ts_rank_cd(reviews_movie.search_vector, to_tsquery('english', %s))",
+                [query],
+                output_field=FloatField(),
+            )
+        )
+
+    def search_reviews(self, queryset, terms):
+        content_query = self.tsquery(terms)
+        title_query = self.tsquery(terms, weight='A')
+        return queryset.filter(
+            Q(pk__in=RawSQL(self.review_ids_sql, [content_query]))
+            | Q(movie_id__in=RawSQL(self.movie_ids_sql, [title_query]))
+        ).annotate(
+            search_rank=RawSQL(
+                "ts_rank_cd(reviews_review.search_vector, to_tsquery('english', %s)) + "
+                f"COALESCE(({self.movie_rank_sql}), 0)".format(column='reviews_review.movie_id'),
+                [content_query, title_query],
+                output_field=FloatField(),
+            )
+        )
+
+    def filter_movie_title(self, queryset, terms):
+        title_query = self.tsquery(terms, weight='A')
+        return queryset.filter(movie_id__in=RawSQL(self.movie_ids_sql, [title_query]))
+
+
+DEFAULT_BACKENDS = {
+    'sqlite': 'reviews.search.SQLiteFTSBackend',
+    'postgresql': 'reviews.search.PostgresSearchBackend',
+}
+
+_backends = {}
+
+
+def get_search_backend():
+    """Return the configured search backend instance, or None for icontains fallback."""
+    path = getattr(settings, 'REVIEWS_SEARCH_BACKEND', DEFAULT_BACKENDS.get(connection.vendor))
+    if path is None:
+        return None
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def filter_movie_title(queryset, text):
+    """Filter a Review queryset by movie title using the search index when available."""
+    backend = get_search_backend()
+    terms = tokenize(text)
+    if backend is None or not terms:
+        return queryset.filter(movie__title__icontains=text)
+    return backend.filter_movie_title(queryset, terms)
+
+
+def install_search_index(connection):
+    """
+    Create the full-text index objects for the current database, if missing.
+
+    Idempotent: it is run by migration 0003 and again after every migrate on
+    SQLite, because Django's SQLite schema editor rebuilds tables on ALTER and
+    drops their triggers in the process.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for fts_table, (table, columns) in SQLITE_INDEXES.items():
+                _install_sqlite_index(cursor, fts_table, table, columns)
+        elif connection.vendor == 'postgresql':
+            for table, vector in POSTGRES_VECTORS.items():
+                cursor.execute(
+                    f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector '
+                    f'GENERATED ALWAYS AS ({vector}) STORED'
+                )
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {table}_search_gin '
+                    f'ON {table} USING GIN (search_vector)'
+                )
+
+
+def uninstall_search_index(connection):
+    """Drop everything created by install_search_index."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for fts_table in SQLITE_INDEXES:
+                for suffix in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}')
+                cursor.execute(f'DROP TABLE IF EXISTS {fts_table}')
+        elif connection.vendor == 'postgresql':
+            for table in POSTGRES_VECTORS:
+                cursor.execute(f'DROP INDEX IF EXISTS {table}_search_gin')
+                cursor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+
+
+def _install_sqlite_index(cursor, fts_table, table, columns):
+    cursor.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+        [f'{fts_table}_a_'],
+    )
+    if cursor.fetchone()[0] == 3:
+        return
+
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5('
+        f"{column_list}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')"
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) "
+        f"VALUES ('delete', old.id, {old_values}); END"
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN '
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        f'INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END'
+    )
+    # Writes made while the triggers were missing are unknown, so re-index
+    cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
@@ -1,17 +1,94 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Movie, Review
+from django.utils import timezone
+from .models import REVIEW_STATS_ANNOTATIONS, Genre, Movie, MovieRanking, MovieSimilarity, Review, TrendingMovie
 
 User = get_user_model()
 
 
 class MovieSerializer(serializers.ModelSerializer):
     """Serializer for Movie model."""
+    rating_histogram = serializers.ReadOnlyField()
+    genres = serializers.SlugRelatedField(
+        many=True,
+        slug_field='name',
+        queryset=Genre.objects.all(),
+        required=False,
+    )
+    
+    class Meta:
+        model = Movie
+        fields = [
+            'id', 'external_id', 'title', 'description', 'genre', 'genres', 'release_year',
+            'created_at', 'updated_at', 'review_count', 'rating_sum', 'average_rating',
+            'rating_histogram',
+        ]
+        read_only_fields = [
+            'id', 'external_id', 'created_at', 'updated_at', 'review_count', 'rating_sum', 'average_rating',
+        ]
+
+
+class SimilarMovieSerializer(serializers.ModelSerializer):
+    """Flattened neighbour movie plus its similarity score."""
+    id = serializers.IntegerField(source='similar_movie_id')
+    title = serializers.CharField(source='similar_movie.title')
+    release_year = serializers.IntegerField(source='similar_movie.release_year')
+    review_count = serializers.IntegerField(source='similar_movie.review_count')
+    average_rating = serializers.FloatField(source='similar_movie.average_rating')
+    
+    class Meta:
+        model = MovieSimilarity
+        fields = ['id', 'title', 'release_year', 'review_count', 'average_rating', 'score']
+        read_only_fields = fields
+
+
+class RankedMovieSerializer(serializers.ModelSerializer):
+    """Flattened leaderboard movie plus its rank and Bayesian score."""
+    rank = serializers.IntegerField()
+    id = serializers.IntegerField(source='movie_id')
+    title = serializers.CharField(source='movie.title')
+    release_year = serializers.IntegerField(source='movie.release_year')
+    average_rating = serializers.FloatField(source='movie.average_rating')
+    
+    class Meta:
+        model = MovieRanking
+        fields = ['rank', 'id', 'title', 'release_year', 'review_count', 'average_rating', 'score']
+        read_only_fields = fields
+
+
+class TrendingMovieSerializer(serializers.ModelSerializer):
+    """Flattened trending movie plus its rank, recent reviews and decayed score."""
+    rank = serializers.IntegerField()
+    id = serializers.IntegerField(source='movie_id')
+    title = serializers.CharField(source='movie.title')
+    release_year = serializers.IntegerField(source='movie.release_year')
+    average_rating = serializers.FloatField(source='movie.average_rating')
+    recent_reviews = serializers.IntegerField(source='review_count')
+    recent_average_rating = serializers.SerializerMethodField()
+    score = serializers.FloatField()
+    
+    class Meta:
+        model = TrendingMovie
+        fields = [
+            'rank', 'id', 'title', 'release_year', 'average_rating',
+            'recent_reviews', 'recent_average_rating', 'score',
+        ]
+        read_only_fields = fields
+    
+    def get_recent_average_rating(self, obj):
+        return obj.rating_sum / obj.review_count if obj.review_count > 0 else None
+
+
+class RecommendedMovieSerializer(serializers.ModelSerializer):
+    """Movie plus the rating the recommender predicts for the user."""
+    predicted_rating = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Movie
-        fields = ['id', 'title', 'description', 'genre', 'release_year', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'title', 'release_year', 'review_count', 'average_rating', 'predicted_rating']
+        read_only_fields = fields
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -56,6 +133,78 @@ class ReviewSerializer(serializers.ModelSerializer):
         return attrs
 
 
+def datetime_formatter():
+    """
+    Return a function formatting datetimes exactly like DRF's DateTimeField,
+    with the format and current timezone resolved once up front.
+    """
+    if api_settings.DATETIME_FORMAT.lower() == 'iso-8601' and settings.USE_TZ:
+        tz = timezone.get_current_timezone()
+
+        def format_datetime(value):
+            value = value.astimezone(tz).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+
+        return format_datetime
+    return serializers.DateTimeField().to_representation
+
+
+class ReviewRowSerializer:
+    """
+    Fast read-only path producing the same JSON shape as ReviewSerializer.
+
+    Instead of instantiating models and walking DRF fields per row, list and
+    retrieve actions fetch only the needed columns with `.values(*columns)`
+    and turn each row dict into the output dict with one plain function.
+    Writes keep using ReviewSerializer / ReviewCreateSerializer.
+    """
+    columns = (
+        'id', 'movie_id', 'movie__title', 'movie__release_year',
+        'user_id', f'user__{User.USERNAME_FIELD}', 'rating', 'content',
+        'created_at', 'updated_at',
+    )
+
+    @classmethod
+    def prepare(cls, queryset):
+        """Narrow a Review queryset to the columns the row serializer reads."""
+        return queryset.values(*cls.columns)
+
+    @classmethod
+    def serialize(cls, rows):
+        """Serialize an iterable of `.values(*columns)` rows."""
+        to_dict = cls.build_row_function()
+        return [to_dict(row) for row in rows]
+
+    @staticmethod
+    def build_row_function():
+        """
+        Build the row -> dict function, resolving the datetime format and
+        current timezone once per call rather than once per field.
+        """
+        format_datetime = datetime_formatter()
+        username = f'user__{User.USERNAME_FIELD}'
+
+        def to_dict(row):
+            title = row['movie__title']
+            year = row['movie__release_year']
+            return {
+                'id': row['id'],
+                # Mirrors Movie.__str__
+                'movie': f"{title} ({year})" if year else title,
+                'movie_title': title,
+                'user': str(row[username]),
+                'user_id': row['user_id'],
+                'rating': row['rating'],
+                'content': row['content'],
+                'created_at': format_datetime(row['created_at']),
+                'updated_at': format_datetime(row['updated_at']),
+            }
+
+        return to_dict
+
+
 class ReviewCreateSerializer(serializers.ModelSerializer):
     """Simplified serializer for creating reviews (accepts movie_id)."""
     movie_id = serializers.PrimaryKeyRelatedField(
@@ -75,6 +224,22 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class ReviewBatchItemSerializer(serializers.Serializer):
+    """
+    One review of a batch create. Only checks field values; movie existence
+    and duplicates are checked for the whole batch at once by the view.
+    """
+    movie_id = serializers.IntegerField(min_value=1)
+    rating = serializers.IntegerField(
+        min_value=1, max_value=5,
+        error_messages={
+            'min_value': 'Rating must be between 1 and 5.',
+            'max_value': 'Rating must be between 1 and 5.',
+        },
+    )
+    content = serializers.CharField()
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model (registration)."""
     password = serializers.CharField(write_only=True, min_length=8)
@@ -114,15 +279,47 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class UserDetailSerializer(serializers.ModelSerializer):
-    """Serializer for User detail view (read-only, no password)."""
+    """
+    Serializer for User detail view (read-only, no password).
+    
+    Review stats are read from the annotations added by
+    `models.with_review_stats`, so serializing a list of users costs no
+    extra queries. Unannotated users fall back to one aggregate query.
+    """
     reviews_count = serializers.SerializerMethodField()
+    average_rating = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
     
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'date_joined', 'reviews_count']
-        read_only_fields = ['id', 'username', 'email', 'date_joined', 'reviews_count']
+        fields = [
+            'id', 'username', 'email', 'date_joined',
+            'reviews_count', 'average_rating', 'rating_histogram',
+        ]
+        read_only_fields = fields
+    
+    def get_review_stats(self, obj):
+        """Return the annotated review stats, aggregating them once if missing."""
+        if not hasattr(obj, 'reviews_count'):
+            stats = User.objects.filter(pk=obj.pk).aggregate(**REVIEW_STATS_ANNOTATIONS)
+            for name, value in stats.items():
+                setattr(obj, name, value)
+        return obj
     
     def get_reviews_count(self, obj):
         """Return the number of reviews by this user."""
-        return obj.reviews.count()
+        return self.get_review_stats(obj).reviews_count
+    
+    def get_average_rating(self, obj):
+        """Return the user's average rating, or None without reviews."""
+        average = self.get_review_stats(obj).average_rating
+        return round(average, 2) if average is not None else None
+    
+    def get_rating_histogram(self, obj):
+        """Return the user's 1-5 star histogram as a {rating: count} dict."""
+        stats = self.get_review_stats(obj)
+        return {
+            str(rating): getattr(stats, f'rating_{rating}_count')
+            for rating in range(1, 6)
+        }
 
@@ -0,0 +1,186 @@
+"""
+Signal handlers that keep denormalized data in sync with Review writes.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import forget_user
+from .cache import GLOBAL_SCOPE, invalidate_on_commit
+from .models import Movie, Review
+from .rankings import (
+    add_movie_rankings, link_genre_rankings, refresh_movie_rankings, unlink_genre_rankings, update_rankings,
+)
+from .search import install_search_index
+from .trending import forget_review, record_reviews
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    """Stash the stored (movie_id, rating) so post_save can apply a delta."""
+    instance._previous_rating = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_rating = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list('movie_id', 'rating')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_movie_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    """Fold a created or edited review into its movie's rating aggregates."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    current = (instance.movie_id, instance.rating)
+    if previous == current:
+        return
+    if previous is not None:
+        Movie.apply_rating_delta(previous[0], previous[1], -1)
+    Movie.apply_rating_delta(current[0], current[1], 1)
+    update_rankings({current[0], previous[0]} if previous else [current[0]])
+
+
+@receiver(post_delete, sender=Review)
+def update_movie_stats_on_delete(sender, instance, **kwargs):
+    """Remove a deleted review from its movie's rating aggregates."""
+    Movie.apply_rating_delta(instance.movie_id, instance.rating, -1)
+    # Not create_missing: when the movie itself is being deleted its
+    # rankings are already gone and must stay so
+    update_rankings([instance.movie_id], create_missing=False)
+
+
+@receiver(post_save, sender=Review)
+def record_review_activity(sender, instance, created, raw=False, **kwargs):
+    """Count a new review towards its movie trending; move an edited one's rating."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if not created:
+        if previous is None or previous == (instance.movie_id, instance.rating):
+            return
+        forget_review(previous[0], previous[1], instance.created_at)
+    record_reviews({instance.movie_id: instance.rating}, instance.created_at)
+
+
+@receiver(post_delete, sender=Review)
+def forget_review_activity(sender, instance, **kwargs):
+    """Take a deleted review out of its movie's trending score."""
+    forget_review(instance.movie_id, instance.rating, instance.created_at)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_responses(sender, instance, **kwargs):
+    """Expire cached listings and the movie pages the review appears on."""
+    scopes = {'reviews', 'movies', f'movie:{instance.movie_id}'}
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is not None:
+        scopes.add(f'movie:{previous[0]}')
+    invalidate_on_commit(*scopes)
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def invalidate_movie_responses(sender, instance, **kwargs):
+    """Expire cached movie pages and review listings that embed the movie title."""
+    invalidate_on_commit('movies', 'reviews', f'movie:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+def invalidate_movie_genre_responses(sender, instance, action, pk_set, reverse, **kwargs):
+    """
+    Bump updated_at of movies whose genre links were added or removed, so
+    their ETags change, and expire their cached pages.
+    """
+    if action == 'pre_clear' and reverse:
+        # Changed from the Genre side; the links are gone by post_clear
+        instance._cleared_movie_ids = list(instance.movies.values_list('pk', flat=True))
+        return
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        movie_ids = [instance.pk] if pk_set or action == 'post_clear' else []
+    elif action == 'post_clear':
+        movie_ids = getattr(instance, '_cleared_movie_ids', [])
+    else:
+        # pk_set holds movie ids when changed from the Genre side
+        movie_ids = list(pk_set or [])
+    if not movie_ids:
+        return
+    Movie.objects.filter(pk__in=movie_ids).update(updated_at=timezone.now())
+    invalidate_on_commit('movies', *(f'movie:{movie_id}' for movie_id in movie_ids))
+
+
+@receiver(post_save, sender=Movie)
+def refresh_movie_rankings_on_save(sender, instance, created, raw=False, **kwargs):
+    """Rank a new movie, or re-file an edited one under its release year's leaderboard."""
+    if raw:
+        return
+    if created:
+        add_movie_rankings(instance)
+    else:
+        refresh_movie_rankings([instance.pk])
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+def update_genre_rankings(sender, instance, action, pk_set, reverse, **kwargs):
+    """Move movies between genre leaderboards when genre links change."""
+    if not action.startswith('post_'):
+        return
+    # pk_set holds genre ids, or movie ids when changed from the Genre side
+    # (None on clear)
+    movie_ids, genre_ids = (pk_set, [instance.pk]) if reverse else ([instance.pk], pk_set)
+    if action == 'post_add':
+        link_genre_rankings(movie_ids, genre_ids)
+    else:
+        unlink_genre_rankings(movie_ids, genre_ids)
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_username(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Stash the stored username so post_save can tell whether it changed."""
+    instance._previous_username = None
+    if raw or instance.pk is None or (update_fields is not None and 'username' not in update_fields):
+        return
+    instance._previous_username = (
+        User.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_responses(sender, instance, created, **kwargs):
+    """
+    Usernames are embedded in review payloads, so renaming a reviewer bumps
+    updated_at of their reviews, which changes the ETags and Last-Modified
+    of every page showing them, and expires every cached response.
+    """
+    previous = getattr(instance, '_previous_username', None)
+    if created or previous is None or previous == instance.username:
+        return
+    if instance.reviews.update(updated_at=timezone.now()):
+        invalidate_on_commit(GLOBAL_SCOPE)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Drop the user cached by CachedJWTAuthentication, e.g. after staff or active changes."""
+    forget_user(instance.pk)
+
+
+def repair_search_index(sender, using, **kwargs):
+    """Re-create full-text triggers dropped by SQLite table rebuilds during migrate."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ('reviews', '0003_search_index') in applied:
+        install_search_index(connection)
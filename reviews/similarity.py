@@ -0,0 +1,118 @@
+"""
+Item-item similarity model behind /api/movies/{id}/similar/.
+
+Ratings are loaded from the Review table into a sparse user x movie matrix.
+Each movie column is (optionally) centred on the rating user's mean, i.e.
+adjusted cosine, and L2-normalised, so one sparse product X^T X gives the
+cosine similarity of every pair of movies. The product is computed one
+block of movies at a time to bound memory. Scores are shrunk by
+n / (n + shrinkage), n being the number of users who rated both movies, so
+pairs backed by a handful of raters don't crowd out well-supported ones.
+Only the top-K neighbours per movie are kept and written to MovieSimilarity.
+
+Requires NumPy and SciPy. Only the offline build (`manage.py
+build_similarity`) and evaluation import this module, never request
+handling; ratings are loaded by reviews.ratings.
+"""
+import numpy as np
+from scipy import sparse
+
+from django.db import transaction
+
+from .models import MovieSimilarity
+from .ratings import LOAD_CHUNK_SIZE, load_ratings
+
+DEFAULT_TOP_K = 20
+DEFAULT_SHRINKAGE = 10.0
+BLOCK_SIZE = 512
+
+
+def rating_matrix(triples, adjusted=True):
+    """
+    Return (matrix, raters, movie_ids) for (user_id, movie_id, rating)
+    triples: a CSC users x movies matrix with unit-length columns, the
+    matching 0/1 "has rated" matrix, and the movie id of each column.
+    """
+    user_ids, user_index = np.unique(triples[:, 0].astype(np.int64), return_inverse=True)
+    movie_ids, movie_index = np.unique(triples[:, 1].astype(np.int64), return_inverse=True)
+    values = triples[:, 2]
+
+    if adjusted:
+        # Subtract each user's mean rating so generous and harsh raters
+        # contribute comparable signals
+        sums = np.bincount(user_index, weights=values, minlength=len(user_ids))
+        counts = np.bincount(user_index, minlength=len(user_ids))
+        values = values - (sums / counts)[user_index]
+
+    shape = (len(user_ids), len(movie_ids))
+    raters = sparse.csc_matrix((np.ones_like(values), (user_index, movie_index)), shape=shape)
+    matrix = sparse.csc_matrix((values, (user_index, movie_index)), shape=shape)
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return (matrix @ sparse.diags(scale)).tocsc(), raters, movie_ids
+
+
+def top_neighbors(matrix, raters, movie_ids, columns, top_k=DEFAULT_TOP_K,
+                  shrinkage=DEFAULT_SHRINKAGE, block_size=BLOCK_SIZE):
+    """
+    Yield (movie_id, [(neighbor_id, score), ...]) for each column index in
+    `columns`, best neighbour first. Only positive similarities are kept.
+    """
+    transposed = matrix.T.tocsr()
+    raters_transposed = raters.T.tocsr()
+    for start in range(0, len(columns), block_size):
+        block = columns[start:start + block_size]
+        scores = (transposed[block] @ matrix).toarray()
+        if shrinkage:
+            support = (raters_transposed[block] @ raters).toarray()
+            scores *= support / (support + shrinkage)
+        scores[np.arange(len(block)), block] = 0.0  # a movie is not its own neighbour
+
+        k = min(top_k, scores.shape[1] - 1)
+        if k <= 0:
+            return
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, column in enumerate(block):
+            picked = candidates[row]
+            picked = picked[np.argsort(-scores[row, picked], kind='stable')]
+            yield int(movie_ids[column]), [
+                (int(movie_ids[other]), float(scores[row, other]))
+                for other in picked if scores[row, other] > 0
+            ]
+
+
+def build_similarities(movie_ids=None, top_k=DEFAULT_TOP_K, adjusted=True,
+                       shrinkage=DEFAULT_SHRINKAGE, block_size=BLOCK_SIZE):
+    """
+    Recompute neighbour lists and replace them in MovieSimilarity.
+
+    With `movie_ids`, only those movies' lists are recomputed (incremental
+    mode); otherwise the whole table is rebuilt. Returns the number of
+    movies whose neighbour list was written.
+    """
+    matrix, raters, all_movie_ids = rating_matrix(load_ratings(), adjusted=adjusted)
+    if movie_ids is None:
+        columns = np.arange(len(all_movie_ids))
+    else:
+        wanted = np.array(sorted(movie_ids), dtype=np.int64)
+        columns = np.flatnonzero(np.isin(all_movie_ids, wanted))
+
+    rows = []
+    neighbor_lists = top_neighbors(
+        matrix, raters, all_movie_ids, columns, top_k, shrinkage, block_size
+    )
+    for movie_id, neighbors in neighbor_lists:
+        rows.extend(
+            MovieSimilarity(movie_id=movie_id, similar_movie_id=other, score=score, rank=rank)
+            for rank, (other, score) in enumerate(neighbors, start=1)
+        )
+
+    with transaction.atomic():
+        stale = MovieSimilarity.objects.all()
+        if movie_ids is not None:
+            # Movies that lost all their reviews drop their list too
+            stale = stale.filter(movie_id__in=movie_ids)
+        stale.delete()
+        MovieSimilarity.objects.bulk_create(rows, batch_size=LOAD_CHUNK_SIZE)
+    return len(columns)
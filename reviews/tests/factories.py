@@ -0,0 +1,36 @@
+"""Shared test data builders for the reviews tests."""
+from django.contrib.auth import get_user_model
+
+from reviews.models import Movie, Review
+
+User = get_user_model()
+
+
+def create_users(count, prefix='critic', **fields):
+    """
+    Create `count` users named `<prefix>0`, `<prefix>1`, ... in one query.
+
+    They have no usable password; authenticate them with force_authenticate.
+    """
+    return User.objects.bulk_create(
+        [User(username=f'{prefix}{index}', **fields) for index in range(count)]
+    )
+
+
+def create_movies(*titles, **fields):
+    """Create one movie per title, sharing `fields`."""
+    return [Movie.objects.create(title=title, **fields) for title in titles]
+
+
+def rate(users, movies, ratings, content='Rated.'):
+    """
+    Have users[i] review movies[j] with ratings[i][j]; None skips the pair.
+
+    Reviews are saved one by one so the aggregate and index signals run.
+    """
+    return [
+        Review.objects.create(movie=movie, user=user, rating=rating, content=content)
+        for user, row in zip(users, ratings)
+        for movie, rating in zip(movies, row)
+        if rating is not None
+    ]
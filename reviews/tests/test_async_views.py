@@ -0,0 +1,162 @@
+"""Tests for the async read views served under ASGI (reviews.async_views)."""
+import inspect
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.base import BaseHandler
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from rest_framework_simplejwt.tokens import AccessToken
+
+from movie_review_api.urls import urlpatterns as project_urlpatterns
+from reviews.models import Genre, Movie, Review
+from reviews.urls import async_read_urlpatterns
+
+User = get_user_model()
+
+# The project URLs with the async routes mounted, as REVIEWS_ASYNC_READS does
+urlpatterns = [path('api/', include(async_read_urlpatterns)), *project_urlpatterns]
+ASYNC_URLS = {'ROOT_URLCONF': __name__}
+NO_CACHE = {'REVIEWS_RESPONSE_CACHE': {'ENABLED': False}}
+
+
+class AsyncReadViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x' * 12, is_staff=True)
+        cls.users = [User.objects.create_user(f'reader{index}', password='x' * 12) for index in range(3)]
+        drama = Genre.objects.create(name='Drama')
+        cls.movies = []
+        for index in range(14):
+            movie = Movie.objects.create(title=f'Harbor Story {index}', release_year=1990 + index)
+            if index % 2:
+                movie.genres.add(drama)
+            cls.movies.append(movie)
+        for index, movie in enumerate(cls.movies[:6]):
+            for offset, user in enumerate(cls.users):
+                Review.objects.create(
+                    movie=movie, user=user, rating=(index + offset) % 5 + 1,
+                    content=f'A harbor of a film, take {index}.',
+                )
+
+    def setUp(self):
+        cache.clear()
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def get_both(self, url, **extra):
+        with self.settings(**NO_CACHE):
+            sync = self.client.get(url, **extra)
+            with self.settings(**ASYNC_URLS):
+                response = self.client.get(url, **extra)
+                self.assertTrue(inspect.iscoroutinefunction(response.resolver_match.func), url)
+        return sync, response
+
+    def test_responses_match_the_sync_views(self):
+        movie = self.movies[1].pk
+        urls = [
+            '/api/movies/',
+            '/api/movies/?page=2',
+            '/api/movies/?page=9',
+            '/api/movies/?search=harbor&ordering=relevance',
+            '/api/movies/?genre=drama&ordering=-release_year',
+            f'/api/movies/{movie}/',
+            '/api/movies/999999/',
+            '/api/movies/abc/',
+            f'/api/movies/{movie}/reviews/',
+            f'/api/movies/{movie}/reviews/?rating=3&ordering=rating',
+            f'/api/movies/{movie}/reviews/?rating=9',
+            f'/api/movies/{movie}/reviews/?pagination=cursor',
+            '/api/reviews/',
+            '/api/reviews/?page=2&ordering=rating',
+            '/api/reviews/?rating=2',
+            '/api/reviews/?movie_title=harbor',
+            '/api/reviews/?search=take',
+            '/api/reviews/?pagination=cursor&ordering=-rating',
+        ]
+        for url in urls:
+            sync, response = self.get_both(url)
+            self.assertEqual(response.status_code, sync.status_code, url)
+            self.assertEqual(response.json(), sync.json(), url)
+            self.assertEqual(response.get('Allow'), sync.get('Allow'), url)
+
+        sync, response = self.get_both('/api/reviews/', **self.auth(self.users[0]))
+        self.assertEqual((response.status_code, response.json()), (200, sync.json()))
+
+    def test_cursor_pages_follow_links(self):
+        with self.settings(**ASYNC_URLS):
+            url, seen = '/api/reviews/?pagination=cursor', []
+            while url:
+                page = self.client.get(url).json()
+                seen += [review['id'] for review in page['results']]
+                url = page['next']
+        self.assertEqual(seen, list(Review.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_same_queries_as_the_sync_views(self):
+        for url in ('/api/movies/', f'/api/movies/{self.movies[0].pk}/reviews/', '/api/reviews/'):
+            with self.settings(**NO_CACHE), CaptureQueriesContext(connection) as sync:
+                self.client.get(url)
+            with self.settings(**NO_CACHE, **ASYNC_URLS), CaptureQueriesContext(connection) as captured:
+                self.client.get(url)
+            self.assertEqual(len(captured), len(sync), url)
+
+    def test_conditional_requests_and_shared_cache(self):
+        url = f'/api/movies/{self.movies[0].pk}/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.settings(**ASYNC_URLS):
+            response = self.client.get(url)
+            self.assertEqual(response['X-Cache'], 'HIT')
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_other_methods_reach_the_sync_views(self):
+        with self.settings(**ASYNC_URLS):
+            created = self.client.post(
+                '/api/movies/', {'title': 'Posted', 'genres': ['Drama']},
+                content_type='application/json', **self.auth(self.admin),
+            )
+            self.assertEqual(created.status_code, 201)
+            review = self.client.post(
+                '/api/reviews/', {'movie_id': created.json()['id'], 'rating': 4, 'content': 'Fine.'},
+                content_type='application/json', **self.auth(self.users[0]),
+            )
+            self.assertEqual(review.status_code, 201)
+            self.assertEqual(self.client.delete(f"/api/movies/{created.json()['id']}/").status_code, 401)
+            self.assertEqual(self.client.put(f'/api/movies/{self.movies[0].pk}/reviews/').status_code, 405)
+
+    @override_settings(**ASYNC_URLS)
+    async def test_served_through_the_asgi_handler(self):
+        response = await self.async_client.get(
+            '/api/reviews/?rating=1', headers={'Authorization': f'Bearer {AccessToken.for_user(self.admin)}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], await Review.objects.filter(rating=1).acount())
+        # The metrics middleware still sees the queries run by the async ORM
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    @override_settings(DEBUG=True)
+    def test_middleware_chain_stays_async(self):
+        # Django logs "... adapted" for every middleware it wraps in sync_to_async
+        handler = BaseHandler()
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            handler.load_middleware(is_async=True)
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+
+    @override_settings(**ASYNC_URLS)
+    async def test_profiled_through_the_asgi_handler(self):
+        directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        with self.settings(REVIEWS_PROFILER={'DIR': directory}):
+            response = await self.async_client.get('/api/movies/', headers={
+                'Authorization': f'Bearer {AccessToken.for_user(self.admin)}', 'X-Profile': '1',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue((directory / f"{response['X-Profile']}.prof").exists())
+        self.assertIn('reviews_movie', (directory / f"{response['X-Profile']}.json").read_text())
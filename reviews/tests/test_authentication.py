@@ -0,0 +1,101 @@
+"""Tests for the cached JWT authentication and id-based owner checks."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.authentication import CachedJWTAuthentication, user_key
+from reviews.models import Movie, Review
+from reviews.permissions import IsOwnerOrReadOnly
+
+User = get_user_model()
+
+
+def user_queries(captured):
+    table = User._meta.db_table
+    return [query['sql'] for query in captured.captured_queries if f'FROM "{table}"' in query['sql']]
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='x' * 12)
+        cls.other = User.objects.create_user('other', password='x' * 12)
+        cls.admin = User.objects.create_user('admin', password='x' * 12, is_staff=True)
+        cls.movie = Movie.objects.create(title='Cached')
+        cls.review = Review.objects.create(movie=cls.movie, user=cls.user, rating=4, content='Good.')
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def test_repeat_requests_skip_the_user_query(self):
+        client = self.client_for(self.user)
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(client.get('/api/reviews/').status_code, 200)
+        self.assertEqual(len(user_queries(first)), 1)
+
+        with CaptureQueriesContext(connection) as read:
+            self.assertEqual(client.get('/api/reviews/').status_code, 200)
+        with CaptureQueriesContext(connection) as write:
+            response = client.patch(f'/api/reviews/{self.review.pk}/', {'rating': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries(read), [])
+        self.assertEqual(user_queries(write), [])
+
+    def test_only_the_auth_fields_are_cached(self):
+        self.client_for(self.admin).get('/api/reviews/')
+        values = cache.get(user_key(self.admin.pk))
+        self.assertNotIn(self.admin.password, values)
+
+        with self.assertNumQueries(0):
+            user = CachedJWTAuthentication().get_user(AccessToken.for_user(self.admin))
+            self.assertEqual((user.pk, user.username, user.is_active, user.is_staff), (self.admin.pk, 'admin', True, True))
+        self.assertIn('password', user.get_deferred_fields())
+        # Other fields load on first access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.date_joined, self.admin.date_joined)
+
+    def test_user_changes_evict_the_cached_user(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(client.post('/api/movies/', {'title': 'Staff only'}, format='json').status_code, 201)
+
+        self.admin.is_staff = False
+        self.admin.save()
+        self.assertEqual(client.post('/api/movies/', {'title': 'Not anymore'}, format='json').status_code, 403)
+
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertEqual(client.get('/api/reviews/').status_code, 401)
+
+    def test_deleted_users_are_rejected(self):
+        client = self.client_for(self.other)
+        self.assertEqual(client.get('/api/reviews/').status_code, 200)
+        self.other.delete()
+        self.assertEqual(client.get('/api/reviews/').status_code, 401)
+
+    def test_cache_can_be_disabled(self):
+        client = self.client_for(self.user)
+        with self.settings(REVIEWS_AUTH={'USER_CACHE_TIMEOUT': 0}):
+            client.get('/api/reviews/')
+            with CaptureQueriesContext(connection) as captured:
+                client.get('/api/reviews/')
+        self.assertEqual(len(user_queries(captured)), 1)
+
+    def test_owner_check_compares_ids(self):
+        self.assertEqual(
+            self.client_for(self.other).delete(f'/api/reviews/{self.review.pk}/').status_code, 403
+        )
+
+        review = Review.objects.get(pk=self.review.pk)
+        request = type('Request', (), {'method': 'DELETE', 'user': self.user})()
+        with self.assertNumQueries(0):
+            self.assertTrue(IsOwnerOrReadOnly().has_object_permission(request, None, review))
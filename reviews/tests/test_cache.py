@@ -0,0 +1,113 @@
+"""Tests for the versioned response cache (reviews.cache)."""
+from django.contrib.auth import get_user_model
+import tempfile
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from reviews.cache import get_versions, invalidate_all
+from reviews.checks import check_response_cache
+from reviews.models import Movie, Review
+from reviews.tests.factories import create_movies, create_users
+
+User = get_user_model()
+
+
+class ResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, = create_users(1)
+        cls.movie, cls.other = create_movies('Reviewed', 'Untouched')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_review_writes_bump_the_versions(self):
+        before = get_versions(['reviews', f'movie:{self.movie.pk}', f'movie:{self.other.pk}'])
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/reviews/', {'movie_id': self.movie.pk, 'rating': 4, 'content': 'Fine.'})
+        self.assertEqual(response.status_code, 201)
+        after = get_versions(['reviews', f'movie:{self.movie.pk}', f'movie:{self.other.pk}'])
+        # all, reviews and the reviewed movie change; the other movie does not
+        self.assertEqual([old != new for old, new in zip(before, after)], [False, True, True, False])
+
+    def test_stale_pages_are_not_served(self):
+        self.assertEqual(self.get('/api/reviews/')['X-Cache'], 'MISS')
+        self.assertEqual(self.get('/api/reviews/')['X-Cache'], 'HIT')
+        other = self.get(f'/api/movies/{self.other.pk}/')
+
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/reviews/', {'movie_id': self.movie.pk, 'rating': 4, 'content': 'Fine.'})
+        self.client.force_authenticate(None)
+
+        response = self.get('/api/reviews/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 1)
+        detail = self.get(f'/api/movies/{self.movie.pk}/')
+        self.assertEqual(detail.data['review_count'], 1)
+        self.assertEqual(self.get(f'/api/movies/{self.other.pk}/')['X-Cache'], 'HIT')
+        self.assertEqual(other.data, self.get(f'/api/movies/{self.other.pk}/').data)
+
+    def test_rolled_back_writes_keep_the_cache(self):
+        self.get('/api/reviews/')
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Review.objects.create(movie=self.movie, user=self.user, rating=3, content='Undone.')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.get('/api/reviews/')['X-Cache'], 'HIT')
+
+    def test_only_renaming_a_reviewer_expires_everything(self):
+        Review.objects.create(movie=self.movie, user=self.user, rating=3, content='Fine.')
+        user = User.objects.get(pk=self.user.pk)
+        before = get_versions([])
+        with self.captureOnCommitCallbacks(execute=True):
+            user.set_password('y' * 12)
+            user.save()
+            user.first_name = 'Critic'
+            user.save()
+        self.assertEqual(get_versions([]), before)
+
+        user.username = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertNotEqual(get_versions([]), before)
+
+    def test_invalidate_all(self):
+        self.get('/api/movies/')
+        Movie.objects.filter(pk=self.movie.pk).update(title='Renamed in bulk')
+        self.assertEqual(self.get('/api/movies/')['X-Cache'], 'HIT')
+        invalidate_all()
+        response = self.get('/api/movies/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Renamed in bulk', [row['title'] for row in response.data['results']])
+
+
+class ResponseCacheCheckTests(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_warns_when_the_cache_is_per_process(self):
+        self.assertEqual([error.id for error in check_response_cache(None)], ['reviews.W002'])
+        with self.settings(REVIEWS_RESPONSE_CACHE={'ENABLED': False}):
+            self.assertEqual(check_response_cache(None), [])
+
+    def test_shared_cache_passes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shared = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+            }}
+            with self.settings(CACHES=shared):
+                self.assertEqual(check_response_cache(None), [])
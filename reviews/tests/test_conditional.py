@@ -0,0 +1,125 @@
+"""Tests for conditional GETs (reviews.conditional) on the read endpoints."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from reviews.models import Genre, Movie, Review
+from reviews.tests.factories import create_movies, create_users, rate
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other_user = create_users(2)
+        cls.movie, cls.other = create_movies('Reviewed', 'Untouched')
+        cls.review, = rate([cls.user], [cls.movie], [[4]])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def urls(self):
+        return [
+            '/api/movies/', f'/api/movies/{self.movie.pk}/', f'/api/movies/{self.movie.pk}/reviews/',
+            '/api/reviews/', f'/api/reviews/{self.review.pk}/',
+        ]
+
+    def validators(self):
+        validators = {}
+        for url in self.urls():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            validators[url] = response['ETag'], response['Last-Modified']
+        return validators
+
+    def assertStatuses(self, validators, expected):
+        for url, (etag, last_modified) in validators.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, expected, url)
+
+    def test_matching_validators_get_a_304(self):
+        validators = self.validators()
+        self.assertStatuses(validators, 304)
+        for url, (_, last_modified) in validators.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304, url)
+
+    def test_review_edits_change_the_validators(self):
+        validators = self.validators()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/reviews/{self.review.pk}/', {'rating': 2})
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(None)
+        self.assertStatuses(validators, 200)
+
+    def test_renaming_a_reviewer_changes_the_review_validators(self):
+        validators = self.validators()
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        reviews = {url: value for url, value in validators.items() if 'reviews' in url}
+        self.assertStatuses(reviews, 200)
+        # Movie payloads do not embed usernames
+        self.assertStatuses({url: value for url, value in validators.items() if url not in reviews}, 304)
+        self.assertEqual(self.client.get(f'/api/reviews/{self.review.pk}/').json()['user'], 'renamed')
+
+    def test_pages_and_filters_do_not_share_an_etag(self):
+        etags = {self.client.get(url)['ETag'] for url in ('/api/reviews/', '/api/reviews/?rating=4', '/api/reviews/?page=1')}
+        self.assertEqual(len(etags), 3)
+
+    def test_reviews_of_other_movies_keep_the_etag(self):
+        url = f'/api/movies/{self.other.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(movie=self.movie, user=self.other_user, rating=2, content='No.')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_missing_objects_have_no_validators(self):
+        response = self.client.get('/api/movies/999999/')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class GenreLinkValidatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.drama = Genre.objects.create(name='Drama')
+        cls.comedy = Genre.objects.create(name='Comedy')
+        cls.movie, cls.other = create_movies('Relabelled', 'Untouched', release_year=1994)
+
+    def setUp(self):
+        cache.clear()
+
+    def etags(self):
+        return {url: self.client.get(url)['ETag'] for url in ('/api/movies/', f'/api/movies/{self.movie.pk}/')}
+
+    def assertModified(self, etags):
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+
+    def test_genre_changes_from_either_side_change_the_etags(self):
+        changes = [
+            lambda: self.movie.genres.set([self.drama]),
+            lambda: self.comedy.movies.add(self.movie),
+            lambda: self.comedy.movies.remove(self.movie),
+            lambda: self.drama.movies.clear(),
+        ]
+        for change in changes:
+            etags = self.etags()
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertModified(etags)
+        self.assertEqual(self.client.get(f'/api/movies/{self.movie.pk}/').json()['genres'], [])
+
+    def test_unchanged_movies_keep_their_etag(self):
+        url = f'/api/movies/{self.other.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movie.genres.set([self.drama])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
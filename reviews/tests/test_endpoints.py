@@ -0,0 +1,50 @@
+"""
+Query-count regression tests for every API endpoint.
+
+Each endpoint must not issue more SQL queries than recorded in
+endpoint_baseline.json (regenerate it with
+`python manage.py benchmark_endpoints --update-baseline`). Latency is only
+checked when BENCHMARK_LATENCY_THRESHOLD is set, e.g. on the machine the
+baseline was recorded on, since timings are not portable.
+"""
+import os
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.settings import api_settings
+
+from reviews.benchmarks import compare, load_baseline, run_benchmark, seed_dataset
+
+REPEAT = 3
+
+
+class EndpointQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.context = seed_dataset(movies=60, users=20, reviews_per_user=15, calls=REPEAT + 1)
+        cls.baseline = load_baseline()
+
+    def test_baseline_covers_every_endpoint(self):
+        results = run_benchmark(self.context, repeat=REPEAT)
+        self.assertIsNotNone(self.baseline, 'endpoint_baseline.json is missing')
+        missing = sorted(set(results) - set(self.baseline['endpoints']))
+        self.assertEqual(missing, [], 'Endpoints missing from the baseline')
+
+        threshold = os.environ.get('BENCHMARK_LATENCY_THRESHOLD')
+        regressions = compare(
+            results,
+            self.baseline,
+            latency_threshold=float(threshold or 0),
+            check_latency=threshold is not None,
+        )
+        self.assertEqual(regressions, [])
+
+    def test_list_query_counts_do_not_depend_on_page_contents(self):
+        # A per-row query would make a full page cost more than a single row
+        endpoints = {'movie-list', 'review-list', 'user-list', 'movie-reviews'}
+        full = run_benchmark(self.context, repeat=1, endpoints=endpoints)
+        with mock.patch.object(api_settings.DEFAULT_PAGINATION_CLASS, 'page_size', 1):
+            single = run_benchmark(self.context, repeat=1, endpoints=endpoints)
+        for name in full:
+            self.assertEqual(full[name]['queries'], single[name]['queries'], name)
@@ -0,0 +1,54 @@
+"""Tests for the offline recommender evaluation (reviews.evaluation)."""
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from reviews.evaluation import BaseRecommender, evaluate_fold, ranking_metrics
+
+
+class FixedRecommender(BaseRecommender):
+    """Ranks movies 1-5 in the same order for everyone, best first."""
+
+    def score_movies(self, user_id):
+        return np.array([1, 2, 3, 4, 5]), [5.0, 4.0, 3.0, 2.0, 1.0]
+
+
+class RankingMetricsTests(SimpleTestCase):
+
+    # user 1 has seen movie 1; relevant test ratings are >= 4
+    train = np.array([[1, 1, 5]], dtype=np.float64)
+    test = np.array([
+        [1, 2, 5], [1, 5, 4], [1, 3, 2],   # user 1: relevant 2 and 5
+        [2, 1, 4], [2, 4, 3],              # user 2: relevant 1
+        [3, 2, 2],                         # user 3: nothing relevant, not counted
+    ], dtype=np.float64)
+
+    def test_hand_computed_fixture(self):
+        # k=2: user 1 gets [2, 3] (1 is seen), 1 hit of 2; user 2 gets [1, 2], 1 hit of 1
+        precision, recall = ranking_metrics(FixedRecommender(), self.train, self.test, k=2)
+        self.assertAlmostEqual(precision, (1 / 2 + 1 / 2) / 2)
+        self.assertAlmostEqual(recall, (1 / 2 + 1 / 1) / 2)
+
+    def test_k_beyond_the_catalog_still_divides_by_k(self):
+        precision, recall = ranking_metrics(FixedRecommender(), self.train, self.test, k=10)
+        self.assertAlmostEqual(precision, (2 / 10 + 1 / 10) / 2)
+        self.assertAlmostEqual(recall, 1.0)
+
+    def test_threshold(self):
+        precision, recall = ranking_metrics(FixedRecommender(), self.train, self.test, k=2, threshold=5)
+        # Only user 1's movie 2 is relevant, and it is ranked first
+        self.assertAlmostEqual((precision, recall), (1 / 2, 1.0))
+
+    def test_evaluate_fold_on_split_files(self):
+        rng = np.random.default_rng(0)
+        rows = [(user, movie, rng.integers(1, 6)) for user in range(1, 21) for movie in range(1, 16) if rng.random() < 0.6]
+        with tempfile.TemporaryDirectory() as directory:
+            for name, part in (('u1.base', rows[::2]), ('u1.test', rows[1::2])):
+                Path(directory, name).write_text(''.join(f'{u}\t{m}\t{r}\t0\n' for u, m, r in part))
+            result = evaluate_fold('baseline', 'u1', data_dir=directory, k=5)
+        self.assertEqual(result['test_ratings'], len(rows[1::2]))
+        self.assertGreater(result['rmse'], 0)
+        self.assertLessEqual(result['mae'], result['rmse'])
+        self.assertTrue(0 <= result['precision@5'] <= 1 and 0 <= result['recall@5'] <= 1)
@@ -0,0 +1,110 @@
+"""Tests for the streaming review and movie exports."""
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reviews import exports
+from reviews.models import Genre, Movie, Review
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x' * 12, is_staff=True)
+        cls.user = User.objects.create_user('member', password='x' * 12)
+        drama, comedy = Genre.objects.create(name='Drama'), Genre.objects.create(name='Comedy')
+        cls.movies = []
+        for index in range(5):
+            movie = Movie.objects.create(title=f'Export Movie {index}', release_year=1990 + index)
+            movie.genres.set([drama, comedy] if index % 2 else [drama])
+            cls.movies.append(movie)
+        for index, movie in enumerate(cls.movies):
+            Review.objects.create(
+                movie=movie, user=cls.user, rating=index % 5 + 1,
+                content=f'Line one, "quoted"\nline two {index}',
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, path, **extra):
+        response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, 200, response.content if not response.streaming else '')
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_reviews_ndjson_matches_api_shape(self):
+        response, body = self.export('/api/export/reviews/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertIn('attachment; filename="reviews-', response['Content-Disposition'])
+
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], sorted(review.id for review in Review.objects.all()))
+        api_row = self.client.get(f"/api/reviews/{rows[0]['id']}/").data
+        self.assertEqual(rows[0], dict(api_row))
+
+    def test_reviews_csv_round_trips(self):
+        response, body = self.export('/api/export/reviews/?format=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['content'], 'Line one, "quoted"\nline two 0')
+
+        _, body = self.export('/api/export/reviews/', HTTP_ACCEPT='text/csv')
+        self.assertTrue(body.startswith(','.join(exports.REVIEW_FIELDS)))
+
+    def test_review_filters(self):
+        def ids(query):
+            _, body = self.export(f'/api/export/reviews/?{query}')
+            return [json.loads(line)['id'] for line in body.splitlines()]
+
+        movie = self.movies[2]
+        self.assertEqual(ids(f'movie={movie.id}'), [movie.reviews.get().id])
+        self.assertEqual(ids('rating=1'), [Review.objects.get(rating=1).id])
+
+        Review.objects.filter(movie=self.movies[0]).update(updated_at=timezone.now() - timedelta(days=10))
+        cutoff = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertEqual(len(ids(f'updated_after={cutoff}'.replace('+', '%2B'))), 4)
+        self.assertEqual(len(ids(f'updated_before={cutoff}'.replace('+', '%2B'))), 1)
+
+        for query in ('rating=9', 'movie=abc', 'updated_after=yesterday'):
+            response = self.client.get(f'/api/export/reviews/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertFalse(response.streaming)
+
+    def test_movies_csv_includes_genres(self):
+        _, body = self.export('/api/export/movies/?format=csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row['title'] for row in rows], [movie.title for movie in self.movies])
+        self.assertEqual(rows[0]['genres'], 'Drama')
+        self.assertEqual(rows[1]['genres'], 'Comedy|Drama')
+
+    def test_movie_queries_are_per_chunk(self):
+        rows = exports.movie_rows(Movie.objects.all(), chunk_size=2)
+        with CaptureQueriesContext(connection) as captured:
+            movies = list(rows)
+        self.assertEqual(len(movies), 5)
+        self.assertEqual(movies[3]['genres'], ['Comedy', 'Drama'])
+        # One cursor over movies plus one genre lookup per chunk of 2
+        self.assertEqual(len(captured), 1 + 3)
+
+    def test_admin_only(self):
+        self.assertEqual(APIClient().get('/api/export/reviews/').status_code, 401)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/export/movies/').status_code, 403)
+        response = client.get('/api/export/movies/?format=csv')
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(response.content.startswith(b'error\r\n'))
@@ -0,0 +1,53 @@
+"""Tests for the request metrics middleware and the /metrics endpoint."""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.metrics import registry
+from reviews.models import Movie
+
+User = get_user_model()
+
+
+@override_settings(DEBUG=False, REVIEWS_METRICS={'TOKEN': 'scrape-token'})
+class RequestMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x' * 12, is_staff=True)
+        cls.user = User.objects.create_user('member', password='x' * 12)
+        Movie.objects.create(title='Metrics Movie', release_year=2000)
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_server_timing_only_for_staff(self):
+        response = self.client.get('/api/movies/', **self.auth(self.staff))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+        self.assertNotIn('Server-Timing', self.client.get('/api/movies/'))
+        self.assertNotIn('Server-Timing', self.client.get('/api/movies/', **self.auth(self.user)))
+
+    def test_requests_are_counted_per_route(self):
+        def count():
+            return registry.counters.get(('movie-list', 'GET', 200), 0)
+
+        before = count()
+        self.client.get('/api/movies/')
+        self.client.get('/api/movies/')
+        self.assertEqual(count(), before + 2)
+
+    def test_metrics_endpoint_access(self):
+        self.client.get('/api/movies/')
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', **self.auth(self.user)).status_code, 403)
+        self.assertEqual(self.client.get('/metrics', **self.auth(self.staff)).status_code, 200)
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE reviews_http_request_duration_seconds histogram', body)
+        self.assertIn(
+            'reviews_http_request_db_queries_bucket{route="movie-list",method="GET",le="+Inf"}', body
+        )
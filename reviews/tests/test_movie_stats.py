@@ -0,0 +1,58 @@
+"""Tests for the denormalized rating aggregates on Movie."""
+from django.core.management import call_command
+from django.test import TestCase
+
+from reviews.management.commands.rebuild_movie_stats import STAT_FIELDS
+from reviews.models import Movie, Review
+from reviews.tests.factories import create_movies, create_users
+
+
+class MovieStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users(3)
+        cls.movie, cls.other = create_movies('Rated', 'Other')
+
+    def stats(self, movie):
+        return Movie.objects.values(*STAT_FIELDS).get(pk=movie.pk)
+
+    def assertStats(self, movie, review_count, rating_sum, histogram):
+        stats = self.stats(movie)
+        self.assertEqual((stats['review_count'], stats['rating_sum']), (review_count, rating_sum))
+        self.assertAlmostEqual(stats['average_rating'], rating_sum / review_count if review_count else 0.0)
+        self.assertEqual([stats[f'rating_{rating}_count'] for rating in range(1, 6)], histogram)
+
+    def test_create_edit_and_delete(self):
+        first = Review.objects.create(movie=self.movie, user=self.users[0], rating=5, content='Great.')
+        Review.objects.create(movie=self.movie, user=self.users[1], rating=2, content='Meh.')
+        self.assertStats(self.movie, 2, 7, [0, 1, 0, 0, 1])
+
+        first.rating = 3
+        first.save()
+        self.assertStats(self.movie, 2, 5, [0, 1, 1, 0, 0])
+
+        # Moving a review to another movie takes it off the first one
+        first.movie = self.other
+        first.save()
+        self.assertStats(self.movie, 1, 2, [0, 1, 0, 0, 0])
+        self.assertStats(self.other, 1, 3, [0, 0, 1, 0, 0])
+
+        Review.objects.filter(movie=self.movie).delete()
+        self.assertStats(self.movie, 0, 0, [0, 0, 0, 0, 0])
+
+    def test_unchanged_save_leaves_the_aggregates(self):
+        review = Review.objects.create(movie=self.movie, user=self.users[0], rating=4, content='Good.')
+        review.content = 'Good, on second thought.'
+        review.save()
+        self.assertStats(self.movie, 1, 4, [0, 0, 0, 1, 0])
+
+    def test_rebuild_matches_the_incremental_aggregates(self):
+        for index, user in enumerate(self.users):
+            Review.objects.create(movie=self.movie, user=user, rating=index + 2, content='Fine.')
+        Review.objects.create(movie=self.other, user=self.users[0], rating=1, content='No.')
+        incremental = [self.stats(movie) for movie in (self.movie, self.other)]
+
+        Movie.objects.update(review_count=0, rating_sum=0, average_rating=0.0, rating_3_count=7)
+        call_command('rebuild_movie_stats', stdout=open('/dev/null', 'w'))
+        self.assertEqual([self.stats(movie) for movie in (self.movie, self.other)], incremental)
@@ -0,0 +1,52 @@
+"""Tests for keyset (cursor) pagination of review listings."""
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from reviews.models import Review
+from reviews.tests.factories import create_movies, create_users, rate
+
+URL = '/api/reviews/'
+
+
+@override_settings(REVIEWS_RESPONSE_CACHE={'ENABLED': False})
+class ReviewCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        movies = create_movies('Paged')
+        rate(create_users(25), movies, [[index % 5 + 1] for index in range(25)])
+        # Ties on created_at must be broken by id, never skipped or repeated
+        cls.written = timezone.now()
+        Review.objects.update(created_at=cls.written)
+
+    def walk(self, url):
+        """Follow `next` from `url`; returns the ids in order and the pages."""
+        ids, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            ids += [row['id'] for row in pages[-1]['results']]
+            url = pages[-1]['next']
+        return ids, pages
+
+    def test_forward_and_back_through_tied_timestamps(self):
+        ids, pages = self.walk(f'{URL}?pagination=cursor')
+        self.assertEqual(ids, sorted(Review.objects.values_list('id', flat=True), reverse=True))
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        back = [self.client.get(page['previous']).json() for page in pages[1:]]
+        self.assertEqual([page['results'] for page in back], [page['results'] for page in pages[:-1]])
+        self.assertIsNone(back[0]['previous'])
+        self.assertEqual(back[0]['next'], pages[0]['next'])
+
+    def test_rating_ordering(self):
+        ids, _ = self.walk(f'{URL}?pagination=cursor&ordering=rating')
+        expected = Review.objects.order_by('rating', 'created_at', 'id').values_list('id', flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_invalid_cursors_and_orderings(self):
+        for cursor in ('bogus', 'eyJ2IjpbMV19', 'eyJ2IjpbIm5vdC1hLWRhdGUiLDFdfQ'):
+            self.assertEqual(self.client.get(f'{URL}?cursor={cursor}').status_code, 404, cursor)
+        self.assertEqual(self.client.get(f'{URL}?pagination=cursor&ordering=content').status_code, 400)
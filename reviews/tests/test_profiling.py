@@ -0,0 +1,122 @@
+"""Tests for the staff-only request profiler."""
+import json
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Movie
+from reviews import profiling
+from reviews.profiling import StackSampler
+
+User = get_user_model()
+
+
+class RequestProfilerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x' * 12, is_staff=True)
+        cls.user = User.objects.create_user('member', password='x' * 12)
+        Movie.objects.create(title='Profiled Movie', release_year=2000)
+
+    def setUp(self):
+        cache.clear()
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(REVIEWS_PROFILER={'DIR': self.directory}))
+
+    def get(self, user=None, **extra):
+        if user:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+        return self.client.get('/api/movies/', **extra)
+
+    def test_staff_request_is_profiled(self):
+        response = self.get(self.staff, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        capture = self.directory / response['X-Profile']
+
+        stats = pstats.Stats(str(capture.with_suffix('.prof'))).stats
+        self.assertTrue(stats)
+        stacks = capture.with_suffix('.collapsed').read_text().splitlines()
+        for line in stacks:
+            stack, samples = line.rsplit(' ', 1)
+            self.assertGreater(int(samples), 0)
+
+        summary = json.loads(capture.with_suffix('.json').read_text())
+        self.assertEqual(summary['path'], '/api/movies/')
+        self.assertEqual(summary['user'], 'staff')
+        self.assertGreater(summary['query_count'], 0)
+        self.assertEqual(len(summary['queries']), summary['query_count'])
+        self.assertIn('reviews_movie', ' '.join(query['sql'] for query in summary['queries']))
+        self.assertFalse(any('params' in query for query in summary['queries']))
+
+    def test_params_are_opt_in(self):
+        with override_settings(REVIEWS_PROFILER={'DIR': self.directory, 'RECORD_PARAMS': True}):
+            response = self.get(self.staff, HTTP_X_PROFILE='1')
+        summary = json.loads((self.directory / f"{response['X-Profile']}.json").read_text())
+        self.assertTrue(all('params' in query for query in summary['queries']))
+
+    def test_one_capture_at_a_time(self):
+        with profiling.capture_lock:
+            response = self.get(self.staff, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Profile'], 'skipped; reason=busy')
+        self.assertEqual(list(self.directory.iterdir()), [])
+        self.assertTrue((self.directory / f"{self.get(self.staff, HTTP_X_PROFILE='1')['X-Profile']}.prof").exists())
+
+    def test_query_flag(self):
+        response = self.client.get(
+            '/api/movies/?_profile=1',
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.staff)}',
+        )
+        self.assertTrue((self.directory / f"{response['X-Profile']}.prof").exists())
+
+    def test_flag_ignored_without_staff_jwt(self):
+        for user in (None, self.user):
+            response = self.get(user, HTTP_X_PROFILE='1')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Profile', response)
+        response = self.get(HTTP_X_PROFILE='1', HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_rate_limit_and_retention(self):
+        config = {'DIR': self.directory, 'USER_RATE': (3, 3600), 'MAX_CAPTURES': 2}
+        with override_settings(REVIEWS_PROFILER=config):
+            headers = [self.get(self.staff, HTTP_X_PROFILE='1')['X-Profile'] for _ in range(4)]
+        self.assertEqual(headers[3], 'skipped; reason=user-rate-limited')
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 2)
+
+    def test_sampling(self):
+        with override_settings(REVIEWS_PROFILER={'DIR': self.directory, 'SAMPLE_RATE': 0}):
+            response = self.get(self.staff, HTTP_X_PROFILE='1')
+        self.assertEqual(response['X-Profile'], 'skipped; reason=not-sampled')
+
+
+class StackSamplerTests(TestCase):
+
+    def test_samples_thread_below_root(self):
+        def slow_leaf():
+            time.sleep(0.05)
+
+        def handler():
+            slow_leaf()
+
+        sampler = StackSampler(threading.get_ident(), sys._getframe(), interval=0.001)
+        sampler.start()
+        handler()
+        sampler.stop()
+
+        leaf = max(sampler.stacks, key=sampler.stacks.get)
+        frames = leaf.split(';')
+        self.assertEqual(len(frames), 2)
+        self.assertTrue(frames[0].startswith('StackSamplerTests.test_samples_thread_below_root.<locals>.handler ('))
+        self.assertIn('slow_leaf (', frames[1])
+        self.assertIn('test_profiling.py:', frames[1])
@@ -0,0 +1,147 @@
+"""Tests for the top-rated leaderboards (reviews.rankings, /api/movies/top/)."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from reviews.imports import import_movies
+from reviews.models import Genre, Movie, MovieRanking, RankingBuild, Review
+from reviews.rankings import OVERALL, bayesian_score, genre_scope, rebuild_rankings, year_scope
+
+User = get_user_model()
+URL = '/api/movies/top/'
+
+
+class RankingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.drama = Genre.objects.create(name='Drama')
+        cls.comedy = Genre.objects.create(name='Comedy')
+        cls.users = [User.objects.create_user(f'critic{index}', password='x' * 12) for index in range(20)]
+        # A few glowing reviews against many almost as good ones
+        cls.niche = Movie.objects.create(title='Niche', release_year=2001)
+        cls.classic = Movie.objects.create(title='Classic', release_year=1994)
+        cls.flop = Movie.objects.create(title='Flop', release_year=2001)
+        cls.unseen = Movie.objects.create(title='Unseen', release_year=2001)
+        cls.niche.genres.set([cls.drama])
+        cls.classic.genres.set([cls.drama, cls.comedy])
+        for user in cls.users[:2]:
+            Review.objects.create(movie=cls.niche, user=user, rating=5, content='Perfect.')
+        for index, user in enumerate(cls.users):
+            Review.objects.create(movie=cls.classic, user=user, rating=5 if index % 2 else 4, content='Great.')
+        for user in cls.users[:10]:
+            Review.objects.create(movie=cls.flop, user=user, rating=1, content='Awful.')
+        cls.build = rebuild_rankings()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def top(self, query=''):
+        response = self.client.get(f'{URL}{query}')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def ids(self, response):
+        return [row['id'] for row in response.data['results']]
+
+    def test_bayesian_average_outranks_a_few_perfect_reviews(self):
+        response = self.top()
+        self.assertEqual(self.ids(response), [self.classic.pk, self.niche.pk, self.flop.pk])
+        first = response.data['results'][0]
+        self.assertEqual(first['rank'], 1)
+        self.assertEqual(first['review_count'], 20)
+        self.assertEqual(first['average_rating'], 4.5)
+        self.assertAlmostEqual(first['score'], bayesian_score(90, 20, self.build.prior_mean, self.build.prior_weight))
+
+        # The prior is the mean rating, weighted by the mean review count
+        self.assertAlmostEqual(self.build.prior_mean, (10 + 90 + 10) / 32)
+        self.assertAlmostEqual(self.build.prior_weight, 32 / 3)
+
+    def test_min_reviews(self):
+        self.assertEqual(self.ids(self.top('?min_reviews=5')), [self.classic.pk, self.flop.pk])
+        self.assertEqual(len(self.top('?min_reviews=0').data['results']), 4)
+        response = self.client.get(f'{URL}?min_reviews=many')
+        self.assertEqual(response.status_code, 400)
+
+    def test_genre_and_year_leaderboards(self):
+        self.assertEqual(self.ids(self.top('?genre=drama')), [self.classic.pk, self.niche.pk])
+        self.assertEqual(self.ids(self.top('?year=2001')), [self.niche.pk, self.flop.pk])
+        self.assertEqual(self.client.get(f'{URL}?genre=Western').status_code, 404)
+        self.assertEqual(self.client.get(f'{URL}?genre=Drama&year=2001').status_code, 400)
+
+    def test_review_writes_rescore_incrementally(self):
+        self.client.force_authenticate(self.users[5])
+        response = self.client.post('/api/reviews/', {'movie_id': self.niche.pk, 'rating': 1, 'content': 'Overrated.'})
+        self.assertEqual(response.status_code, 201)
+        expected = bayesian_score(11, 3, self.build.prior_mean, self.build.prior_weight)
+        for scope in (OVERALL, genre_scope(self.drama.pk), year_scope(2001)):
+            ranking = MovieRanking.objects.get(scope=scope, movie=self.niche)
+            self.assertEqual(ranking.review_count, 3)
+            self.assertAlmostEqual(ranking.score, expected)
+
+        review = Review.objects.get(movie=self.niche, user=self.users[5])
+        self.client.delete(f'/api/reviews/{review.pk}/')
+        ranking = MovieRanking.objects.get(scope=OVERALL, movie=self.niche)
+        self.assertAlmostEqual(ranking.score, bayesian_score(10, 2, self.build.prior_mean, self.build.prior_weight))
+        # Rescoring kept the prior of the build
+        self.assertEqual(RankingBuild.objects.first(), self.build)
+
+    def test_movie_changes_move_it_between_leaderboards(self):
+        niche = Movie.objects.get(pk=self.niche.pk)
+        niche.release_year = 1994
+        niche.save()
+        niche.genres.set([self.comedy])
+        self.assertEqual(self.ids(self.top('?year=1994')), [self.classic.pk, self.niche.pk])
+        self.assertEqual(self.ids(self.top('?genre=Comedy')), [self.classic.pk, self.niche.pk])
+        self.assertEqual(self.ids(self.top('?genre=Drama')), [self.classic.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.comedy.movies.clear()
+        self.assertEqual(self.ids(self.top('?genre=Comedy')), [])
+
+        self.classic.delete()
+        self.assertFalse(MovieRanking.objects.filter(movie_id=self.classic.pk).exists())
+
+    def test_bulk_writes_are_ranked(self):
+        movie = Movie.objects.create(title='Batch')
+        MovieRanking.objects.filter(movie=movie).delete()
+        self.client.force_authenticate(self.users[0])
+        items = [{'movie_id': movie.pk, 'rating': 5, 'content': 'Yes.'}]
+        self.assertEqual(self.client.post('/api/reviews/batch/', items, format='json').status_code, 201)
+        self.assertEqual(MovieRanking.objects.get(scope=OVERALL, movie=movie).review_count, 1)
+
+        import_movies(['external_id,title,release_year,genres\n', 'cat:1,Imported,1994,Drama\n'], 'csv')
+        imported = Movie.objects.get(external_id='cat:1')
+        self.assertEqual(
+            set(MovieRanking.objects.filter(movie=imported).values_list('scope', flat=True)),
+            {OVERALL, year_scope(1994), genre_scope(self.drama.pk)},
+        )
+
+    def test_cursor_pages_continue_the_ranks(self):
+        movies = Movie.objects.bulk_create([Movie(title=f'Filler {index}', release_year=1980) for index in range(22)])
+        Review.objects.bulk_create([
+            Review(movie=movie, user=self.users[0], rating=1 + index % 5, content='Filler.')
+            for index, movie in enumerate(movies)
+        ])
+        call_command('rebuild_movie_stats', stdout=open('/dev/null', 'w'))
+        call_command('rebuild_rankings', stdout=open('/dev/null', 'w'))
+
+        numbered = []
+        for page in (1, 2, 3):
+            numbered += [(row['rank'], row['id']) for row in self.top(f'?page={page}').data['results']]
+        self.assertEqual([rank for rank, _ in numbered], list(range(1, 26)))
+
+        walked, pages, url = [], [], f'{URL}?pagination=cursor'
+        while url:
+            response = self.client.get(url)
+            pages.append(response.data)
+            walked += [(row['rank'], row['id']) for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(walked, numbered)
+
+        back = self.client.get(pages[-1]['previous']).data
+        self.assertEqual(back['results'], pages[1]['results'])
+        self.assertEqual(self.client.get(f'{URL}?cursor=bogus').status_code, 404)
@@ -0,0 +1,66 @@
+"""Tests for the matrix factorization recommender (reviews.recommendations)."""
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from reviews import recommendations
+from reviews.models import Review
+from reviews.tests.factories import create_movies, create_users, rate
+
+
+class RecommenderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.movies = create_movies(*'ABCDEFGH')
+        *cls.users, cls.newcomer = create_users(6)
+        # Every user skips a third of the catalog; the newcomer rates nothing
+        rate(cls.users, cls.movies, [
+            [1 + (user * 2 + movie) % 5 if (user + movie) % 3 else None for movie in range(8)]
+            for user in range(5)
+        ])
+
+    def setUp(self):
+        model_dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(REVIEWS_RECOMMENDER={'MODEL_DIR': model_dir}))
+        recommendations._loaded.clear()
+        self.client = APIClient()
+
+    def train(self):
+        arrays, meta = recommendations.train(factors=4, iterations=5)
+        recommendations.save(arrays, meta)
+        return recommendations.get_model()
+
+    def seen(self, user):
+        return set(Review.objects.filter(user=user).values_list('movie_id', flat=True))
+
+    def test_recommend_skips_seen_movies(self):
+        model = self.train()
+        for user in self.users:
+            seen = self.seen(user)
+            ranked = model.recommend(user.pk, exclude_movie_ids=seen, count=len(self.movies))
+            self.assertEqual({movie_id for movie_id, _ in ranked}, {movie.pk for movie in self.movies} - seen)
+            scores = [rating for _, rating in ranked]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+            self.assertTrue(all(1.0 <= rating <= 5.0 for rating in scores))
+
+    def test_unknown_users_get_the_best_movies_by_bias(self):
+        model = self.train()
+        ranked = model.recommend(self.newcomer.pk, count=3)
+        best = sorted(zip(model.item_bias, model.item_ids), reverse=True)[:3]
+        self.assertEqual([movie_id for movie_id, _ in ranked], [int(movie_id) for _, movie_id in best])
+
+    def test_endpoint(self):
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.get('/api/users/me/recommendations/').status_code, 503)
+
+        self.train()
+        response = self.client.get('/api/users/me/recommendations/?limit=100')
+        self.assertEqual(response.status_code, 200)
+        ids = [row['id'] for row in response.data]
+        self.assertTrue(ids)
+        self.assertFalse(set(ids) & self.seen(self.users[0]))
+        self.assertEqual(self.client.get('/api/users/me/recommendations/?limit=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/users/999999/recommendations/').status_code, 404)
@@ -0,0 +1,110 @@
+"""Tests for batch review creation (POST /api/reviews/batch/)."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.models import Movie, Review
+
+User = get_user_model()
+URL = '/api/reviews/batch/'
+
+
+class ReviewBatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('importer', password='x' * 12)
+        cls.other = User.objects.create_user('other', password='x' * 12)
+        cls.movies = [
+            Movie.objects.create(title=f'Batch Movie {index}', release_year=2000 + index)
+            for index in range(30)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def items(self, movies, rating=4):
+        return [{'movie_id': movie.id, 'rating': rating, 'content': 'Imported.'} for movie in movies]
+
+    def test_creates_every_review_and_updates_movie_stats(self):
+        response = self.client.post(URL, self.items(self.movies[:5]), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']], ['created'] * 5
+        )
+        self.assertEqual(Review.objects.filter(user=self.user).count(), 5)
+
+        movie = Movie.objects.get(pk=self.movies[0].pk)
+        self.assertEqual(movie.review_count, 1)
+        self.assertEqual(movie.rating_sum, 4)
+        self.assertEqual(movie.average_rating, 4.0)
+        self.assertEqual(movie.rating_4_count, 1)
+
+    def test_stats_match_single_creates(self):
+        movie = self.movies[0]
+        other = APIClient()
+        other.force_authenticate(self.other)
+        other.post('/api/reviews/', {'movie_id': movie.id, 'rating': 1, 'content': 'Meh.'})
+
+        self.client.post(URL, self.items([movie], rating=5), format='json')
+        movie.refresh_from_db()
+        self.assertEqual(
+            (movie.review_count, movie.rating_sum, movie.average_rating,
+             movie.rating_1_count, movie.rating_5_count),
+            (2, 6, 3.0, 1, 1),
+        )
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        def queries(movies):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post(URL, self.items(movies), format='json')
+            self.assertEqual(response.status_code, 201)
+            return len(captured)
+
+        self.assertEqual(queries(self.movies[:2]), queries(self.movies[2:30]))
+
+    def test_partial_success(self):
+        Review.objects.create(movie=self.movies[1], user=self.user, rating=3, content='Seen it.')
+        items = self.items(self.movies[:3]) + [
+            {'movie_id': self.movies[0].id, 'rating': 2, 'content': 'Again.'},
+            {'movie_id': 999999, 'rating': 2, 'content': 'Missing.'},
+            {'movie_id': self.movies[3].id, 'rating': 9, 'content': 'Too high.'},
+            'not an object',
+        ]
+        response = self.client.post(URL, items, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 5))
+
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], list(range(7)))
+        self.assertEqual(results[0]['status'], 'created')
+        self.assertEqual(results[1]['errors'], {'movie': ['You have already reviewed this movie.']})
+        self.assertEqual(results[2]['status'], 'created')
+        self.assertIn('more than once', results[3]['errors']['movie'][0])
+        self.assertIn('movie_id', results[4]['errors'])
+        self.assertEqual(results[5]['errors']['rating'], ['Rating must be between 1 and 5.'])
+        self.assertIn('non_field_errors', results[6]['errors'])
+        self.assertEqual(Review.objects.filter(user=self.user).count(), 3)
+
+    def test_rejects_invalid_batches(self):
+        self.assertEqual(self.client.post(URL, [], format='json').status_code, 400)
+        self.assertEqual(self.client.post(URL, {'movie_id': 1}, format='json').status_code, 400)
+        too_many = [{'movie_id': 1, 'rating': 1, 'content': 'x'}] * 101
+        self.assertEqual(self.client.post(URL, too_many, format='json').status_code, 400)
+        self.assertFalse(Review.objects.exists())
+
+    def test_requires_authentication(self):
+        response = APIClient().post(URL, self.items(self.movies[:1]), format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_expires_cached_listings(self):
+        self.assertEqual(self.client.get('/api/reviews/').data['count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(URL, self.items(self.movies[:2]), format='json')
+        self.assertEqual(self.client.get('/api/reviews/').data['count'], 2)
@@ -0,0 +1,161 @@
+"""Tests for refresh token revocation (reviews.revocation)."""
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from reviews.checks import check_revocation_cache
+from reviews.revocation import BloomFilter, RevocationStore, RevokedTokens, get_config, get_store
+
+User = get_user_model()
+URL = '/api/auth/token/refresh/'
+
+
+class RevokedTokensTests(SimpleTestCase):
+
+    def test_evicts_in_expiry_order(self):
+        tokens = RevokedTokens()
+        now = time.time()
+        tokens.add('late', now + 100)
+        tokens.add('early', now + 10)
+        tokens.add('gone', now - 1)
+        self.assertNotIn('gone', tokens)
+        self.assertIn('early', tokens)
+
+        self.assertEqual(tokens.evict(now), 1)
+        self.assertEqual(tokens.evict(now + 50), 1)
+        self.assertEqual(dict(tokens.items()), {'late': now + 100})
+
+    def test_later_expiry_supersedes(self):
+        tokens = RevokedTokens()
+        now = time.time()
+        tokens.add('jti', now + 10)
+        tokens.add('jti', now + 100)
+        self.assertEqual(tokens.evict(now + 50), 0)
+        self.assertIn('jti', tokens)
+
+    def test_bloom_front_is_rebuilt_after_eviction(self):
+        tokens = RevokedTokens(bloom_capacity=100, bloom_error_rate=0.01)
+        now = time.time()
+        for index in range(50):
+            tokens.add(f'old-{index}', now + 1)
+        tokens.add('kept', now + 100)
+        tokens.evict(now + 10)
+        self.assertEqual(len(tokens), 1)
+        self.assertIn('kept', tokens)
+        self.assertNotIn('old-0', tokens._bloom)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for index in range(1000):
+            bloom.add(f'in-{index}')
+        self.assertTrue(all(f'in-{index}' in bloom for index in range(1000)))
+        false_positives = sum(f'out-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RevocationStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.config = {**get_config(), 'PATH': Path(self.directory.name) / 'revoked.json'}
+
+    def test_shared_through_the_cache(self):
+        first, second = RevocationStore(self.config), RevocationStore(self.config)
+        expires = time.time() + 60
+        self.assertTrue(first.claim('jti', expires))
+        self.assertFalse(second.claim('jti', expires))
+        second.revoke('other', expires)
+        self.assertTrue(first.is_revoked('other'))
+        self.assertFalse(first.is_revoked('unknown'))
+
+    def test_saved_to_file_and_loaded_on_start(self):
+        store = RevocationStore(self.config)
+        store.revoke('kept', time.time() + 60)
+        store.tokens.add('expired', time.time() - 1)
+        store.flush()
+        self.assertEqual(list(json.loads(self.config['PATH'].read_text())), ['kept'])
+
+        cache.clear()
+        restarted = RevocationStore(self.config)
+        self.assertTrue(restarted.is_revoked('kept'))
+        self.assertFalse(restarted.claim('kept', time.time() + 60))
+
+    def test_saves_after_the_interval(self):
+        store = RevocationStore({**self.config, 'SAVE_INTERVAL': 0})
+        store.revoke('jti', time.time() + 60)
+        self.assertIn('jti', json.loads(self.config['PATH'].read_text()))
+
+
+@override_settings(REVIEWS_REVOCATION={'PATH': None})
+class ReplayProtectionCheckTests(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_warns_when_the_cache_is_per_process(self):
+        self.assertEqual([error.id for error in check_revocation_cache(None)], ['reviews.W001'])
+        without_rotation = {**settings.SIMPLE_JWT, 'ROTATE_REFRESH_TOKENS': False}
+        with self.settings(SIMPLE_JWT=without_rotation):
+            self.assertEqual(check_revocation_cache(None), [])
+
+    def test_shared_cache_passes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shared = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+            }}
+            with self.settings(CACHES=shared):
+                self.assertEqual(check_revocation_cache(None), [])
+
+
+class TokenRefreshTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='x' * 12)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(URL, {'refresh': str(token)}, format='json')
+
+    def test_rotated_tokens_are_revoked(self):
+        token = RefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'access', 'refresh'})
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_refresh_does_not_query_the_database(self):
+        self.refresh(RefreshToken.for_user(self.user))
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.refresh(RefreshToken.for_user(self.user)).status_code, 200)
+        self.assertEqual(len(captured), 0)
+
+    def test_inactive_users_cannot_refresh(self):
+        token = RefreshToken.for_user(self.user)
+        self.user.is_active = False
+        self.user.save()
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['error']['details']['code'], 'no_active_account')
+
+    def test_revoked_tokens_are_refused_without_rotation(self):
+        token = RefreshToken.for_user(self.user)
+        get_store().revoke(token['jti'], token['exp'])
+        with self.settings(SIMPLE_JWT={**settings.SIMPLE_JWT, 'ROTATE_REFRESH_TOKENS': False}):
+            self.assertEqual(self.refresh(token).status_code, 401)
+            self.assertEqual(self.refresh(RefreshToken.for_user(self.user)).status_code, 200)
@@ -0,0 +1,52 @@
+"""Tests for the full-text search index (reviews.search) behind ?search=."""
+from django.test import TestCase, override_settings
+
+from reviews.models import Movie, Review
+from reviews.search import filter_movie_title
+from reviews.tests.factories import create_users
+
+
+@override_settings(REVIEWS_RESPONSE_CACHE={'ENABLED': False})
+class SearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, = create_users(1)
+        cls.movie = Movie.objects.create(title='Harbor Story', description='Fishing boats at dawn.')
+        cls.other = Movie.objects.create(title='Quiet Shore', description='A lighthouse keeper.')
+        cls.review = Review.objects.create(movie=cls.movie, user=cls.user, rating=4, content='Salty and warm.')
+
+    def movie_ids(self, query):
+        response = self.client.get('/api/movies/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def review_ids(self, query):
+        response = self.client.get('/api/reviews/', {'search': query})
+        return [row['id'] for row in response.json()['results']]
+
+    def test_matches_every_term_by_prefix(self):
+        self.assertEqual(self.movie_ids('harb'), [self.movie.pk])
+        self.assertEqual(self.movie_ids('lighthouse keep'), [self.other.pk])
+        self.assertEqual(self.movie_ids('harbor lighthouse'), [])
+        # Quotes and operators are searched for as words, not FTS syntax
+        self.assertEqual(self.movie_ids('"harbor" OR *'), [])
+
+    def test_title_updates_and_deletes_reach_the_index(self):
+        movie = Movie.objects.get(pk=self.movie.pk)
+        movie.title = 'Stormy Bay'
+        movie.save()
+        self.assertEqual(self.movie_ids('harbor'), [])
+        self.assertEqual(self.movie_ids('stormy'), [movie.pk])
+        self.assertEqual(list(filter_movie_title(Review.objects.all(), 'bay')), [self.review])
+        self.assertEqual(list(filter_movie_title(Review.objects.all(), 'harbor')), [])
+
+        movie.delete()
+        self.assertEqual(self.movie_ids('stormy'), [])
+        self.assertEqual(self.review_ids('salty'), [])
+
+    def test_review_content_edits_reach_the_index(self):
+        self.assertEqual(self.review_ids('salty'), [self.review.pk])
+        Review.objects.filter(pk=self.review.pk).update(content='Bland.')
+        self.assertEqual(self.review_ids('salty'), [])
+        self.assertEqual(self.review_ids('bland'), [self.review.pk])
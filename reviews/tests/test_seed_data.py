@@ -0,0 +1,119 @@
+"""Tests for the seed_data command against a small MovieLens-format fixture."""
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import TestCase
+
+from reviews.management.commands.seed_data import DEMO_PASSWORD, Command
+from reviews.models import Movie, MovieRanking, Review, TrendingMovie
+
+User = get_user_model()
+
+FIXTURE = {
+    'u.genre': 'Action|0\nComedy|1\nDrama|2\n',
+    'u.item': (
+        '1|Harbor Lights (1995)|01-Jan-1995||http://example.com|1|0|1\n'
+        '2|Paper Moons (1997)|01-Jan-1997||http://example.com|0|1|0\n'
+        '3|Night Train (2001)|01-Jan-2001||http://example.com|0|0|1\n'
+        '4||01-Jan-1990||http://example.com|0|0|1\n'
+    ),
+    'u.user': (
+        '1|24|M|technician|85711\n'
+        '2|53|F|other|94043\n'
+        '3|23|M|writer|32067\n'
+        '4|33\n'
+    ),
+    'u.data': (
+        '1\t1\t5\t881250949\n'
+        '1\t2\t3\t881250949\n'
+        '2\t1\t4\t881250949\n'
+        '2\t3\t2\t881250949\n'
+        '3\t2\t1\t881250949\n'
+        '3\t3\t9\t881250949\n'  # rating out of range
+        'x\t1\t3\t881250949\n'  # malformed
+        '1\t9\t4\t881250949\n'  # unknown movie
+    ),
+}
+
+
+class SeedDataTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        for name, content in FIXTURE.items():
+            (self.directory / name).write_text(content, encoding='latin-1')
+
+    def seed(self, *args, fast_passwords=True):
+        if fast_passwords:
+            args = ('--fast-passwords', *args)
+        out = StringIO()
+        call_command('seed_data', '--data-dir', str(self.directory), *args, stdout=out)
+        return out.getvalue()
+
+    def test_seeds_the_fixture(self):
+        output = self.seed()
+        self.assertIn('Movies: 3 created, 0 updated', output)
+        self.assertIn('Users: 3 created', output)
+        self.assertIn('Reviews: 5 created, 3 skipped', output)
+        self.assertEqual((Movie.objects.count(), User.objects.count(), Review.objects.count()), (3, 3, 5))
+        self.assertEqual(
+            sorted(Movie.objects.get(title='Harbor Lights (1995)').genres.values_list('name', flat=True)),
+            ['Action', 'Drama'],
+        )
+
+        # Bad lines are reported by line number and skipped
+        self.assertIn('Error processing movie line 4: missing title', output)
+        self.assertIn('Error processing user line 4', output)
+        self.assertIn('Error processing review line 7', output)
+
+    def test_fast_passwords_share_one_hash(self):
+        self.seed('--users', '3')
+        self.assertEqual(len(set(User.objects.values_list('password', flat=True))), 1)
+        for username in User.objects.values_list('username', flat=True):
+            self.assertIsNotNone(authenticate(username=username, password=DEMO_PASSWORD))
+
+    def test_passwords_are_salted_per_user_by_default(self):
+        self.seed('--users', '3', fast_passwords=False)
+        self.assertEqual(len(set(User.objects.values_list('password', flat=True))), 3)
+        self.assertIsNotNone(authenticate(username='user_1', password=DEMO_PASSWORD))
+
+    def test_rerun_is_idempotent(self):
+        self.seed()
+        output = self.seed()
+        self.assertIn('Movies: 0 created, 3 updated', output)
+        self.assertIn('Users: 0 created', output)
+        self.assertIn('Reviews: 0 created, 8 skipped', output)
+        self.assertEqual((Movie.objects.count(), User.objects.count(), Review.objects.count()), (3, 3, 5))
+
+    def test_derived_data_is_rebuilt(self):
+        self.seed()
+        # bulk_create skips the signals, so the command rebuilds these itself
+        for movie in Movie.objects.annotate(reviews_total=Count('reviews'), ratings_total=Sum('reviews__rating')):
+            self.assertEqual(movie.review_count, movie.reviews_total)
+            self.assertEqual(movie.rating_sum, movie.ratings_total or 0)
+        self.assertEqual(Movie.objects.get(title='Harbor Lights (1995)').average_rating, 4.5)
+        self.assertEqual(
+            set(MovieRanking.objects.values_list('movie__title', flat=True)),
+            set(Movie.objects.values_list('title', flat=True)),
+        )
+        self.assertEqual(
+            set(TrendingMovie.objects.values_list('movie__title', flat=True)),
+            set(Movie.objects.values_list('title', flat=True)),
+        )
+
+    def test_rejected_batches_are_retried_row_by_row(self):
+        User.objects.create(username='taken')
+        command = Command(stdout=StringIO())
+        command.batch_size = 100
+        written = command.bulk_create_lines(
+            User, [(1, User(username='fresh')), (2, User(username='taken'))], 'user',
+        )
+        self.assertEqual([user.username for user in written], ['fresh'])
+        self.assertTrue(User.objects.filter(username='fresh').exists())
+        self.assertIn('Error processing user line 2', command.stdout.getvalue())
@@ -0,0 +1,46 @@
+"""Tests for the values()-based review read path (ReviewRowSerializer)."""
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from reviews.models import Review
+from reviews.serializers import ReviewRowSerializer, ReviewSerializer
+from reviews.tests.factories import create_movies
+
+User = get_user_model()
+
+
+class ReviewRowSerializerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        dated, = create_movies('Dated', release_year=1994)
+        undated, = create_movies('Ünïcode “Title”')
+        users = [User.objects.create(username=name) for name in ('critic', 'zoë')]
+        Review.objects.create(movie=dated, user=users[0], rating=5, content='Line one.\nLine "two".')
+        Review.objects.create(movie=undated, user=users[1], rating=1, content='')
+        Review.objects.create(movie=undated, user=users[0], rating=3, content='😀 ' * 50)
+        # One timestamp without microseconds, one with
+        Review.objects.filter(user=users[1]).update(created_at=datetime(2024, 2, 29, 23, 59, 59, tzinfo=dt_timezone.utc))
+        Review.objects.filter(rating=3).update(updated_at=datetime(2024, 3, 1, 0, 0, 0, 123456, tzinfo=dt_timezone.utc))
+
+    def render_both(self):
+        queryset = Review.objects.select_related('movie', 'user').order_by('id')
+        fast = ReviewRowSerializer.serialize(ReviewRowSerializer.prepare(queryset))
+        slow = ReviewSerializer(queryset, many=True).data
+        return JSONRenderer().render(fast), JSONRenderer().render(slow)
+
+    def test_output_matches_review_serializer(self):
+        fast, slow = self.render_both()
+        self.assertEqual(fast, slow)
+
+    def test_output_matches_in_another_timezone_and_format(self):
+        with timezone.override('America/Sao_Paulo'):
+            fast, slow = self.render_both()
+        self.assertEqual(fast, slow)
+        with override_settings(REST_FRAMEWORK={'DATETIME_FORMAT': '%Y-%m-%d %H:%M'}):
+            fast, slow = self.render_both()
+        self.assertEqual(fast, slow)
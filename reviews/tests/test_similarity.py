@@ -0,0 +1,62 @@
+"""Tests for the item-item similar movies (reviews.similarity, /api/movies/{id}/similar/)."""
+from django.core.cache import cache
+from django.test import TestCase
+
+from reviews.models import MovieSimilarity, Review
+from reviews.similarity import build_similarities
+from reviews.tests.factories import create_movies, create_users, rate
+
+# user -> ratings of (twin_a, twin_b, opposite, loner)
+RATINGS = [
+    (5, 5, 1, None),
+    (4, 4, 2, None),
+    (1, 1, 5, None),
+    (2, 2, 4, 3),
+]
+
+
+class SimilarityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.movies = create_movies('Twin A', 'Twin B', 'Opposite', 'Loner')
+        rate(create_users(len(RATINGS)), cls.movies, RATINGS)
+
+    def setUp(self):
+        cache.clear()
+
+    def neighbors(self, movie):
+        return list(MovieSimilarity.objects.filter(movie=movie).order_by('rank').values_list('similar_movie_id', flat=True))
+
+    def test_neighbor_lists_exclude_the_movie_itself(self):
+        self.assertEqual(build_similarities(shrinkage=0), len(self.movies))
+        twin_a, twin_b, opposite, loner = self.movies
+        for movie in self.movies:
+            self.assertNotIn(movie.pk, self.neighbors(movie))
+        self.assertEqual(self.neighbors(twin_a)[0], twin_b.pk)
+        # Only positive similarities are kept
+        self.assertNotIn(opposite.pk, self.neighbors(twin_a))
+        self.assertNotIn(twin_a.pk, self.neighbors(opposite))
+        self.assertAlmostEqual(MovieSimilarity.objects.get(movie=twin_a, similar_movie=twin_b).score, 1.0)
+        self.assertEqual(
+            list(MovieSimilarity.objects.filter(movie=twin_a).values_list('rank', flat=True)),
+            list(range(1, len(self.neighbors(twin_a)) + 1)),
+        )
+
+    def test_incremental_build_replaces_only_the_given_movies(self):
+        build_similarities()
+        twin_a, twin_b = self.movies[:2]
+        before = self.neighbors(twin_b)
+        Review.objects.filter(movie=twin_a).delete()
+        self.assertEqual(build_similarities(movie_ids=[twin_a.pk]), 0)
+        self.assertEqual(self.neighbors(twin_a), [])
+        self.assertEqual(self.neighbors(twin_b), before)
+
+    def test_endpoint(self):
+        build_similarities(shrinkage=0)
+        twin_a, twin_b = self.movies[:2]
+        response = self.client.get(f'/api/movies/{twin_a.pk}/similar/?limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()], [twin_b.pk])
+        self.assertEqual(self.client.get('/api/movies/999999/similar/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/movies/{twin_a.pk}/similar/?limit=0').status_code, 400)
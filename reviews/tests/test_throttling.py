@@ -0,0 +1,94 @@
+"""Tests for the sliding-window rate limits (reviews.throttling)."""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from reviews.models import Movie
+from reviews.serializers import UserSerializer
+
+User = get_user_model()
+RATES = {'user_register': '2/min', 'review-create': '2/min', 'movie-import': '2/hour'}
+
+
+@override_settings(REVIEWS_THROTTLE={'RATES': RATES})
+class ThrottleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'reader{index}', password='x' * 12) for index in range(2)]
+        cls.movies = [Movie.objects.create(title=f'Movie {index}') for index in range(6)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def register(self, index, **extra):
+        return self.client.post('/api/auth/register/', {
+            'username': f'new{index}', 'email': f'new{index}@example.com',
+            'password': 'x' * 12, 'password_confirm': 'x' * 12,
+        }, format='json', **extra)
+
+    def review(self, user, movie):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/reviews/', {'movie_id': movie.pk, 'rating': 4, 'content': 'Fine.'}, format='json')
+
+    def test_over_limit_requests_are_rejected_before_the_serializer(self):
+        self.assertEqual([self.register(index).status_code for index in range(2)], [201, 201])
+        with mock.patch.object(UserSerializer, 'is_valid') as is_valid:
+            response = self.register(2)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        is_valid.assert_not_called()
+        self.assertFalse(User.objects.filter(username='new2').exists())
+
+        # Another client IP has its own counter
+        self.assertEqual(self.register(3, REMOTE_ADDR='10.0.0.9').status_code, 201)
+
+    def test_limits_are_per_user_and_per_action(self):
+        first, second = self.users
+        self.assertEqual([self.review(first, movie).status_code for movie in self.movies[:3]], [201, 201, 429])
+        self.assertEqual(self.review(second, self.movies[3]).status_code, 201)
+        # Reads and other actions are not limited
+        self.assertEqual(self.client.get('/api/reviews/').status_code, 200)
+
+    def test_catalog_import_has_its_own_scope(self):
+        admin = User.objects.create_user('admin', password='x' * 12, is_staff=True)
+        self.client.force_authenticate(admin)
+        statuses = [
+            self.client.post('/api/movies/import/', {
+                'file': SimpleUploadedFile('catalog.csv', f'external_id,title\ncat:{index},Imported {index}\n'.encode()),
+            }, format='multipart').status_code
+            for index in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    @mock.patch('reviews.throttling.time.time', return_value=6000.0)
+    def test_each_check_counts_in_the_shared_cache(self, now):
+        backend = caches['default']
+        self.register(0)
+        with mock.patch.object(backend, 'incr', wraps=backend.incr) as incr, \
+                mock.patch.object(backend, 'get', wraps=backend.get) as get:
+            self.register(1)
+        # The previous window is read every time, never remembered per process
+        self.assertEqual((incr.call_count, get.call_count), (1, 1))
+
+    def test_previous_window_is_weighted_by_its_overlap(self):
+        with mock.patch('reviews.throttling.time.time', return_value=6000.0):
+            self.assertEqual([self.register(index).status_code for index in range(3)], [201, 201, 429])
+        # A quarter into the next minute, 3 * 0.75 of the previous window still counts
+        with mock.patch('reviews.throttling.time.time', return_value=6075.0):
+            response = self.register(3)
+        self.assertEqual(response.status_code, 429)
+        # 3.25 counted, so 2.25 must decay at 3 per minute before one more fits
+        self.assertEqual(response['Retry-After'], '45')
+        with mock.patch('reviews.throttling.time.time', return_value=6120.0):
+            self.assertEqual(self.register(4).status_code, 201)
+
+    def test_can_be_disabled(self):
+        with self.settings(REVIEWS_THROTTLE={'ENABLED': False, 'RATES': RATES}):
+            statuses = [self.register(index).status_code for index in range(4)]
+        self.assertEqual(statuses, [201] * 4)
@@ -0,0 +1,143 @@
+"""Tests for the trending movies (reviews.trending, /api/movies/trending/)."""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reviews import trending
+from reviews.models import Movie, MovieActivity, Review, TrendingMovie
+
+User = get_user_model()
+URL = '/api/movies/trending/'
+
+
+class TrendingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'viewer{index}', password='x' * 12) for index in range(4)]
+        cls.movies = [Movie.objects.create(title=f'Movie {index}', release_year=2020) for index in range(4)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.now = timezone.now().replace(minute=30, second=0, microsecond=0)
+        patcher = mock.patch('reviews.trending.timezone.now', return_value=self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def review(self, user, movie, rating):
+        self.client.force_authenticate(user)
+        response = self.client.post('/api/reviews/', {'movie_id': movie.pk, 'rating': rating, 'content': 'Seen it.'})
+        self.assertEqual(response.status_code, 201)
+        return Review.objects.get(user=user, movie=movie)
+
+    def recount(self):
+        """{movie_id: (log_weight, review_count, rating_sum)} recomputed from the Review table."""
+        trending.rebuild_activity()
+        activity = MovieActivity.objects.filter(bucket__gte=trending.window_start())
+        return trending.movie_scores(activity, trending.get_config()['HALF_LIFE_HOURS'])
+
+    def stored(self):
+        return {
+            row.movie_id: (row.log_weight, row.review_count, row.rating_sum)
+            for row in TrendingMovie.objects.all()
+        }
+
+    def assertScoresEqual(self, stored, expected):
+        self.assertEqual(set(stored), set(expected))
+        for movie_id, (log_weight, count, rating_sum) in expected.items():
+            self.assertAlmostEqual(stored[movie_id][0], log_weight)
+            self.assertEqual(stored[movie_id][1:], (count, rating_sum))
+
+    def test_recent_reviews_outweigh_older_ones(self):
+        old, new = self.movies[:2]
+        two_days_ago = self.now - timedelta(hours=48)
+        for _ in range(3):
+            trending.record_reviews({old.pk: 5}, two_days_ago)
+        for _ in range(2):
+            trending.record_reviews({new.pk: 5}, self.now)
+
+        rows = list(TrendingMovie.objects.all())
+        self.assertEqual([row.movie_id for row in rows], [new.pk, old.pk])
+        # Scored from the start of each review's hour
+        late = self.now.minute / 60
+        self.assertAlmostEqual(trending.decayed_score(rows[0].log_weight, self.now), 2 * 2 ** (-late / 24))
+        self.assertAlmostEqual(trending.decayed_score(rows[1].log_weight, self.now), 3 * 2 ** (-(48 + late) / 24))
+
+    def test_review_writes_match_a_recount(self):
+        for index, user in enumerate(self.users):
+            self.review(user, self.movies[index % 2], 1 + index)
+        self.client.force_authenticate(self.users[0])
+        items = [{'movie_id': movie.pk, 'rating': 4, 'content': 'Batch.'} for movie in self.movies[2:]]
+        self.assertEqual(self.client.post('/api/reviews/batch/', items, format='json').status_code, 201)
+        self.assertScoresEqual(self.stored(), self.recount())
+
+    def test_edits_and_deletes_rescore(self):
+        first = self.review(self.users[0], self.movies[0], 5)
+        self.review(self.users[1], self.movies[0], 4)
+        only = self.review(self.users[2], self.movies[1], 3)
+
+        self.client.force_authenticate(self.users[0])
+        self.client.patch(f'/api/reviews/{first.pk}/', {'rating': 1}, format='json')
+        self.client.force_authenticate(self.users[2])
+        self.client.delete(f'/api/reviews/{only.pk}/')
+
+        stored = self.stored()
+        self.assertEqual(stored[self.movies[0].pk][1:], (2, 5))
+        self.assertNotIn(self.movies[1].pk, stored)
+        self.assertScoresEqual(stored, self.recount())
+
+    @override_settings(REVIEWS_TRENDING={'TOP_N': 2})
+    def test_compaction_drops_expired_buckets_and_keeps_the_top(self):
+        trending.record_reviews({self.movies[0].pk: 5}, self.now - timedelta(hours=100))
+        trending.record_reviews({self.movies[1].pk: 2, self.movies[2].pk: 4, self.movies[3].pk: 5}, self.now)
+
+        later = self.now + timedelta(hours=80)
+        with mock.patch('reviews.trending.timezone.now', return_value=later):
+            dropped, kept = trending.compact()
+        self.assertEqual((dropped, kept), (1, 2))
+        self.assertFalse(MovieActivity.objects.filter(movie=self.movies[0]).exists())
+        self.assertEqual(
+            list(TrendingMovie.objects.values_list('movie_id', flat=True)),
+            [self.movies[3].pk, self.movies[2].pk],
+        )
+
+    @override_settings(REVIEWS_TRENDING={'TOP_N': 2})
+    def test_movies_join_the_list_only_by_beating_its_lowest(self):
+        hot, warm, cold, new = self.movies
+        trending.record_reviews({hot.pk: 5, warm.pk: 3}, self.now)
+        trending.record_reviews({cold.pk: 5}, self.now - timedelta(hours=72))
+        self.assertEqual(list(TrendingMovie.objects.values_list('movie_id', flat=True)), [hot.pk, warm.pk])
+
+        trending.record_reviews({new.pk: 4}, self.now)
+        self.assertEqual(list(TrendingMovie.objects.values_list('movie_id', flat=True)), [hot.pk, new.pk])
+        # Losing reviews re-scores a listed movie, but never adds one
+        trending.forget_review(new.pk, 4, self.now)
+        self.assertEqual(list(TrendingMovie.objects.values_list('movie_id', flat=True)), [hot.pk])
+        trending.record_reviews({cold.pk: 1}, self.now)
+        trending.forget_review(cold.pk, 1, self.now)
+        self.assertEqual(TrendingMovie.objects.count(), 2)
+
+    def test_endpoint_reads_the_precomputed_list(self):
+        self.review(self.users[0], self.movies[0], 3)
+        self.review(self.users[1], self.movies[1], 5)
+        self.review(self.users[2], self.movies[1], 4)
+        self.client.force_authenticate(None)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [self.movies[1].pk, self.movies[0].pk])
+        hottest = response.data[0]
+        self.assertEqual(hottest['rank'], 1)
+        self.assertEqual(hottest['recent_reviews'], 2)
+        self.assertEqual(hottest['recent_average_rating'], 4.5)
+        self.assertAlmostEqual(hottest['score'], 1.8 * 2 ** (-(self.now.minute / 60) / 24), places=6)
+
+        self.assertEqual(len(self.client.get(f'{URL}?limit=1').data), 1)
+        self.assertEqual(self.client.get(f'{URL}?limit=0').status_code, 400)
@@ -0,0 +1,52 @@
+"""Tests for the per-user review stats (models.with_review_stats)."""
+from django.contrib.auth import get_user_model
+from django.db.models import Avg, Count
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from reviews.models import Review, with_review_stats
+from reviews.serializers import UserDetailSerializer
+from reviews.tests.factories import create_movies, create_users, rate
+
+User = get_user_model()
+
+
+class UserReviewStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users(3)
+        movies = create_movies('A', 'B', 'C', 'D')
+        # users[2] has no reviews
+        rate(cls.users, movies, [[2, 3, 4, 5], [1], []])
+
+    def expected(self, user):
+        reviews = Review.objects.filter(user=user)
+        totals = reviews.aggregate(count=Count('id'), average=Avg('rating'))
+        histogram = {str(rating): reviews.filter(rating=rating).count() for rating in range(1, 6)}
+        average = round(totals['average'], 2) if totals['average'] is not None else None
+        return totals['count'], average, histogram
+
+    def stats(self, data):
+        return data['reviews_count'], data['average_rating'], data['rating_histogram']
+
+    def test_annotations_match_a_direct_aggregate(self):
+        users = with_review_stats(User.objects.filter(pk__in=[user.pk for user in self.users]).order_by('id'))
+        with self.assertNumQueries(1):
+            data = UserDetailSerializer(users, many=True).data
+        self.assertEqual([self.stats(row) for row in data], [self.expected(user) for user in self.users])
+        self.assertEqual(self.stats(data[0]), (4, 3.5, {'1': 0, '2': 1, '3': 1, '4': 1, '5': 1}))
+        self.assertEqual(self.stats(data[2]), (0, None, {str(rating): 0 for rating in range(1, 6)}))
+
+    def test_unannotated_users_aggregate_once(self):
+        user = User.objects.get(pk=self.users[1].pk)
+        with self.assertNumQueries(1):
+            data = UserDetailSerializer(user).data
+        self.assertEqual(self.stats(data), self.expected(user))
+
+    def test_profile_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.users[2])
+        response = client.get(f'/api/users/{self.users[0].pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stats(response.data), self.expected(self.users[0]))
@@ -0,0 +1,113 @@
+"""
+Rate limiting for the write and authentication endpoints.
+
+ScopedCacheThrottle is a DRF throttle, so it runs in APIView.initial(),
+before any serializer, and over-limit requests never reach password hashing
+or the database. Limits are set per scope in REVIEWS_THROTTLE['RATES'] as
+DRF rate strings ("5/min", "100/hour"). A view's scope is its
+`throttle_scope` attribute if it has one, otherwise "<basename>-<action>"
+for viewset actions (e.g. "review-create", "review-batch") and the URL name
+for other views (e.g. "user_register", "token_obtain_pair"). Requests to scopes
+without a rate are not throttled and cost nothing.
+
+Each authenticated user has its own counters; anonymous requests are
+counted per client IP (see DRF's NUM_PROXIES for X-Forwarded-For).
+
+Counting uses a sliding window made of two fixed windows: the estimate is
+the current window's count plus the previous window's count weighted by how
+much of it still overlaps the sliding window. The current count is bumped
+with cache.incr(), which is atomic, and the previous window's count is read
+from the same cache, so every worker sees the same counts. A check is an
+incr() and a get(); with Django's RedisCache incr() is two commands (EXISTS
+and INCR), and the first request of a window also makes an add(). Rejected
+requests are counted too, so a client that keeps retrying stays blocked
+until it backs off for the Retry-After it was sent.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'RATES': {},
+}
+KEY_PREFIX = 'reviews:throttle'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_THROTTLE', {})}
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60). The period is read from its first letter, as in DRF."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def get_scope(request, view):
+    scope = getattr(view, 'throttle_scope', None)
+    if scope:
+        return scope
+    action = getattr(view, 'action', None)
+    basename = getattr(view, 'basename', None)
+    if action and basename:
+        return f'{basename}-{action}'
+    match = request.resolver_match
+    return match.url_name if match else None
+
+
+class ScopedCacheThrottle(BaseThrottle):
+    """Sliding-window rate limit per scope and user (or IP), counted in the cache."""
+
+    def allow_request(self, request, view):
+        config = get_config()
+        if not config['ENABLED']:
+            return True
+        scope = get_scope(request, view)
+        rate = config['RATES'].get(scope)
+        if not rate:
+            return True
+        self.limit, self.duration = parse_rate(rate)
+
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            ident = f'user:{user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        key = f'{KEY_PREFIX}:{scope}:{ident}'
+
+        now = time.time()
+        window = int(now // self.duration)
+        self.elapsed = now - window * self.duration
+        cache = caches[config['ALIAS']]
+        self.current = self._increment(cache, f'{key}:{window}')
+        self.previous = cache.get(f'{key}:{window - 1}', 0)
+        return self._estimate() <= self.limit
+
+    def _increment(self, cache, key):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # First request of the window; the counter must outlive the next
+            # window, which reads it as its previous one
+            if cache.add(key, 1, timeout=2 * self.duration):
+                return 1
+            return cache.incr(key)
+
+    def _estimate(self):
+        return self.previous * (1 - self.elapsed / self.duration) + self.current
+
+    def wait(self):
+        """Seconds until one more request would be allowed, if none are made meanwhile."""
+        excess = self._estimate() - (self.limit - 1)
+        if excess <= 0:
+            return None
+        if self.previous and excess * self.duration / self.previous <= self.duration - self.elapsed:
+            return excess * self.duration / self.previous
+        # Wait for the current window to become the previous one, then for
+        # its weight to decay enough
+        return self.duration - self.elapsed + max(0, self.current - self.limit + 1) / self.current * self.duration
@@ -0,0 +1,254 @@
+"""
+Trending movies behind /api/movies/trending/.
+
+A movie trends when it gets many well rated reviews lately. Every review
+adds rating / 5 points (1 for 5 stars, 0.2 for 1 star) that halve every
+HALF_LIFE_HOURS, and a movie's trending score is its points now:
+
+    score(now) = sum of rating / 5 * 2 ** -((now - written) / half_life)
+
+Reviews are counted per movie and hour in MovieActivity. Review writes bump
+their hour's counters (see reviews.signals), so no request ever scans the
+Review table.
+
+TrendingMovie holds the current top movies. Scores are stored with forward
+decay: log_weight = log2(sum of rating / 5 * 2 ** (written / half_life)),
+times in hours since the Unix epoch. The score now is
+2 ** (log_weight - now / half_life), the same factor for every movie, so
+ordering by log_weight gives the trending order at any time and the rows
+never need re-scoring as time passes. A new review adds its points to
+log_weight in one UPDATE, in log space so nothing overflows. Deletes and
+rating edits re-score their movie from its counters.
+
+`manage.py compact_trending` (run it hourly) drops the counters of hours
+that left the WINDOW_HOURS window, re-scores every movie from the rest and
+keeps the TOP_N best in TrendingMovie. Between runs, a reviewed movie
+joins the list when its score beats the lowest of the TOP_N, which is then
+dropped, so the table never holds more than TOP_N rows. Movies whose score
+falls (deletes, lowered ratings) keep their row until the next compaction.
+"""
+import heapq
+import math
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest, Log, Power, TruncHour
+from django.utils import timezone
+
+from .models import MovieActivity, Review, TrendingMovie
+
+DEFAULTS = {
+    'HALF_LIFE_HOURS': 24,   # hours for a review's points to halve
+    'WINDOW_HOURS': 168,     # hours of activity kept and counted
+    'TOP_N': 100,            # movies kept by compaction, and the most one request returns
+}
+BUCKET = timedelta(hours=1)
+MAX_POINTS = 5
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REVIEWS_TRENDING', {})}
+
+
+def bucket_start(when):
+    """The start of the UTC hour `when` falls in."""
+    return when.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def window_start(now=None, config=None):
+    """The first bucket still counted at `now`."""
+    config = config or get_config()
+    return bucket_start((now or timezone.now()) - timedelta(hours=config['WINDOW_HOURS'])) + BUCKET
+
+
+def _hours(when):
+    return when.timestamp() / 3600
+
+
+def log_points(rating_sum, bucket, half_life):
+    """log_weight of `rating_sum` rating points written in `bucket`."""
+    return math.log2(rating_sum / MAX_POINTS) + _hours(bucket) / half_life
+
+
+def decayed_score(log_weight, now=None, half_life=None):
+    """A TrendingMovie's points at `now`."""
+    half_life = half_life or get_config()['HALF_LIFE_HOURS']
+    return 2 ** (log_weight - _hours(now or timezone.now()) / half_life)
+
+
+def _by_movie(changes, value):
+    """A constant for one movie, or a CASE over the movies of a batch."""
+    if len(changes) == 1:
+        return Value(value(next(iter(changes.values()))))
+    return Case(
+        *[When(movie_id=movie_id, then=Value(value(change))) for movie_id, change in changes.items()],
+        output_field=IntegerField(),
+    )
+
+
+def _bump(changes, bucket):
+    """Add (count, rating) deltas from a {movie_id: (count, rating)} mapping to a bucket."""
+    return MovieActivity.objects.filter(bucket=bucket, movie_id__in=list(changes)).update(
+        review_count=F('review_count') + _by_movie(changes, lambda change: change[0]),
+        rating_sum=F('rating_sum') + _by_movie(changes, lambda change: change[1]),
+    )
+
+
+def record_reviews(ratings, written_at):
+    """
+    Count new reviews from a {movie_id: rating} mapping, all written at
+    `written_at`, and add their points to the trending scores.
+    """
+    if not ratings:
+        return
+    config = get_config()
+    bucket = bucket_start(written_at)
+    if bucket < window_start(config=config):
+        return
+    changes = {movie_id: (1, rating) for movie_id, rating in ratings.items()}
+    if len(changes) > 1 or not _bump(changes, bucket):
+        # New buckets: create them empty so concurrent writers all bump
+        MovieActivity.objects.bulk_create(
+            [MovieActivity(movie_id=movie_id, bucket=bucket) for movie_id in changes], ignore_conflicts=True
+        )
+        _bump(changes, bucket)
+
+    half_life = config['HALF_LIFE_HOURS']
+    trending = TrendingMovie.objects.filter(movie_id__in=list(ratings))
+    missing = set()
+    if len(ratings) > 1:
+        missing = set(ratings) - set(trending.values_list('movie_id', flat=True))
+    added = {movie_id: log_points(rating, bucket, half_life) for movie_id, rating in ratings.items()}
+    points = Value(next(iter(added.values()))) if len(added) == 1 else Case(
+        *[When(movie_id=movie_id, then=Value(value)) for movie_id, value in added.items()],
+        output_field=FloatField(),
+    )
+    # log2(2^a + 2^b) = m + log2(2^(a - m) + 2^(b - m)), m = max(a, b)
+    top = Greatest(F('log_weight'), points)
+    updated = trending.update(
+        log_weight=top + Log(2, Power(2, F('log_weight') - top) + Power(2, points - top)),
+        review_count=F('review_count') + 1,
+        rating_sum=F('rating_sum') + _by_movie(changes, lambda change: change[1]),
+    )
+    if len(ratings) == 1 and not updated:
+        missing = set(ratings)
+    admit(missing)
+
+
+def forget_review(movie_id, rating, written_at):
+    """Take a deleted review (or the old rating of an edited one) out of the counts."""
+    bucket = bucket_start(written_at)
+    if bucket < window_start():
+        return
+    if _bump({movie_id: (-1, -rating)}, bucket):
+        rescore([movie_id])
+
+
+def movie_scores(activity, half_life):
+    """{movie_id: (log_weight, review_count, rating_sum)} from MovieActivity rows."""
+    buckets = {}
+    for movie_id, bucket, review_count, rating_sum in activity.values_list(
+        'movie_id', 'bucket', 'review_count', 'rating_sum'
+    ):
+        if review_count > 0 and rating_sum > 0:
+            buckets.setdefault(movie_id, []).append((bucket, review_count, rating_sum))
+    scores = {}
+    for movie_id, rows in buckets.items():
+        logs = [log_points(rating_sum, bucket, half_life) for bucket, _, rating_sum in rows]
+        top = max(logs)
+        scores[movie_id] = (
+            top + math.log2(sum(2 ** (value - top) for value in logs)),
+            sum(row[1] for row in rows),
+            sum(row[2] for row in rows),
+        )
+    return scores
+
+
+def _save_scores(scores):
+    TrendingMovie.objects.bulk_create(
+        [
+            TrendingMovie(movie_id=movie_id, log_weight=log_weight, review_count=count, rating_sum=rating_sum)
+            for movie_id, (log_weight, count, rating_sum) in scores.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['movie'],
+        update_fields=['log_weight', 'review_count', 'rating_sum'],
+    )
+
+
+def _window_scores(movie_ids, config):
+    activity = MovieActivity.objects.filter(movie_id__in=list(movie_ids), bucket__gte=window_start(config=config))
+    return movie_scores(activity, config['HALF_LIFE_HOURS'])
+
+
+def rescore(movie_ids):
+    """
+    Recompute the trending rows of `movie_ids` from their counters in the
+    window, dropping rows left without activity. Movies that are not
+    trending stay off the list.
+    """
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+    scores = _window_scores(movie_ids, get_config())
+    with transaction.atomic(savepoint=False):
+        TrendingMovie.objects.filter(movie_id__in=set(movie_ids) - set(scores)).delete()
+        for movie_id, (log_weight, count, rating_sum) in scores.items():
+            TrendingMovie.objects.filter(movie_id=movie_id).update(
+                log_weight=log_weight, review_count=count, rating_sum=rating_sum,
+            )
+
+
+def admit(movie_ids):
+    """
+    Score movies that are not trending yet and add those that beat the
+    lowest of the TOP_N trending movies, dropping the rows pushed out.
+    """
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+    config = get_config()
+    top_n = config['TOP_N']
+    scores = _window_scores(movie_ids, config)
+    lowest = TrendingMovie.objects.values_list('log_weight', flat=True)[top_n - 1:top_n].first()
+    if lowest is not None:
+        scores = {movie_id: score for movie_id, score in scores.items() if score[0] > lowest}
+    if not scores:
+        return
+    with transaction.atomic(savepoint=False):
+        _save_scores(scores)
+        if lowest is not None or len(scores) > 1:
+            pushed_out = TrendingMovie.objects.values_list('movie_id', flat=True)[top_n:]
+            TrendingMovie.objects.filter(movie_id__in=list(pushed_out)).delete()
+
+
+def rebuild_activity(now=None):
+    """Recount the window's buckets from the Review table, e.g. after bulk loads. Returns the bucket count."""
+    start = window_start(now)
+    rows = (
+        Review.objects.filter(created_at__gte=start).order_by()
+        .values('movie_id', bucket=TruncHour('created_at', tzinfo=dt_timezone.utc))
+        .annotate(review_count=Count('id'), rating_sum=Sum('rating'))
+    )
+    with transaction.atomic():
+        MovieActivity.objects.all().delete()
+        MovieActivity.objects.bulk_create([MovieActivity(**row) for row in rows], batch_size=1000)
+    return MovieActivity.objects.count()
+
+
+def compact(now=None):
+    """
+    Drop buckets older than the window and keep the TOP_N best movies,
+    re-scored from the remaining buckets. Returns (buckets dropped, movies kept).
+    """
+    config = get_config()
+    start = window_start(now, config)
+    with transaction.atomic():
+        dropped, _ = MovieActivity.objects.filter(bucket__lt=start).delete()
+        scores = movie_scores(MovieActivity.objects.all(), config['HALF_LIFE_HOURS'])
+        best = dict(heapq.nlargest(config['TOP_N'], scores.items(), key=lambda item: (item[1][0], item[0])))
+        TrendingMovie.objects.all().delete()
+        _save_scores(best)
+    return dropped, len(best)
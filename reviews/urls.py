@@ -1,7 +1,11 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import MovieViewSet, ReviewViewSet, UserViewSet, RegisterView
+from .async_views import as_async_view
+from .views import (
+    MovieExportView, MovieViewSet, RegisterView, ReviewExportView, ReviewViewSet, UserViewSet,
+)
 
 # Create a router and register our viewsets
 router = DefaultRouter()
@@ -9,6 +13,19 @@ router.register(r'movies', MovieViewSet, basename='movie')
 router.register(r'reviews', ReviewViewSet, basename='review')
 router.register(r'users', UserViewSet, basename='user')
 
+# Async versions of the hot read routes, under the router's names (see
+# reviews.async_views). Other methods on these URLs reach the router's views.
+router_views = {pattern.name: pattern.callback for pattern in router.urls}
+async_read_urlpatterns = [
+    re_path(r'^movies/$', as_async_view(router_views['movie-list']), name='movie-list'),
+    re_path(r'^movies/(?P<pk>[^/.]+)/$', as_async_view(router_views['movie-detail']), name='movie-detail'),
+    re_path(
+        r'^movies/(?P<pk>[^/.]+)/reviews/$', as_async_view(router_views['movie-reviews']),
+        name='movie-reviews',
+    ),
+    re_path(r'^reviews/$', as_async_view(router_views['review-list']), name='review-list'),
+]
+
 urlpatterns = [
     # JWT Token endpoints
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -17,7 +34,16 @@ urlpatterns = [
     # User registration
     path('auth/register/', RegisterView.as_view(), name='user_register'),
     
+    # Bulk exports (admin only)
+    path('export/reviews/', ReviewExportView.as_view(), name='export_reviews'),
+    path('export/movies/', MovieExportView.as_view(), name='export_movies'),
+]
+
+# ASGI deployments serve the hot reads from the async views
+if getattr(settings, 'REVIEWS_ASYNC_READS', False):
+    urlpatterns += async_read_urlpatterns
+
+urlpatterns += [
     # Include router URLs
     path('', include(router.urls)),
 ]
-
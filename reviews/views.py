@@ -1,27 +1,56 @@
 import logging
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.parsers import MultiPartParser
 from rest_framework.views import APIView
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse
+from django.utils import timezone
 
-from .models import Movie, Review
+from .models import Genre, Movie, MovieRanking, MovieSimilarity, Review, TrendingMovie, with_review_stats
 from .serializers import (
     MovieSerializer,
+    SimilarMovieSerializer,
+    RankedMovieSerializer,
+    TrendingMovieSerializer,
+    RecommendedMovieSerializer,
     ReviewSerializer,
+    ReviewRowSerializer,
     ReviewCreateSerializer,
+    ReviewBatchItemSerializer,
     UserSerializer,
     UserDetailSerializer,
 )
-from .permissions import IsOwnerOrReadOnly, IsAdminOrReadOnly
+from .permissions import CanScrapeMetrics, IsOwnerOrReadOnly, IsAdminOrReadOnly
+from .exceptions import RecommenderUnavailable
+from .filters import FullTextSearchFilter, GenreFilter, RelevanceOrderingFilter
+from .pagination import RankingKeysetPagination, ReviewKeysetPagination
+from .cache import cache_response, invalidate_on_commit
+from .conditional import build_validators, conditional_response
+from .search import filter_movie_title
+from .recommendations import get_model
+from .rankings import OVERALL, genre_scope, get_config as get_ranking_config, update_rankings, year_scope
+from .trending import decayed_score, get_config as get_trending_config, record_reviews
+from .metrics import render_metrics
+from .async_views import AsyncReadMixin
+from .imports import (
+    FORMATS as IMPORT_FORMATS, CatalogError, decode_lines, detect_format, import_movies,
+)
+from .exports import (
+    MOVIE_FIELDS, REVIEW_FIELDS, CSVRenderer, NDJSONRenderer,
+    export_response, filter_updated_range, movie_rows, review_rows,
+)
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class MovieViewSet(viewsets.ModelViewSet):
+class MovieViewSet(AsyncReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing Movie instances.
     
@@ -31,22 +60,167 @@ class MovieViewSet(viewsets.ModelViewSet):
     - PUT/PATCH /api/movies/{id}/ - Update a movie (admin only)
     - DELETE /api/movies/{id}/ - Delete a movie (admin only)
     - GET /api/movies/{id}/reviews/ - Get reviews for a specific movie
+    - GET /api/movies/{id}/similar/ - Get the most similar movies
+    - GET /api/movies/top/ - Top-rated movies, overall, per genre or per year
+    - GET /api/movies/trending/ - Movies with the most well rated recent reviews
+    - POST /api/movies/import/ - Bulk create or update movies from a file (admin only)
+
+    `?genre=Action,Comedy` filters by genre (add `&genre_match=all` to
+    require every genre). `?search=` is answered from the full-text index;
+    combine it with `?ordering=relevance` to rank results. Read actions
+    are served from the versioned response cache (reviews.cache). list,
+    retrieve and reviews have async variants for ASGI (reviews.async_views).
     """
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [GenreFilter, FullTextSearchFilter, RelevanceOrderingFilter]
+    search_index = 'movies'
     search_fields = ['title', 'genre', 'description']
-    ordering_fields = ['title', 'release_year', 'created_at']
+    ordering_fields = [
+        'title', 'release_year', 'created_at', 'review_count', 'average_rating',
+    ]
     ordering = ['title']
+    # Rate limit scope (reviews.throttling); actions may set their own
+    throttle_scope = None
+    
+    def get_queryset(self):
+        """Prefetch genres for the actions that serialize movies."""
+        queryset = super().get_queryset()
+        if self.action != 'reviews':
+            queryset = queryset.prefetch_related('genres')
+        return queryset
+    
+    def get_cache_scopes(self):
+        """Version scopes the cached read responses depend on."""
+        if self.action in ('list', 'similar', 'top', 'trending'):
+            # Neighbour entries embed other movies' titles and ratings
+            return ['movies']
+        return [f"movie:{self.kwargs.get('pk')}"]
+    
+    def get_validators(self, request):
+        """ETag/Last-Modified inputs from aggregate queries, without rendering the body."""
+        if self.action == 'list':
+            stats = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+                last_updated=Max('updated_at'), count=Count('id')
+            )
+            return build_validators(request, stats['last_updated'], stats['count'])
+        
+        movie_updated = Movie.objects.filter(pk=self.kwargs.get('pk')).values_list(
+            'updated_at', flat=True
+        ).first()
+        if movie_updated is None:
+            return None
+        if self.action == 'retrieve':
+            return build_validators(request, movie_updated)
+        
+        # reviews action: the movie row covers rating changes, the review
+        # aggregates cover content edits
+        reviews = Review.objects.filter(movie_id=self.kwargs.get('pk'))
+        rating = request.query_params.get('rating')
+        if rating:
+            if not rating.isdigit() or not 1 <= int(rating) <= 5:
+                return None
+            reviews = reviews.filter(rating=int(rating))
+        stats = reviews.aggregate(last_updated=Max('updated_at'), count=Count('id'))
+        return build_validators(request, movie_updated, stats['last_updated'], stats['count'])
+    
+    async def aget_validators(self, request):
+        """Async get_validators()."""
+        if self.action == 'list':
+            stats = await self.filter_queryset(self.get_queryset()).order_by().aaggregate(
+                last_updated=Max('updated_at'), count=Count('id')
+            )
+            return build_validators(request, stats['last_updated'], stats['count'])
+        
+        movie_updated = await Movie.objects.filter(pk=self.kwargs.get('pk')).values_list(
+            'updated_at', flat=True
+        ).afirst()
+        if movie_updated is None:
+            return None
+        if self.action == 'retrieve':
+            return build_validators(request, movie_updated)
+        
+        reviews = Review.objects.filter(movie_id=self.kwargs.get('pk'))
+        rating = request.query_params.get('rating')
+        if rating:
+            if not rating.isdigit() or not 1 <= int(rating) <= 5:
+                return None
+            reviews = reviews.filter(rating=int(rating))
+        stats = await reviews.aaggregate(last_updated=Max('updated_at'), count=Count('id'))
+        return build_validators(request, movie_updated, stats['last_updated'], stats['count'])
+    
+    @conditional_response
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @conditional_response
+    @cache_response
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer([movie async for movie in queryset], many=True).data)
+    
+    @conditional_response
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    @conditional_response
+    @cache_response
+    async def aretrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(await self.aget_object()).data)
     
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    @conditional_response
+    @cache_response
     def reviews(self, request, pk=None):
         """
         Get all reviews for a specific movie.
         Supports filtering by rating and sorting.
         """
-        movie = self.get_object()
+        reviews = self.get_movie_reviews(request, self.get_object())
+        if isinstance(reviews, Response):
+            return reviews
+        
+        # Pagination (keyset when ?pagination=cursor, page numbers otherwise)
+        if ReviewKeysetPagination.is_requested(request):
+            paginator = ReviewKeysetPagination()
+            page = paginator.paginate_queryset(reviews, request, view=self)
+            return paginator.get_paginated_response(ReviewRowSerializer.serialize(page))
+
+        page = self.paginate_queryset(reviews)
+        if page is not None:
+            return self.get_paginated_response(ReviewRowSerializer.serialize(page))
+        
+        return Response(ReviewRowSerializer.serialize(reviews))
+    
+    @conditional_response
+    @cache_response
+    async def areviews(self, request, pk=None):
+        reviews = self.get_movie_reviews(request, await self.aget_object())
+        if isinstance(reviews, Response):
+            return reviews
+        
+        if ReviewKeysetPagination.is_requested(request):
+            paginator = ReviewKeysetPagination()
+            page = await paginator.apaginate_queryset(reviews, request, view=self)
+            return paginator.get_paginated_response(ReviewRowSerializer.serialize(page))
+
+        page = await self.apaginate_queryset(reviews)
+        if page is not None:
+            return self.get_paginated_response(ReviewRowSerializer.serialize(page))
+        
+        return Response(ReviewRowSerializer.serialize([row async for row in reviews]))
+    
+    def get_movie_reviews(self, request, movie):
+        """
+        The rows of `movie`'s reviews filtered and sorted by the query
+        parameters, or a 400 Response for an invalid rating.
+        """
         reviews = Review.objects.filter(movie=movie)
         
         # Filter by rating if provided
@@ -74,17 +248,153 @@ class MovieViewSet(viewsets.ModelViewSet):
         else:
             reviews = reviews.order_by('-created_at')
         
-        # Pagination
-        page = self.paginate_queryset(reviews)
+        # Read-only fast path: fetch only the serialized columns
+        return ReviewRowSerializer.prepare(reviews)
+    
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    @cache_response
+    def similar(self, request, pk=None):
+        """
+        Get the movies most similar to this one, best first, from the
+        precomputed MovieSimilarity table (see `manage.py build_similarity`).
+        `?limit=N` returns only the first N neighbours.
+        """
+        if not str(pk).isdigit():
+            raise NotFound()
+        
+        neighbors = MovieSimilarity.objects.filter(movie_id=pk).select_related(
+            'similar_movie'
+        ).order_by('rank')
+        limit = request.query_params.get('limit')
+        if limit:
+            if not limit.isdigit() or int(limit) < 1:
+                return Response(
+                    {"error": "Limit must be a positive integer."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            neighbors = neighbors[:int(limit)]
+        
+        neighbors = list(neighbors)
+        # Only an empty result needs a second query to tell "no neighbours"
+        # apart from "no such movie"
+        if not neighbors and not Movie.objects.filter(pk=pk).exists():
+            raise NotFound()
+        return Response(SimilarMovieSerializer(neighbors, many=True).data)
+    
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    @cache_response
+    def top(self, request):
+        """
+        Get the top-rated movies, best first, ranked by Bayesian average from
+        the precomputed MovieRanking table (see reviews.rankings): overall,
+        or within `?genre=<name>` or `?year=<release year>`. Only movies with
+        at least `?min_reviews=N` reviews are ranked. Pages are numbered, or
+        keyset with `?pagination=cursor` for cheap deep pages.
+        """
+        scope = self.get_ranking_scope(request)
+        min_reviews = request.query_params.get('min_reviews')
+        if min_reviews is None:
+            min_reviews = get_ranking_config()['MIN_REVIEWS']
+        elif not min_reviews.isdigit():
+            raise ValidationError({'min_reviews': 'Must be a non-negative integer.'})
+        rankings = MovieRanking.objects.filter(
+            scope=scope, review_count__gte=int(min_reviews)
+        ).select_related('movie')
+        
+        if RankingKeysetPagination.is_requested(request):
+            paginator = RankingKeysetPagination()
+            page = paginator.paginate_queryset(rankings, request, view=self)
+            return paginator.get_paginated_response(RankedMovieSerializer(page, many=True).data)
+        
+        page = self.paginate_queryset(rankings)
+        start = self.paginator.page.start_index() if page is not None else 1
+        rows = page if page is not None else list(rankings)
+        for rank, ranking in enumerate(rows, start=start):
+            ranking.rank = rank
+        data = RankedMovieSerializer(rows, many=True).data
         if page is not None:
-            serializer = ReviewSerializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(data)
+        return Response(data)
+    
+    def get_ranking_scope(self, request):
+        """The leaderboard `?genre=` or `?year=` selects; the overall one by default."""
+        genre = request.query_params.get('genre')
+        year = request.query_params.get('year')
+        if genre and year:
+            raise ValidationError({'genre': 'Rank within a genre or a year, not both.'})
+        if genre:
+            genre_id = Genre.objects.filter(name__iexact=genre).values_list('id', flat=True).first()
+            if genre_id is None:
+                raise NotFound(f'No genre named "{genre}".')
+            return genre_scope(genre_id)
+        if year:
+            if not year.isdigit():
+                raise ValidationError({'year': 'Year must be a positive integer.'})
+            return year_scope(int(year))
+        return OVERALL
+    
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    @cache_response
+    def trending(self, request):
+        """
+        Get the movies trending now, hottest first, from the precomputed
+        TrendingMovie table (see reviews.trending): each recent review counts
+        rating / 5 points, halving every REVIEWS_TRENDING['HALF_LIFE_HOURS'].
+        `?limit=N` returns the first N (default: the page size, at most
+        REVIEWS_TRENDING['TOP_N']).
+        """
+        config = get_trending_config()
+        limit = request.query_params.get('limit')
+        if limit is None:
+            limit = self.paginator.page_size if self.paginator else config['TOP_N']
+        elif not limit.isdigit() or int(limit) < 1:
+            return Response(
+                {"error": "Limit must be a positive integer."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        serializer = ReviewSerializer(reviews, many=True, context={'request': request})
-        return Response(serializer.data)
+        trending = list(TrendingMovie.objects.select_related('movie')[:min(int(limit), config['TOP_N'])])
+        now = timezone.now()
+        for rank, row in enumerate(trending, start=1):
+            row.rank = rank
+            row.score = decayed_score(row.log_weight, now, config['HALF_LIFE_HOURS'])
+        return Response(TrendingMovieSerializer(trending, many=True).data)
+    
+    @action(
+        detail=False, methods=['post'], url_path='import', throttle_scope='movie-import',
+        permission_classes=[IsAdminUser], parser_classes=[MultiPartParser],
+    )
+    def bulk_import(self, request):
+        """
+        Create or update movies from an uploaded catalog (admin only).
+        
+        Upload the file as `file` (multipart), in CSV, NDJSON or MovieLens
+        u.item format, guessed from its extension or given as `format`. Rows
+        are upserted on `external_id` in batches as the file is read (see
+        reviews.imports); the response counts created, updated and rejected rows.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Upload the catalog as the "file" field.'})
+        fmt = request.data.get('format') or detect_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            raise ValidationError({
+                'format': f"Expected one of {', '.join(IMPORT_FORMATS)}; "
+                          f'cannot tell the format of "{upload.name}".'
+            })
+        
+        try:
+            result = import_movies(decode_lines(upload, fmt), fmt)
+        except CatalogError as exc:
+            raise ValidationError({'file': str(exc), 'imported': exc.result.as_dict()})
+        logger.info(
+            f"Movie import by {request.user.username}: {result.created} created, "
+            f"{result.updated} updated, {result.rejected} rejected"
+        )
+        return Response(result.as_dict())
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(AsyncReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing Review instances.
     
@@ -93,14 +403,103 @@ class ReviewViewSet(viewsets.ModelViewSet):
     - GET /api/reviews/{id}/ - Retrieve a review (public)
     - PUT/PATCH /api/reviews/{id}/ - Update a review (owner only)
     - DELETE /api/reviews/{id}/ - Delete a review (owner only)
+    - POST /api/reviews/batch/ - Create many reviews at once (authenticated users only)
+
+    Add `?pagination=cursor` to list with keyset pagination (no COUNT/OFFSET).
+    Read actions are served from the versioned response cache (reviews.cache).
+    list has an async variant for ASGI (reviews.async_views).
+
+    `?search=` matches review content or movie title through the full-text
+    index; combine it with `?ordering=relevance` to rank results.
     """
     queryset = Review.objects.select_related('movie', 'user').all()
     serializer_class = ReviewSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, RelevanceOrderingFilter]
+    search_index = 'reviews'
     search_fields = ['movie__title', 'content']
     ordering_fields = ['rating', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    batch_max_size = 100
+    
+    def get_cache_scopes(self):
+        """Version scopes the cached read responses depend on."""
+        return ['reviews']
+    
+    def get_validators(self, request):
+        """ETag/Last-Modified inputs from aggregate queries, without rendering the body."""
+        if self.action == 'retrieve':
+            row = Review.objects.filter(pk=self.kwargs.get('pk')).values_list(
+                'updated_at', 'movie__updated_at'
+            ).first()
+            return build_validators(request, *row) if row else None
+        
+        # Movie.updated_at changes on renames, which alter the embedded titles
+        stats = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            last_updated=Max('updated_at'), count=Count('id')
+        )
+        movies_updated = Movie.objects.aggregate(last_updated=Max('updated_at'))['last_updated']
+        return build_validators(request, stats['last_updated'], stats['count'], movies_updated)
+    
+    async def aget_validators(self, request):
+        """Async get_validators()."""
+        if self.action == 'retrieve':
+            row = await Review.objects.filter(pk=self.kwargs.get('pk')).values_list(
+                'updated_at', 'movie__updated_at'
+            ).afirst()
+            return build_validators(request, *row) if row else None
+        
+        stats = await self.filter_queryset(self.get_queryset()).order_by().aaggregate(
+            last_updated=Max('updated_at'), count=Count('id')
+        )
+        movies_updated = (await Movie.objects.aaggregate(last_updated=Max('updated_at')))['last_updated']
+        return build_validators(request, stats['last_updated'], stats['count'], movies_updated)
+    
+    @conditional_response
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """List reviews through the read-only ReviewRowSerializer fast path."""
+        queryset = ReviewRowSerializer.prepare(self.filter_queryset(self.get_queryset()))
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ReviewRowSerializer.serialize(page))
+        
+        return Response(ReviewRowSerializer.serialize(queryset))
+    
+    @conditional_response
+    @cache_response
+    async def alist(self, request, *args, **kwargs):
+        queryset = ReviewRowSerializer.prepare(self.filter_queryset(self.get_queryset()))
+        
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ReviewRowSerializer.serialize(page))
+        
+        return Response(ReviewRowSerializer.serialize([row async for row in queryset]))
+    
+    @conditional_response
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a review through the read-only ReviewRowSerializer fast path."""
+        lookup = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        try:
+            row = ReviewRowSerializer.prepare(self.get_queryset().filter(pk=lookup)).first()
+        except (TypeError, ValueError):
+            row = None
+        if row is None:
+            raise NotFound('No Review matches the given query.')
+        return Response(ReviewRowSerializer.serialize([row])[0])
+    
+    @property
+    def paginator(self):
+        """Switch to keyset pagination when the client opts in with ?pagination=cursor."""
+        if not hasattr(self, '_paginator'):
+            if ReviewKeysetPagination.is_requested(self.request):
+                self._paginator = ReviewKeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
     
     def get_serializer_class(self):
         """Use different serializer for create action."""
@@ -114,10 +513,10 @@ class ReviewViewSet(viewsets.ModelViewSet):
         """
         queryset = Review.objects.select_related('movie', 'user').all()
         
-        # Filter by movie title (case-insensitive partial match)
+        # Filter by movie title (case-insensitive word-prefix match via the search index)
         movie_title = self.request.query_params.get('movie_title', None)
         if movie_title:
-            queryset = queryset.filter(movie__title__icontains=movie_title)
+            queryset = filter_movie_title(queryset, movie_title)
         
         # Filter by rating
         rating = self.request.query_params.get('rating', None)
@@ -135,17 +534,149 @@ class ReviewViewSet(viewsets.ModelViewSet):
         """Set the user to the current authenticated user."""
         serializer.save(user=self.request.user)
         logger.info(f"Review created by user {self.request.user.username}")
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def batch(self, request):
+        """
+        Create up to `batch_max_size` reviews for the current user from a JSON
+        list of {movie_id, rating, content} objects.
+        
+        The whole batch is validated with one query for unknown movies and one
+        for movies the user already reviewed, and the valid items are inserted
+        with a single bulk_create. Responds 201 when every item was created,
+        207 when only some were and 400 when none were, with a result per item.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'detail': 'Expected a non-empty list of reviews.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > self.batch_max_size:
+            return Response(
+                {'detail': f'A batch may contain at most {self.batch_max_size} reviews.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        errors, valid = {}, {}
+        for index, item in enumerate(items):
+            serializer = ReviewBatchItemSerializer(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+        
+        movie_ids = {data['movie_id'] for data in valid.values()}
+        known = set(Movie.objects.filter(pk__in=movie_ids).values_list('pk', flat=True))
+        reviewed = set(
+            Review.objects.filter(user=request.user, movie_id__in=known)
+            .values_list('movie_id', flat=True)
+        )
+        
+        new_reviews, batched = {}, set()
+        for index, data in valid.items():
+            movie_id = data['movie_id']
+            if movie_id not in known:
+                errors[index] = {'movie_id': [f'Invalid pk "{movie_id}" - object does not exist.']}
+            elif movie_id in reviewed:
+                errors[index] = {'movie': ['You have already reviewed this movie.']}
+            elif movie_id in batched:
+                errors[index] = {'movie': ['This movie appears more than once in the batch.']}
+            else:
+                batched.add(movie_id)
+                new_reviews[index] = Review(user=request.user, **data)
+        
+        if new_reviews:
+            try:
+                with transaction.atomic():
+                    Review.objects.bulk_create(new_reviews.values())
+                    Movie.add_ratings({review.movie_id: review.rating for review in new_reviews.values()})
+                    update_rankings(batched)
+                    record_reviews(
+                        {review.movie_id: review.rating for review in new_reviews.values()},
+                        next(iter(new_reviews.values())).created_at,
+                    )
+            except IntegrityError:
+                # Another request reviewed one of these movies since the check
+                return Response(
+                    {'detail': 'Some of these movies were reviewed concurrently; retry the batch.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            # bulk_create skips the signals that expire cached responses
+            invalidate_on_commit('reviews', 'movies', *(f'movie:{movie_id}' for movie_id in batched))
+            logger.info(f"{len(new_reviews)} reviews created in a batch by user {request.user.username}")
+        
+        results = []
+        for index in range(len(items)):
+            if index in new_reviews:
+                review = new_reviews[index]
+                results.append({'index': index, 'status': 'created', 'id': review.id, 'movie_id': review.movie_id})
+            else:
+                results.append({'index': index, 'status': 'error', 'errors': errors[index]})
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif new_reviews:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': len(new_reviews), 'failed': len(errors), 'results': results},
+            status=response_status,
+        )
 
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for user profile viewing.
     
+    - GET /api/users/ - List user profiles (authenticated)
     - GET /api/users/{id}/ - Get user profile (authenticated)
+    - GET /api/users/{id}/recommendations/ - Movies recommended for a user
+    - GET /api/users/me/recommendations/ - Movies recommended for you
+    
+    Review stats come from a single annotated query (see with_review_stats).
     """
-    queryset = User.objects.all()
+    queryset = with_review_stats(User.objects.order_by('id'))
     serializer_class = UserDetailSerializer
     permission_classes = [IsAuthenticated]
+    max_recommendations = 100
+    
+    @action(detail=True, methods=['get'])
+    def recommendations(self, request, pk=None):
+        """
+        Get the top unseen movies for a user, ranked by the offline matrix
+        factorization model (see `manage.py train_recommender`).
+        `?limit=N` sets how many are returned (default 10, max 100).
+        """
+        if pk == 'me':
+            user_id = request.user.pk
+        elif str(pk).isdigit() and User.objects.filter(pk=pk).exists():
+            user_id = int(pk)
+        else:
+            raise NotFound()
+        
+        limit = request.query_params.get('limit', '10')
+        if not limit.isdigit() or not 1 <= int(limit) <= self.max_recommendations:
+            return Response(
+                {"error": f"Limit must be between 1 and {self.max_recommendations}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        model = get_model()
+        if model is None:
+            raise RecommenderUnavailable()
+        
+        seen = Review.objects.filter(user_id=user_id).values_list('movie_id', flat=True)
+        ranked = model.recommend(user_id, exclude_movie_ids=seen, count=int(limit))
+        movies = Movie.objects.in_bulk([movie_id for movie_id, _ in ranked])
+        results = []
+        for movie_id, predicted_rating in ranked:
+            # Skip movies deleted since the model was trained
+            movie = movies.get(movie_id)
+            if movie is not None:
+                movie.predicted_rating = predicted_rating
+                results.append(movie)
+        return Response(RecommendedMovieSerializer(results, many=True).data)
 
 
 # Separate view for registration to ensure AllowAny permission
@@ -169,3 +700,65 @@ class RegisterView(APIView):
                 status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ReviewExportView(APIView):
+    """
+    Stream every review as NDJSON or CSV (admin only).
+    GET /api/export/reviews/
+    
+    Choose the format with `?format=ndjson|csv` or the Accept header, and
+    narrow the export with `movie`, `rating`, `updated_after` and
+    `updated_before` (ISO 8601).
+    """
+    permission_classes = [IsAdminUser]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    
+    def get(self, request):
+        queryset = Review.objects.all()
+        
+        movie = request.query_params.get('movie')
+        if movie:
+            if not movie.isdigit():
+                raise ValidationError({'movie': 'Expected a movie id.'})
+            queryset = queryset.filter(movie_id=int(movie))
+        
+        rating = request.query_params.get('rating')
+        if rating:
+            if rating not in {'1', '2', '3', '4', '5'}:
+                raise ValidationError({'rating': 'Rating must be between 1 and 5.'})
+            queryset = queryset.filter(rating=int(rating))
+        
+        queryset = filter_updated_range(queryset, request.query_params)
+        return export_response(request, review_rows(queryset), REVIEW_FIELDS, 'reviews')
+
+
+class MovieExportView(APIView):
+    """
+    Stream every movie as NDJSON or CSV (admin only).
+    GET /api/export/movies/
+    
+    Accepts the same format selection and `updated_after` / `updated_before`
+    filters as the review export.
+    """
+    permission_classes = [IsAdminUser]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    
+    def get(self, request):
+        queryset = filter_updated_range(Movie.objects.all(), request.query_params)
+        return export_response(request, movie_rows(queryset), MOVIE_FIELDS, 'movies')
+
+
+class MetricsView(APIView):
+    """
+    Prometheus scrape endpoint with per-route request histograms.
+    GET /metrics
+    """
+    permission_classes = [CanScrapeMetrics]
+    
+    def perform_authentication(self, request):
+        # Authenticate lazily, once CanScrapeMetrics has ruled out the scrape token
+        pass
+    
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')